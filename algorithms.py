@@ -1,9 +1,19 @@
 import random # choice, shuffle methods
 import math # optional, remove later
 from time import time
+from array import array
+from copy import copy
+from multiprocessing import Pool, cpu_count
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from collections import defaultdict # optional, remove later
+from functools import partial
+from operator import methodcaller
 from gamestatenode import GameStateNode
-from util_eval import always_zero
+from util_eval import always_zero, batch_evaluate, shift_endgame_utility
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from move_ordering import MoveOrdering
+from search_stats import SearchStats
 
 INF = float('inf')
 """
@@ -52,9 +62,6 @@ for your algorithms.
 It takes similar parameters and returns the same 4-tuple as the algorithms you must write in Parts 1 and 2.
 """
 
-def always_zero():
-    return 0
-
 def RandChoice(initial_state,
     util_fn,                        # Endgame Utility Evaluation function. Takes a state and the maximizing player as parameters
     eval_fn = always_zero,          # Cutoff Heuristic Evaluation function. Takes a state and the maximizing player as parameters
@@ -67,7 +74,7 @@ def RandChoice(initial_state,
         # Increment counter['num_nodes_seen'] whenever a node is traversed.
         # Increment counter['num_endgame_evals'] whenever util_fn is called.
         # Increment counter['num_heuristic_evals'] whenever eval_fn is called.
-    counter = {'num_nodes_seen':0,'num_endgame_evals':0, 'num_heuristic_evals':0}, # A counter for tracking stats
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
     random_move_order = False,     # If true, consider moves in random order [IGNORED]
     transposition_table = False    # If true, use a transposition table. [IGNORED]
     ):
@@ -77,6 +84,8 @@ def RandChoice(initial_state,
     the action chosen, the final "expected" state, the "expected" utility and
     whether or not the search was terminated early by the state_callback_fn
     """
+    if counter is None:
+        counter = SearchStats()
     # A recursive helper function.
     # Has access to all the parameters of the outer function,
     # avoids excessive passing of unchanging parameters
@@ -103,7 +112,7 @@ def RandChoice(initial_state,
         # Visualize on downwards traversal. OPTIONAL - could remove
         state_callback_fn(state,None)
         # Recursive step - pick a valid action at random
-        action = random.choice(state.get_all_actions())
+        action = random.choice(state.get_cached_actions())
         # What child state results from that action?
         child_state = state.generate_next_state(action)
         # Search recursively from the child_state
@@ -155,14 +164,21 @@ state_callback_fn: GUI callback function. It takes two parameters:
 
 counter: A dict with stats to maintain count of. Count the number of nodes seen (visited),
     and the number of endgame/heuristic evaluations performed (calls to util_fn and eval_fn).
+    If None, each search counts into a fresh SearchStats (see search_stats.py), a dict
+    that the alpha-beta searches also fill with per-ply, table and timing statistics.
 
 random_move_order: A True/False flag indicating whether moves should be
     considered in random order or default order.
 
-transposition_table: A True/False flag indicating whether or not a transposition
-    table should be used. For Part 1 you may ignore this parameter, but Part 2
-    requires that each algorithm address this. You may, of course, implement it early
-    for Part 1 submission, though it will not be tested.
+transposition_table: Either a True/False flag indicating whether or not a transposition
+    table should be used for this search alone, or a TranspositionTable object
+    (see transposition_table.py) to use and keep filling, so that it can be shared
+    between searches (e.g. kept by an agent across the moves of a game).
+    The table is keyed by state hash and stores the value of each searched state along
+    with the remaining depth it was searched to, so a stored value is only reused for
+    a search at most that deep. Values are stored shifted by the path length of their
+    state (see util_eval.shift_endgame_utility), so that wins and losses scored by how
+    soon they happen stay right for the same state reached later in the game.
 
 Returns the following 4-tuple.
     1) The "best" action to take from initial_state.
@@ -172,40 +188,120 @@ Returns the following 4-tuple.
     4) Whether or not terminated search early from the state_callback_fn (True/False)
 """
 
+def get_transposition_table(transposition_table, new_search = True):
+    """
+    Interprets the transposition_table parameter of the search algorithms.
+    A TranspositionTable is used as given (and a new search is started on it, unless new_search is False),
+    True creates a fresh table for a single search, and False means no table (None).
+    """
+    if isinstance(transposition_table, TranspositionTable):
+        if new_search:
+            transposition_table.new_search()
+        return transposition_table
+    if transposition_table:
+        return TranspositionTable()
+    return None
+
+def get_move_ordering(custom_move_ordering):
+    """
+    Interprets the custom_move_ordering parameter of the search algorithms, like
+    get_transposition_table: a MoveOrdering is used as given, True creates a fresh one,
+    and False means no killer / history ordering (None).
+    """
+    if isinstance(custom_move_ordering, MoveOrdering):
+        return custom_move_ordering
+    if custom_move_ordering:
+        return MoveOrdering()
+    return None
+
+def get_ordered_actions(state, random_move_order = False, preferred_actions = (), move_ordering = None, ply = 0):
+    """
+    Returns a new list of the actions from state, shuffled if random_move_order,
+    then sorted by the killer moves and history of move_ordering (at the given ply), if any.
+    Any legal actions in preferred_actions (None entries are skipped) are then
+    moved to the front, in the order given.
+    """
+    actions = list(state.get_cached_actions())
+    if random_move_order:
+        random.shuffle(actions)
+    if move_ordering is not None:
+        actions = move_ordering.order(actions, ply)
+    for action in reversed(preferred_actions):
+        if action is not None and action in actions:
+            actions.remove(action)
+            actions.insert(0, action)
+    return actions
+
+def get_principal_variation(initial_state, leaf_node = None, table = None, max_length = INF):
+    """
+    Returns the list of actions along the expected line of play from initial_state.
+    Taken from the path to leaf_node if there is one; otherwise (e.g. when a
+    transposition table cut the search short) follows the best moves stored in table.
+    """
+    pv = []
+    if leaf_node is not None:
+        state = leaf_node
+        while state is not None and state.get_path_length() > initial_state.get_path_length():
+            pv.append(state.get_previous_action())
+            state = state.get_parent()
+        pv.reverse()
+        return pv
+    state = initial_state
+    while table is not None and len(pv) < max_length:
+        action = table.get_best_move(hash(state))
+        if action is None or action not in state.get_cached_actions():
+            break
+        pv.append(action)
+        state = state.generate_next_state(action)
+    return pv
+
 def MaximizingDFS(initial_state,
     util_fn,
     eval_fn = always_zero,
     cutoff = INF,
     state_callback_fn = lambda state, state_value : False, # A callback function for the GUI. If it returns True, terminate
-    counter = {'num_nodes_seen':0,'num_endgame_evals':0, 'num_heuristic_evals':0}, # A counter for tracking stats,
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
     random_move_order = False,     # If true, consider moves in random order
-    transposition_table = False    # If true, use a transposition table. [IGNORE until Part 2]
+    transposition_table = False    # If true (or a TranspositionTable), use a transposition table.
     ):
     """
     Searches down ALL paths of the game tree, performing Maximizing Depth First Search
     Both players are modeled as maximizing the utility for the first player.
     This could be interpreted as an optimistic model of your opponents behavior.
     """
+    if counter is None:
+        counter = SearchStats()
+    table = get_transposition_table(transposition_table)
+    shift_utility = partial(shift_endgame_utility, util_fn)
 
     def MaximizingDFS_helper(state):
-        best_action = None
-        best_leaf_node = None
-        terminated = False
-        transposition_table_list = {}
         counter['num_nodes_seen'] += 1
+        remaining_depth = cutoff - (state.get_path_length() - initial_state.get_path_length())
+
+        # Already searched at least this deep, maybe from another branch (the root is always searched):
+        if table is not None:
+            key = hash(state)
+            entry = table.lookup(key)
+            if entry is not None and entry[0] >= remaining_depth and state is not initial_state:
+                return entry[3], None, shift_utility(entry[1], -state.get_path_length()), False
+
         # Base case - endgame leaf node:
         if state.is_endgame_state() :
             endgame_util = util_fn(state, initial_state.get_current_player())
             counter['num_endgame_evals'] += 1
+            if table is not None:
+                table.store(key, INF, shift_utility(endgame_util, state.get_path_length()))
             # Visualize leaf node with utility, check for early termination signal
             terminated = state_callback_fn(state, endgame_util)
             # No action because leaf node!
             return None, state, endgame_util, terminated
 
         # Early cutoff evaluation:
-        if state.get_path_length() - initial_state.get_path_length() >= cutoff:
+        if remaining_depth <= 0:
             heuristic_eval = eval_fn(state, initial_state.get_current_player())
             counter['num_heuristic_evals'] += 1
+            if table is not None:
+                table.store(key, 0, shift_utility(heuristic_eval, state.get_path_length()))
             # Visualize leaf node with evaluation, check for early termination signal
             terminated = state_callback_fn(state, heuristic_eval)
             # No action because leaf node!
@@ -214,24 +310,17 @@ def MaximizingDFS(initial_state,
         # Visualize on downwards traversal. OPTIONAL - could remove
         state_callback_fn(state,None)
 
-        # Recursive step - pick a valid action at random
-        actions = state.get_all_actions(state)
+        #find the highest utility among all actions
         max_utility = -INF
-            #find the highest utility among all actions
-
-        for action in actions:
+        best_action = None
+        best_leaf_node = None
+        for action in get_ordered_actions(state, random_move_order):
             # What child state results from that action?
             child_state = state.generate_next_state(action)
 
             # Search recursively from the child_state
             child_action, leaf_node, exp_util, terminated = MaximizingDFS_helper(child_state)
 
-            if transposition_table:
-                if (action in transposition_table_list):
-                    return child_action, None, exp_util, terminated
-                else:
-                    transposition_table_list.update({action: exp_util})
-
             if exp_util > max_utility:
                 max_utility = exp_util
                 best_action = action
@@ -240,9 +329,13 @@ def MaximizingDFS(initial_state,
             if terminated:
                 return best_action, best_leaf_node, max_utility, terminated
             # Visualize on upwards traversal, now with updated utility!
-            terminated = state_callback_fn(state, exp_util) or terminated
+            terminated = state_callback_fn(state, exp_util)
+            if terminated:
+                return best_action, best_leaf_node, max_utility, terminated
 
-        return best_action, best_leaf_node, max_utility, terminated
+        if table is not None:
+            table.store(key, remaining_depth, shift_utility(max_utility, state.get_path_length()), best_move = best_action)
+        return best_action, best_leaf_node, max_utility, False
 
     # Simply call the helper function on the initial_state.
     return MaximizingDFS_helper(initial_state)
@@ -252,9 +345,9 @@ def MinimaxSearch(initial_state,
     eval_fn = always_zero,
     cutoff = INF,
     state_callback_fn = lambda state, state_value : False, # A callback function for the GUI. If it returns True, terminate
-    counter = {'num_nodes_seen':0,'num_endgame_evals':0, 'num_heuristic_evals':0}, # A counter for tracking stats
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
     random_move_order = False,     # If true, consider moves in random order
-    transposition_table = False    # If true, use a transposition table. [IGNORE until Part 2]
+    transposition_table = False    # If true (or a TranspositionTable), use a transposition table.
     ):
 
     """
@@ -263,31 +356,39 @@ def MinimaxSearch(initial_state,
     or maximizing / minimizing the first player (maximizer)'s utility.
     This could be interpreted as a pessimistic model of your opponents behavior.
     """
-    """
-    Searches down ALL paths of the game tree, performing Maximizing Depth First Search
-    Both players are modeled as maximizing the utility for the first player.
-    This could be interpreted as an optimistic model of your opponents behavior.
-    """
+    if counter is None:
+        counter = SearchStats()
+    table = get_transposition_table(transposition_table)
+    shift_utility = partial(shift_endgame_utility, util_fn)
 
     def Minimax_helper(state):
-        best_action = None
-        best_leaf_node = None
-        terminated = False
-        transposition_table_list = {}
         counter['num_nodes_seen'] += 1
+        remaining_depth = cutoff - (state.get_path_length() - initial_state.get_path_length())
+
+        # Already searched at least this deep, maybe from another branch (the root is always searched):
+        if table is not None:
+            key = hash(state)
+            entry = table.lookup(key)
+            if entry is not None and entry[0] >= remaining_depth and state is not initial_state:
+                return entry[3], None, shift_utility(entry[1], -state.get_path_length()), False
+
         # Base case - endgame leaf node:
         if state.is_endgame_state() :
             endgame_util = util_fn(state, initial_state.get_current_player())
             counter['num_endgame_evals'] += 1
+            if table is not None:
+                table.store(key, INF, shift_utility(endgame_util, state.get_path_length()))
             # Visualize leaf node with utility, check for early termination signal
             terminated = state_callback_fn(state, endgame_util)
             # No action because leaf node!
             return None, state, endgame_util, terminated
 
         # Early cutoff evaluation:
-        if state.get_path_length() - initial_state.get_path_length() >= cutoff:
+        if remaining_depth <= 0:
             heuristic_eval = eval_fn(state, initial_state.get_current_player())
             counter['num_heuristic_evals'] += 1
+            if table is not None:
+                table.store(key, 0, shift_utility(heuristic_eval, state.get_path_length()))
             # Visualize leaf node with evaluation, check for early termination signal
             terminated = state_callback_fn(state, heuristic_eval)
             # No action because leaf node!
@@ -296,66 +397,33 @@ def MinimaxSearch(initial_state,
         # Visualize on downwards traversal. OPTIONAL - could remove
         state_callback_fn(state,None)
 
-        # Recursive step - pick a valid action at random
-        current_player = state.get_current_player()
-        actions = state.get_all_actions(state)
-        max_utility = -INF
-        min_utility = INF
+        is_max_player = state.get_current_player() == initial_state.get_current_player()
+        best_utility = -INF if is_max_player else INF
         best_action = None
         best_leaf_node = None
-        terminated = False
 
-        # if max player
-        if (current_player == initial_state.get_current_player()):
-            for action in actions:
-                # What child state results from that action?
-                child_state = state.generate_next_state(action)
-                # Search recursively from the child_state
-                child_action, leaf_node, exp_util, terminated = Minimax_helper(child_state)
-
-                if transposition_table:
-                    if (action in transposition_table_list):
-                        return child_action, None, exp_util, terminated
-                    else:
-                        transposition_table_list.update({action: exp_util})
-
-                if (exp_util > max_utility):
-                    max_utility = exp_util
-                    best_action = action
-                    best_leaf_node = leaf_node
-
-                if (terminated):
-                    return best_action, best_leaf_node, max_utility, terminated
-                # Visualize on upwards traversal, now with updated utility!
-                terminated = state_callback_fn(state, exp_util) or terminated
-
-            return best_action, best_leaf_node, max_utility, terminated
-
-        # if min player
-        else:
-            for action in actions:
-                # What child state results from that action?
-                child_state = state.generate_next_state(action)
-                # Search recursively from the child_state
-                child_action, leaf_node, exp_util, terminated = Minimax_helper(child_state)
-
-                if transposition_table:
-                    if (action in transposition_table_list):
-                        return child_action, None, exp_util, terminated
-                    else:
-                        transposition_table_list.update({action: exp_util})
+        for action in get_ordered_actions(state, random_move_order):
+            # What child state results from that action?
+            child_state = state.generate_next_state(action)
+            # Search recursively from the child_state
+            child_action, leaf_node, exp_util, terminated = Minimax_helper(child_state)
 
-                if (exp_util < min_utility):
-                    min_utility = exp_util
-                    best_action = action
-                    best_leaf_node = leaf_node
+            # if max player, keep the highest utility; if min player, the lowest
+            if (exp_util > best_utility if is_max_player else exp_util < best_utility):
+                best_utility = exp_util
+                best_action = action
+                best_leaf_node = leaf_node
 
-                if (terminated):
-                    return best_action, best_leaf_node, min_utility, terminated
-                # Visualize on upwards traversal, now with updated utility!
-                terminated = state_callback_fn(state, exp_util) or terminated
+            if (terminated):
+                return best_action, best_leaf_node, best_utility, terminated
+            # Visualize on upwards traversal, now with updated utility!
+            terminated = state_callback_fn(state, exp_util)
+            if (terminated):
+                return best_action, best_leaf_node, best_utility, terminated
 
-            return best_action, best_leaf_node, min_utility, terminated
+        if table is not None:
+            table.store(key, remaining_depth, shift_utility(best_utility, state.get_path_length()), best_move = best_action)
+        return best_action, best_leaf_node, best_utility, False
 
     return Minimax_helper(initial_state)
 
@@ -365,9 +433,9 @@ def ExpectimaxSearch(initial_state,
     eval_fn = always_zero,
     cutoff = INF,
     state_callback_fn = lambda state, state_value : False, # A callback function for the GUI. If it returns True, terminate
-    counter = {'num_nodes_seen':0,'num_endgame_evals':0, 'num_heuristic_evals':0}, # A counter for tracking stats
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
     random_move_order = False,     # If true, consider moves in random order
-    transposition_table = False    # If true, use a transposition table. [IGNORE until Part 2]
+    transposition_table = False    # If true (or a TranspositionTable), use a transposition table.
     ):
     """
     Searches down ALL paths of the game tree, performing Expectimax.
@@ -380,91 +448,97 @@ def ExpectimaxSearch(initial_state,
     Since there is no single leaf node that represents the expected outcome,
     return None for the second return value.
     """
+    if counter is None:
+        counter = SearchStats()
+    table = get_transposition_table(transposition_table)
+    shift_utility = partial(shift_endgame_utility, util_fn)
+
     def Expectimax_helper(state):
         counter['num_nodes_seen'] += 1
-        best_action = None
-        best_leaf_node = None
-        terminated = False
-        transposition_table_list = {}
+        remaining_depth = cutoff - (state.get_path_length() - initial_state.get_path_length())
+
+        # Already searched at least this deep, maybe from another branch (the root is always searched):
+        if table is not None:
+            key = hash(state)
+            entry = table.lookup(key)
+            if entry is not None and entry[0] >= remaining_depth and state is not initial_state:
+                return entry[3], None, shift_utility(entry[1], -state.get_path_length()), False
+
         # Base case - endgame leaf node:
         if state.is_endgame_state() :
             endgame_util = util_fn(state, initial_state.get_current_player())
             counter['num_endgame_evals'] += 1
+            if table is not None:
+                table.store(key, INF, shift_utility(endgame_util, state.get_path_length()))
             # Visualize leaf node with utility, check for early termination signal
             terminated = state_callback_fn(state, endgame_util)
             # No action because leaf node!
-            return None, state, endgame_util, terminated
+            return None, None, endgame_util, terminated
 
         # Early cutoff evaluation:
-        if state.get_path_length() - initial_state.get_path_length() >= cutoff:
+        if remaining_depth <= 0:
             heuristic_eval = eval_fn(state, initial_state.get_current_player())
             counter['num_heuristic_evals'] += 1
+            if table is not None:
+                table.store(key, 0, shift_utility(heuristic_eval, state.get_path_length()))
             # Visualize leaf node with evaluation, check for early termination signal
             terminated = state_callback_fn(state, heuristic_eval)
             # No action because leaf node!
-            return None, state, heuristic_eval, terminated
+            return None, None, heuristic_eval, terminated
 
         # Visualize on downwards traversal. OPTIONAL - could remove
         state_callback_fn(state,None)
 
-        # Recursive step - pick a valid action at random
-        actions = state.get_all_actions(state)
-        current_player = state.get_current_player()
-        max_utility = -INF
-        min_utility = INF
-        num_of_actions = 0
-        sum = 0
+        actions = get_ordered_actions(state, random_move_order)
 
         # if max player
-        if (current_player == initial_state.get_current_player()):
+        if (state.get_current_player() == initial_state.get_current_player()):
+            max_utility = -INF
+            best_action = None
             for action in actions:
                 # What child state results from that action?
                 child_state = state.generate_next_state(action)
                 # Search recursively from the child_state
                 child_action, leaf_node, exp_util, terminated = Expectimax_helper(child_state)
 
-                if transposition_table:
-                    if (action in transposition_table_list):
-                        return child_action, None, exp_util, terminated
-                    else:
-                        transposition_table_list.update({action: exp_util})
-
                 if (exp_util > max_utility):
                     max_utility = exp_util
                     best_action = action
-                    best_leaf_node = leaf_node
 
                 if (terminated):
-                    return best_action, best_leaf_node, max_utility, terminated
+                    return best_action, None, max_utility, terminated
                 # Visualize on upwards traversal, now with updated utility!
-                terminated = state_callback_fn(state, exp_util) or terminated
+                terminated = state_callback_fn(state, exp_util)
+                if (terminated):
+                    return best_action, None, max_utility, terminated
 
-            return best_action, best_leaf_node, min_utility, terminated
+            if table is not None:
+                table.store(key, remaining_depth, shift_utility(max_utility, state.get_path_length()), best_move = best_action)
+            return best_action, None, max_utility, False
 
-        # if min player
+        # if min player: every action is equally likely
         else:
-
+            sum = 0
+            num_of_actions = 0
             for action in actions:
                 # What child state results from that action?
                 child_state = state.generate_next_state(action)
                 # Search recursively from the child_state
                 child_action, leaf_node, exp_util, terminated = Expectimax_helper(child_state)
 
-                if transposition_table:
-                    if (action in transposition_table_list):
-                        return child_action, None, exp_util, terminated
-                    else:
-                        transposition_table_list.update({action: exp_util})
-
                 sum += exp_util
                 num_of_actions += 1
 
                 if (terminated):
-                    return action, leaf_node, sum / num_of_actions, terminated
+                    return None, None, sum / num_of_actions, terminated
                 # Visualize on upwards traversal, now with updated utility!
-                terminated = state_callback_fn(state, sum / num_of_actions) or terminated
+                terminated = state_callback_fn(state, sum / num_of_actions)
+                if (terminated):
+                    return None, None, sum / num_of_actions, terminated
 
-            return action, leaf_node, sum / num_of_actions, terminated
+            if table is not None:
+                table.store(key, remaining_depth, shift_utility(sum / num_of_actions, state.get_path_length()))
+            return None, None, sum / num_of_actions, False
 
     # Simply call the helper function on the initial_state.
     return Expectimax_helper(initial_state)
@@ -501,8 +575,8 @@ not help very much or at all.
 Transposition tables have a major downside - they may be memory-expensive because there
 may be many, many states to remember! In practice, transposition tables are usually size
 limited with some replacement scheme to estimate which stored states are least useful and
-safe to replace. However, you do not need to implement any such size
-limitation or replacement scheme in this lab.
+safe to replace. TranspositionTable (transposition_table.py) has a fixed number of
+slots, and replaces entries by depth and age.
 
 NOTE:
     If using a transposition table, you may return None for
@@ -538,9 +612,9 @@ default ordering of actions / next states is actually quite bad.
 NOTE:
     CAREFUL with caching values in a transposition table during alpha-beta
     pruning - if a cutoff occurs on a node, the true value remains unknown.
-    This can be dealt with in various ways, but in this lab
-    we may simply store values ONLY when they are certain (i.e. no alpha-beta
-    cutoff)
+    MinimaxAlphaBetaSearch stores such values as bounds instead: a node that
+    failed high (cutoff) only has a LOWER_BOUND, and a node where no action
+    raised the window only has an UPPER_BOUND.
 
 OPTIONAL :
     You may edit get_all_actions in the various GameStateNode Subclasses
@@ -559,9 +633,19 @@ def MinimaxAlphaBetaSearch(initial_state,
     eval_fn = always_zero,
     cutoff = INF,
     state_callback_fn =  (lambda state, state_value = 0 : False) , # A callback function for the GUI. If it returns True, terminate
-    counter = {'num_nodes_seen':0,'num_endgame_evals':0, 'num_heuristic_evals':0}, # A counter for tracking stats
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
     random_move_order = False,     # If true, consider moves in random order
-    transposition_table = False,    # If true, use a transposition table.
+    transposition_table = False,    # If true (or a TranspositionTable), use a transposition table.
+    principal_variation = None,     # Optional list of actions from initial_state to search first
+    alpha = -INF,                   # Initial alpha-beta window
+    beta = INF,
+    maximizer_player = None,        # The maximizing player, if not the current player of initial_state
+    batch_eval = False,             # If true, evaluate all the children of a node at the cutoff in one call
+    quiescence = False,             # If true, keep searching capture actions past the cutoff
+    custom_move_ordering = False,   # If true (or a MoveOrdering), order moves by killer moves and history
+    null_window_search = False,     # If true, search all but the first action with a null window (see PrincipalVariationSearch)
+    tablebase_probe = None,         # Optional function (state, maximizer_player) -> exact value, or None if unknown
+    new_search = True,              # If false, a given TranspositionTable goes on with its current search
     ):
     """
     Searches SOME branches of the game tree by performing Minimax with alpha-beta pruning.
@@ -571,27 +655,274 @@ def MinimaxAlphaBetaSearch(initial_state,
     Again, both players are modeled as either maximizing the utility for themselves,
     or maximizing / minimizing the first player (maximizer)'s utility.
     This could be interpreted as a pessimistic model of your opponents behavior.
-    """
 
-    def MinimaxAlphaBeta_helper(state, alpha, beta):
+    With a transposition table, values of nodes where a cutoff occurred are stored
+    as bounds (LOWER_BOUND if the node failed high, UPPER_BOUND if it failed low),
+    which narrow the alpha-beta window when the node is seen again.
+    The table's value for initial_state itself is never used, only its best move:
+    the root is always searched.
+
+    counter['num_unresolved_leaves'] counts the leaves whose value depends on the cutoff:
+    heuristic evaluations, and transposition table values that were not final. When none
+    is found below a state, its value holds at any depth, and it is stored in the table
+    with depth INF like an endgame's. A search that finds none at all has solved initial_state.
+
+    The search may start with a narrower window than (-INF, INF); if the value of
+    initial_state is outside (alpha, beta), only a bound on it is returned.
+    maximizer_player allows searching a subtree (e.g. a child of the real root, in another
+    process) from the point of view of the real root's player.
+
+    Move ordering: along principal_variation (e.g. the expected line of play found
+    by a shallower search) its action is searched first; at every other node,
+    the best move stored in the transposition table, if any, is searched first.
+
+    If custom_move_ordering is True (or a MoveOrdering, to keep its tables between searches),
+    the actions at every node are sorted by killer moves and the history heuristic
+    (see move_ordering.py), which are updated whenever an action causes a cutoff.
+    The PV and transposition table moves still come first.
+
+    If batch_eval is True, the children of a node one step above the cutoff are all
+    generated at once, and those that are not endgames are scored with a single
+    util_eval.batch_evaluate call (vectorized if eval_fn has a batch version).
+    Alpha-beta pruning then only saves the callbacks, not the evaluations, so
+    counter may show more heuristic evals, but the result is the same.
+
+    If quiescence is True, a non-endgame state at the cutoff is not simply evaluated:
+    the search continues from it with capture actions only (state.get_capture_actions()),
+    until quiet states without captures, so that the evaluation never lands in the middle
+    of an exchange. At each such state the player to move may also "stand pat",
+    i.e. take the heuristic evaluation instead of capturing, which often ends the
+    extension early through an alpha-beta cutoff. This only terminates for games where
+    captures cannot go on forever (e.g. they remove pieces). The states searched past the
+    cutoff are counted in counter['num_quiescence_nodes'], not in 'num_nodes_seen'.
+
+    tablebase_probe (e.g. CheckersTablebase.probe_utility) is called on every state below
+    initial_state that is not an endgame, before searching it. If it returns a value,
+    that exact value is used and the state is not searched further.
+    Such states are counted in counter['num_tablebase_hits'].
+
+    A TranspositionTable given as transposition_table starts a new search, so that the entries
+    of earlier searches are replaced first. With new_search = False, this search's entries are
+    stored as part of the table's current search instead (e.g. between the passes of MTDfSearch).
+
+    If counter is a SearchStats (the default), the search also records in it the nodes and
+    cutoffs per ply, the transposition table's probes, hits and stores, the time spent
+    generating actions and evaluating states, and the principal variation.
+    """
+    if counter is None:
+        counter = SearchStats()
+    table = get_transposition_table(transposition_table, new_search)
+    shift_utility = partial(shift_endgame_utility, util_fn)
+    move_ordering = get_move_ordering(custom_move_ordering)
+    counter.setdefault('num_unresolved_leaves', 0)
+    if quiescence:
+        counter.setdefault('num_quiescence_nodes', 0)
+    if null_window_search:
+        counter.setdefault('num_pvs_researches', 0)
+    if tablebase_probe is not None:
+        counter.setdefault('num_tablebase_hits', 0)
+    if maximizer_player is None:
+        maximizer_player = initial_state.get_current_player()
+    if principal_variation is None:
+        principal_variation = []
+
+    # With a SearchStats counter, also record per-ply, table and timing stats
+    stats = counter if isinstance(counter, SearchStats) else None
+    evaluate_batch = partial(batch_evaluate, eval_fn)
+    ordered_actions = get_ordered_actions
+    capture_actions = methodcaller('get_capture_actions')
+    if stats is not None:
+        start_time = time()
+        if table is not None:
+            table_counts = (table.num_probes, table.num_hits, table.num_stores)
+        util_fn, eval_fn, evaluate_batch = (stats.timed(fn, 'evaluation_time') for fn in (util_fn, eval_fn, evaluate_batch))
+        ordered_actions, capture_actions = (stats.timed(fn, 'move_generation_time') for fn in (ordered_actions, capture_actions))
+
+    def MinimaxAlphaBeta_horizon(state, actions, alpha, beta, is_max_player):
+        """
+        Searches the children of a node whose children are all at the cutoff,
+        evaluating them with one batch_evaluate call.
+        """
+        children = [state.generate_next_state(action) for action in actions]
+        values = [None] * len(children)
+        frontier = []
+        for i, child_state in enumerate(children):
+            if child_state.is_endgame_state():
+                values[i] = util_fn(child_state, maximizer_player)
+                counter['num_endgame_evals'] += 1
+                continue
+            if tablebase_probe is not None:
+                values[i] = tablebase_probe(child_state, maximizer_player)
+                if values[i] is not None:
+                    counter['num_tablebase_hits'] += 1
+                    continue
+            if not (quiescence and capture_actions(child_state)):
+                frontier.append(i)
+            # Otherwise left as None: searched by MinimaxAlphaBeta_quiescence below
+        if frontier:
+            evals = evaluate_batch([children[i] for i in frontier], maximizer_player)
+            counter['num_heuristic_evals'] += len(frontier)
+            counter['num_unresolved_leaves'] += len(frontier)
+            for i, heuristic_eval in zip(frontier, evals):
+                values[i] = float(heuristic_eval)
+        counter['num_nodes_seen'] += len(children)
+        ply = state.get_path_length() - initial_state.get_path_length()
+        if stats is not None:
+            stats.record_nodes(ply + 1, len(children))
+
+        best_utility = -INF if is_max_player else INF
         best_action = None
         best_leaf_node = None
-        terminated = False
-        transposition_table_list = {}
+        for i, (action, child_state, exp_util) in enumerate(zip(actions, children, values)):
+            leaf_node = child_state
+            if exp_util is None:
+                _, leaf_node, exp_util, terminated = MinimaxAlphaBeta_quiescence(child_state, alpha, beta)
+            else:
+                # Visualize leaf node with its value, check for early termination signal
+                terminated = state_callback_fn(child_state, exp_util)
+            if (exp_util > best_utility if is_max_player else exp_util < best_utility):
+                best_utility = exp_util
+                best_action = action
+                best_leaf_node = leaf_node
+            if (terminated):
+                return best_action, best_leaf_node, best_utility, terminated
+            if is_max_player:
+                alpha = max(alpha, exp_util)
+            else:
+                beta = min(beta, exp_util)
+            if alpha >= beta:
+                if move_ordering is not None:
+                    move_ordering.record_cutoff(action, ply, 1)
+                if stats is not None:
+                    stats.record_cutoff(ply, i)
+                break
+        return best_action, best_leaf_node, best_utility, False
+
+    def MinimaxAlphaBeta_quiescence(state, alpha, beta):
+        """
+        Searches a state at or past the cutoff, considering capture actions only.
+        The heuristic evaluation of the state (the "stand pat" value) is a bound on its value:
+        the player to move can do at least that well by not capturing.
+        """
+        # Base case - endgame leaf node:
+        if state.is_endgame_state() :
+            endgame_util = util_fn(state, maximizer_player)
+            counter['num_endgame_evals'] += 1
+            terminated = state_callback_fn(state, endgame_util)
+            return None, state, endgame_util, terminated
+
+        stand_pat = eval_fn(state, maximizer_player)
+        counter['num_heuristic_evals'] += 1
+        counter['num_unresolved_leaves'] += 1
+        terminated = state_callback_fn(state, stand_pat)
+
+        best_utility = stand_pat
+        best_action = None
+        best_leaf_node = state
+        if (terminated):
+            return best_action, best_leaf_node, best_utility, terminated
+
+        is_max_player = state.get_current_player() == maximizer_player
+        if is_max_player:
+            alpha = max(alpha, stand_pat)
+        else:
+            beta = min(beta, stand_pat)
+        if alpha >= beta:
+            return best_action, best_leaf_node, best_utility, False
+
+        for action in capture_actions(state):
+            counter['num_quiescence_nodes'] += 1
+            child_state = state.generate_next_state(action)
+            child_action, leaf_node, exp_util, terminated = MinimaxAlphaBeta_quiescence(child_state, alpha, beta)
+
+            if (exp_util > best_utility if is_max_player else exp_util < best_utility):
+                best_utility = exp_util
+                best_action = action
+                best_leaf_node = leaf_node
+            if is_max_player:
+                alpha = max(alpha, exp_util)
+            else:
+                beta = min(beta, exp_util)
+
+            if (terminated):
+                return best_action, best_leaf_node, best_utility, terminated
+            if alpha >= beta:
+                break
+
+        return best_action, best_leaf_node, best_utility, False
+
+    def MinimaxAlphaBeta_helper(state, alpha, beta, on_pv):
         counter['num_nodes_seen'] += 1
+        depth = state.get_path_length() - initial_state.get_path_length()
+        remaining_depth = cutoff - depth
+        if stats is not None:
+            stats.record_nodes(depth)
+
+        # Already searched at least this deep, maybe from another branch
+        # (but the root is always searched, so that the search always finds its own result):
+        table_move = None
+        if table is not None:
+            key = hash(state)
+            entry = table.lookup(key)
+            if entry is not None:
+                table_move = entry[3]
+                if entry[0] >= remaining_depth and depth > 0:
+                    stored_depth, value, flag, move = entry
+                    value = shift_utility(value, -state.get_path_length())
+                    if flag == LOWER_BOUND:
+                        alpha = max(alpha, value)
+                    elif flag == UPPER_BOUND:
+                        beta = min(beta, value)
+                    if flag == EXACT or alpha >= beta:
+                        if stored_depth < INF:
+                            counter['num_unresolved_leaves'] += 1
+                        return move, None, value, False
+        alpha_orig, beta_orig = alpha, beta
+        # If no leaf below this state depends on the cutoff, its value is final: store it with depth INF
+        unresolved_leaves = counter['num_unresolved_leaves']
+
         # Base case - endgame leaf node:
         if state.is_endgame_state() :
-            endgame_util = util_fn(state, initial_state.get_current_player())
+            endgame_util = util_fn(state, maximizer_player)
             counter['num_endgame_evals'] += 1
+            if table is not None:
+                table.store(key, INF, shift_utility(endgame_util, state.get_path_length()))
             # Visualize leaf node with utility, check for early termination signal
             terminated = state_callback_fn(state, endgame_util)
             # No action because leaf node!
             return None, state, endgame_util, terminated
 
+        # Known exactly from the tablebase:
+        if tablebase_probe is not None and depth > 0:
+            tablebase_value = tablebase_probe(state, maximizer_player)
+            if tablebase_value is not None:
+                counter['num_tablebase_hits'] += 1
+                if table is not None:
+                    table.store(key, INF, shift_utility(tablebase_value, state.get_path_length()))
+                terminated = state_callback_fn(state, tablebase_value)
+                return None, state, tablebase_value, terminated
+
+        # Past the cutoff, only captures are searched further:
+        if remaining_depth <= 0 and quiescence:
+            best_action, best_leaf_node, best_utility, terminated = MinimaxAlphaBeta_quiescence(state, alpha, beta)
+            if table is not None and not terminated:
+                if best_utility <= alpha_orig:
+                    flag = UPPER_BOUND
+                elif best_utility >= beta_orig:
+                    flag = LOWER_BOUND
+                else:
+                    flag = EXACT
+                table.store(key, INF if counter['num_unresolved_leaves'] == unresolved_leaves else 0,
+                            shift_utility(best_utility, state.get_path_length()), flag, best_action)
+            return best_action, best_leaf_node, best_utility, terminated
+
         # Early cutoff evaluation:
-        if state.get_path_length() - initial_state.get_path_length() >= cutoff:
-            heuristic_eval = eval_fn(state, initial_state.get_current_player())
+        if remaining_depth <= 0:
+            heuristic_eval = eval_fn(state, maximizer_player)
             counter['num_heuristic_evals'] += 1
+            counter['num_unresolved_leaves'] += 1
+            if table is not None:
+                table.store(key, 0, shift_utility(heuristic_eval, state.get_path_length()))
             # Visualize leaf node with evaluation, check for early termination signal
             terminated = state_callback_fn(state, heuristic_eval)
             # No action because leaf node!
@@ -600,78 +931,586 @@ def MinimaxAlphaBetaSearch(initial_state,
         # Visualize on downwards traversal. OPTIONAL - could remove
         state_callback_fn(state,None)
 
-        # Recursive step - pick a valid action at random
-        current_player = state.get_current_player()
-        actions = state.get_all_actions(state)
-        max_utility = -INF
-        min_utility = INF
+        is_max_player = state.get_current_player() == maximizer_player
+        best_utility = -INF if is_max_player else INF
+        best_action = None
+        best_leaf_node = None
 
-        # if max player
-        if (current_player == initial_state.get_current_player()):
-            for action in actions:
-                # What child state results from that action?
-                child_state = state.generate_next_state(action)
+        pv_action = principal_variation[depth] if on_pv and depth < len(principal_variation) else None
+        actions = ordered_actions(state, random_move_order, (pv_action, table_move), move_ordering, depth)
+
+        if batch_eval and remaining_depth == 1:
+            best_action, best_leaf_node, best_utility, terminated = MinimaxAlphaBeta_horizon(
+                state, actions, alpha, beta, is_max_player)
+            if (terminated):
+                return best_action, best_leaf_node, best_utility, terminated
+            if is_max_player:
+                alpha = max(alpha, best_utility)
+            else:
+                beta = min(beta, best_utility)
+            actions = () # all children are already searched
+
+        for i, action in enumerate(actions):
+            # What child state results from that action?
+            child_state = state.generate_next_state(action)
+
+            if null_window_search and i > 0:
+                # Only test whether the action does better than the best so far, with a null window
+                if is_max_player:
+                    null_alpha, null_beta = alpha, math.nextafter(alpha, INF)
+                else:
+                    null_alpha, null_beta = math.nextafter(beta, -INF), beta
+                child_action, leaf_node, exp_util, terminated = MinimaxAlphaBeta_helper(child_state, null_alpha, null_beta,
+                                                                    on_pv and action == pv_action)
+                # It does, without causing a cutoff: re-search it with the full window for its exact value
+                if alpha < exp_util < beta and not terminated:
+                    counter['num_pvs_researches'] += 1
+                    child_action, leaf_node, exp_util, terminated = MinimaxAlphaBeta_helper(child_state, alpha, beta,
+                                                                        on_pv and action == pv_action)
+            else:
                 # Search recursively from the child_state
-                child_action, leaf_node, exp_util, terminated = MinimaxAlphaBeta_helper(child_state, alpha, beta)
+                child_action, leaf_node, exp_util, terminated = MinimaxAlphaBeta_helper(child_state, alpha, beta,
+                                                                    on_pv and action == pv_action)
 
+            # if max player, keep the highest utility and raise alpha; if min player, the lowest and lower beta
+            if (exp_util > best_utility if is_max_player else exp_util < best_utility):
+                best_utility = exp_util
+                best_action = action
+                best_leaf_node = leaf_node
+            if is_max_player:
                 alpha = max(alpha, exp_util)
-                if alpha >= beta:
-                    terminated = state_callback_fn(state, alpha)
-                    return None, state, alpha, terminated
-
-                if transposition_table:
-                    if (action in transposition_table_list):
-                        return child_action, None, exp_util, terminated
-                    else:
-                        transposition_table_list.update({action: exp_util})
-
-                if (exp_util > max_utility):
-                    max_utility = exp_util
-                    best_action = action
-                    best_leaf_node = leaf_node
+            else:
+                beta = min(beta, exp_util)
 
-                if (terminated):
-                    return best_action, best_leaf_node, max_utility, terminated
-                # Visualize on upwards traversal, now with updated utility!
-                terminated = state_callback_fn(state, exp_util) or terminated
+            if (terminated):
+                return best_action, best_leaf_node, best_utility, terminated
+            # Visualize on upwards traversal, now with updated utility!
+            terminated = state_callback_fn(state, exp_util)
+            if (terminated):
+                return best_action, best_leaf_node, best_utility, terminated
+
+            # The other player will never let the game reach this state: prune the remaining actions
+            if alpha >= beta:
+                if move_ordering is not None:
+                    move_ordering.record_cutoff(action, depth, remaining_depth)
+                if stats is not None:
+                    stats.record_cutoff(depth, i)
+                break
+
+        if table is not None:
+            if best_utility <= alpha_orig:
+                flag = UPPER_BOUND
+            elif best_utility >= beta_orig:
+                flag = LOWER_BOUND
+            else:
+                flag = EXACT
+            table.store(key, INF if counter['num_unresolved_leaves'] == unresolved_leaves else remaining_depth,
+                        shift_utility(best_utility, state.get_path_length()), flag, best_action)
+        return best_action, best_leaf_node, best_utility, False
+
+    best_action, leaf_node, exp_util, terminated = MinimaxAlphaBeta_helper(initial_state, alpha, beta, True)
+
+    if stats is not None:
+        stats.elapsed_time += time() - start_time
+        if table is not None:
+            stats.record_table(table.num_probes - table_counts[0], table.num_hits - table_counts[1],
+                               table.num_stores - table_counts[2])
+        # No longer than the deepest ply searched, in case the table's best moves go round in circles
+        stats.principal_variation = get_principal_variation(initial_state, leaf_node, table, len(stats.nodes_per_ply) - 1)
+    return best_action, leaf_node, exp_util, terminated
+
+def PrincipalVariationSearch(initial_state,
+    util_fn,
+    eval_fn = always_zero,
+    cutoff = INF,
+    state_callback_fn =  (lambda state, state_value = 0 : False) , # A callback function for the GUI. If it returns True, terminate
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
+    random_move_order = False,     # If true, consider moves in random order
+    transposition_table = True,     # If true (or a TranspositionTable), use a transposition table.
+    principal_variation = None,     # Optional list of actions from initial_state to search first
+    alpha = -INF,                   # Initial alpha-beta window
+    beta = INF,
+    maximizer_player = None,        # The maximizing player, if not the current player of initial_state
+    batch_eval = False,             # If true, evaluate all the children of a node at the cutoff in one call
+    quiescence = False,             # If true, keep searching capture actions past the cutoff
+    custom_move_ordering = True,    # If true (or a MoveOrdering), order moves by killer moves and history
+    tablebase_probe = None,         # Optional function (state, maximizer_player) -> exact value, or None if unknown
+    ):
+    """
+    Principal Variation Search (also known as NegaScout): Minimax with alpha-beta pruning
+    that assumes the first action searched at each node is the best one.
+
+    The first action is searched with the full alpha-beta window. Every other action is
+    only tested against it, with a "null window" (alpha, beta) of (almost) zero width,
+    which prunes much more. Only if the test shows that the action is better after all
+    is it searched again with the full window. counter['num_pvs_researches'] counts these re-searches.
+
+    Finds the same value as MinimaxAlphaBetaSearch (and takes the same parameters and
+    returns the same 4-tuple); the better the move ordering, the fewer nodes it visits.
+    With a poor ordering, the re-searches cost more than the null windows save, so
+    unlike MinimaxAlphaBetaSearch, it orders moves by default: by the transposition
+    table's best moves, and by killer moves and history.
+    """
+    return MinimaxAlphaBetaSearch(initial_state, util_fn, eval_fn, cutoff, state_callback_fn, counter,
+        random_move_order = random_move_order,
+        transposition_table = transposition_table,
+        principal_variation = principal_variation,
+        alpha = alpha,
+        beta = beta,
+        maximizer_player = maximizer_player,
+        batch_eval = batch_eval,
+        quiescence = quiescence,
+        custom_move_ordering = custom_move_ordering,
+        null_window_search = True,
+        tablebase_probe = tablebase_probe)
+
+def IterativeMinimaxAlphaBetaSearch(initial_state,
+    util_fn,
+    eval_fn = always_zero,
+    cutoff = INF,
+    state_callback_fn =  (lambda state, state_value = 0 : False) , # A callback function for the GUI. If it returns True, terminate
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
+    random_move_order = False,     # If true, consider moves in random order
+    transposition_table = False,    # If true (or a TranspositionTable), use a transposition table.
+    principal_variation = None,     # Optional list of actions from initial_state to search first
+    alpha = -INF,                   # Initial alpha-beta window
+    beta = INF,
+    maximizer_player = None,        # The maximizing player, if not the current player of initial_state
+    custom_move_ordering = False,   # If true (or a MoveOrdering), order moves by killer moves and history
+    tablebase_probe = None,         # Optional function (state, maximizer_player) -> exact value, or None if unknown
+    pruning = True,                 # If false, search like MinimaxSearch instead
+    ):
+    """
+    The same search as MinimaxAlphaBetaSearch (without its batch_eval, quiescence
+    and null_window_search options), with the same results, counts, SearchStats and
+    callbacks, but without recursion: the nodes on the current path are kept in an explicit stack
+    of per-ply frames, stored as parallel lists indexed by ply (0 = initial_state).
+    This saves a Python function call per node, and cutoff = INF searches are not
+    limited by the recursion limit.
+
+    The frame lists are allocated once, cutoff + 1 long (and grown as needed if cutoff is INF):
+        states[p]: the state at ply p
+        actions[p], next_indices[p]: its ordered actions, and the index of the action to search next
+        alphas[p], betas[p]: its current alpha-beta window, and alpha_origs[p], beta_origs[p] the initial one
+        best_utilities[p], best_actions[p], best_leaf_nodes[p]: the best result among its searched children
+        keys[p]: its hash, on_pvs[p]: whether it is on principal_variation, pv_actions[p]: the PV action
+        unresolved_leaves[p]: counter['num_unresolved_leaves'] when it was entered
+
+    With pruning = False, no branch is ever pruned and neither the principal variation
+    nor the transposition table reorder the moves: this gives the same results as MinimaxSearch.
+    """
+    if counter is None:
+        counter = SearchStats()
+    table = get_transposition_table(transposition_table)
+    shift_utility = partial(shift_endgame_utility, util_fn)
+    move_ordering = get_move_ordering(custom_move_ordering)
+    counter.setdefault('num_unresolved_leaves', 0)
+    if tablebase_probe is not None:
+        counter.setdefault('num_tablebase_hits', 0)
+    if maximizer_player is None:
+        maximizer_player = initial_state.get_current_player()
+    if principal_variation is None or not pruning:
+        principal_variation = []
+
+    # With a SearchStats counter, also record per-ply, table and timing stats (see MinimaxAlphaBetaSearch)
+    stats = counter if isinstance(counter, SearchStats) else None
+    ordered_actions = get_ordered_actions
+    if stats is not None:
+        start_time = time()
+        if table is not None:
+            table_counts = (table.num_probes, table.num_hits, table.num_stores)
+        util_fn, eval_fn = (stats.timed(fn, 'evaluation_time') for fn in (util_fn, eval_fn))
+        ordered_actions = stats.timed(ordered_actions, 'move_generation_time')
+
+    def finish(result):
+        """ Records the stats of the whole search, and returns its result. """
+        if stats is not None:
+            stats.elapsed_time += time() - start_time
+            if table is not None:
+                stats.record_table(table.num_probes - table_counts[0], table.num_hits - table_counts[1],
+                                   table.num_stores - table_counts[2])
+            stats.principal_variation = get_principal_variation(initial_state, result[1], table, len(stats.nodes_per_ply) - 1)
+        return result
+
+    num_frames = cutoff + 1 if cutoff < INF else 64
+    states = [None] * num_frames
+    actions = [None] * num_frames
+    next_indices = [0] * num_frames
+    alphas = [0] * num_frames
+    betas = [0] * num_frames
+    alpha_origs = [0] * num_frames
+    beta_origs = [0] * num_frames
+    best_utilities = [0] * num_frames
+    best_actions = [None] * num_frames
+    best_leaf_nodes = [None] * num_frames
+    keys = [None] * num_frames
+    on_pvs = [False] * num_frames
+    pv_actions = [None] * num_frames
+    unresolved_leaves = [0] * num_frames
+    frames = (states, actions, next_indices, alphas, betas, alpha_origs, beta_origs,
+              best_utilities, best_actions, best_leaf_nodes, keys, on_pvs, pv_actions, unresolved_leaves)
+
+    # The node to enter next, at ply
+    ply = 0
+    state, alpha, beta, on_pv = initial_state, alpha, beta, True
+    while True:
+        # Enter state: either find its result right away (leaf or table hit), or push its frame
+        counter['num_nodes_seen'] += 1
+        remaining_depth = cutoff - ply
+        result = None
+        if stats is not None:
+            stats.record_nodes(ply)
+
+        # Already searched at least this deep, maybe from another branch (the root is always searched):
+        table_move = None
+        key = None
+        if table is not None:
+            key = hash(state)
+            entry = table.lookup(key)
+            if entry is not None:
+                table_move = entry[3]
+                if entry[0] >= remaining_depth and ply > 0:
+                    stored_depth, value, flag, move = entry
+                    value = shift_utility(value, -state.get_path_length())
+                    if flag == LOWER_BOUND:
+                        alpha = max(alpha, value)
+                    elif flag == UPPER_BOUND:
+                        beta = min(beta, value)
+                    if flag == EXACT or alpha >= beta:
+                        if stored_depth < INF:
+                            counter['num_unresolved_leaves'] += 1
+                        result = (move, None, value, False)
+
+        if result is None:
+            is_endgame = state.is_endgame_state()
+            tablebase_value = None
+            if not is_endgame and tablebase_probe is not None and ply > 0:
+                tablebase_value = tablebase_probe(state, maximizer_player)
+
+            # Base case - endgame leaf node:
+            if is_endgame:
+                endgame_util = util_fn(state, maximizer_player)
+                counter['num_endgame_evals'] += 1
+                if table is not None:
+                    table.store(key, INF, shift_utility(endgame_util, state.get_path_length()))
+                # Visualize leaf node with utility, check for early termination signal
+                result = (None, state, endgame_util, state_callback_fn(state, endgame_util))
+
+            # Known exactly from the tablebase:
+            elif tablebase_value is not None:
+                counter['num_tablebase_hits'] += 1
+                if table is not None:
+                    table.store(key, INF, shift_utility(tablebase_value, state.get_path_length()))
+                result = (None, state, tablebase_value, state_callback_fn(state, tablebase_value))
+
+            # Early cutoff evaluation:
+            elif remaining_depth <= 0:
+                heuristic_eval = eval_fn(state, maximizer_player)
+                counter['num_heuristic_evals'] += 1
+                counter['num_unresolved_leaves'] += 1
+                if table is not None:
+                    table.store(key, 0, shift_utility(heuristic_eval, state.get_path_length()))
+                # Visualize leaf node with evaluation, check for early termination signal
+                result = (None, state, heuristic_eval, state_callback_fn(state, heuristic_eval))
+
+            else:
+                # Visualize on downwards traversal. OPTIONAL - could remove
+                state_callback_fn(state,None)
+
+                # Push a frame for state, and enter its first child
+                if ply == len(states):
+                    for frame in frames:
+                        frame.append(None)
+                is_max_player = state.get_current_player() == maximizer_player
+                pv_action = principal_variation[ply] if on_pv and ply < len(principal_variation) else None
+                preferred_actions = (pv_action, table_move) if pruning else ()
+                states[ply] = state
+                actions[ply] = ordered_actions(state, random_move_order, preferred_actions, move_ordering, ply)
+                next_indices[ply] = 1
+                alphas[ply], betas[ply] = alpha, beta
+                alpha_origs[ply], beta_origs[ply] = alpha, beta
+                best_utilities[ply] = -INF if is_max_player else INF
+                best_actions[ply] = None
+                best_leaf_nodes[ply] = None
+                keys[ply] = key
+                on_pvs[ply] = on_pv
+                pv_actions[ply] = pv_action
+                unresolved_leaves[ply] = counter['num_unresolved_leaves']
+
+                action = actions[ply][0]
+                state = state.generate_next_state(action)
+                on_pv = on_pv and action == pv_action
+                ply += 1
+                continue
+
+        # Return result to the frames below, until one of them has another child to search
+        while True:
+            if ply == 0:
+                return finish(result)
+            ply -= 1
+            child_action, leaf_node, exp_util, terminated = result
+            state = states[ply]
+            alpha, beta = alphas[ply], betas[ply]
+            action = actions[ply][next_indices[ply] - 1]
+            is_max_player = state.get_current_player() == maximizer_player
+
+            # if max player, keep the highest utility and raise alpha; if min player, the lowest and lower beta
+            if (exp_util > best_utilities[ply] if is_max_player else exp_util < best_utilities[ply]):
+                best_utilities[ply] = exp_util
+                best_actions[ply] = action
+                best_leaf_nodes[ply] = leaf_node
+            if pruning:
+                if is_max_player:
+                    alpha = max(alpha, exp_util)
+                else:
+                    beta = min(beta, exp_util)
+                alphas[ply], betas[ply] = alpha, beta
 
-            return best_action, best_leaf_node, max_utility, terminated
+            if (terminated):
+                result = (best_actions[ply], best_leaf_nodes[ply], best_utilities[ply], terminated)
+                continue
+            # Visualize on upwards traversal, now with updated utility!
+            terminated = state_callback_fn(state, exp_util)
+            if (terminated):
+                result = (best_actions[ply], best_leaf_nodes[ply], best_utilities[ply], terminated)
+                continue
+
+            # The other player will never let the game reach this state: prune the remaining actions
+            if alpha >= beta:
+                if move_ordering is not None:
+                    move_ordering.record_cutoff(action, ply, cutoff - ply)
+                if stats is not None:
+                    stats.record_cutoff(ply, next_indices[ply] - 1)
+            elif next_indices[ply] < len(actions[ply]):
+                # Enter the next child
+                action = actions[ply][next_indices[ply]]
+                next_indices[ply] += 1
+                on_pv = on_pvs[ply] and action == pv_actions[ply]
+                state = state.generate_next_state(action)
+                ply += 1
+                break
+
+            # All children searched (or pruned): the frame is done
+            best_utility = best_utilities[ply]
+            if table is not None:
+                if not pruning:
+                    flag = EXACT
+                elif best_utility <= alpha_origs[ply]:
+                    flag = UPPER_BOUND
+                elif best_utility >= beta_origs[ply]:
+                    flag = LOWER_BOUND
+                else:
+                    flag = EXACT
+                stored_depth = INF if counter['num_unresolved_leaves'] == unresolved_leaves[ply] else cutoff - ply
+                table.store(keys[ply], stored_depth, shift_utility(best_utility, state.get_path_length()), flag, best_actions[ply])
+            result = (best_actions[ply], best_leaf_nodes[ply], best_utility, False)
 
-        # if min player
+def IterativeMinimaxSearch(initial_state,
+    util_fn,
+    eval_fn = always_zero,
+    cutoff = INF,
+    state_callback_fn = lambda state, state_value : False, # A callback function for the GUI. If it returns True, terminate
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
+    random_move_order = False,     # If true, consider moves in random order
+    transposition_table = False    # If true (or a TranspositionTable), use a transposition table.
+    ):
+    """
+    MinimaxSearch without recursion (see IterativeMinimaxAlphaBetaSearch), with the same results.
+    """
+    return IterativeMinimaxAlphaBetaSearch(initial_state, util_fn, eval_fn, cutoff, state_callback_fn, counter,
+        random_move_order = random_move_order,
+        transposition_table = transposition_table,
+        pruning = False)
+
+def alpha_beta_worker(child_state, util_fn, eval_fn, cutoff, random_move_order,
+    transposition_table, alpha, beta, maximizer_player, quiescence = False, custom_move_ordering = False,
+    null_window_search = False, tablebase_probe = None):
+    """
+    Worker for ParallelMinimaxAlphaBetaSearch: searches one root move in another process.
+    Returns the child's (expected utility, leaf node, counter).
+    """
+    counter = {'num_nodes_seen':0,'num_endgame_evals':0, 'num_heuristic_evals':0}
+    _, leaf_node, exp_util, _ = MinimaxAlphaBetaSearch(child_state, util_fn, eval_fn, cutoff,
+        counter = counter,
+        random_move_order = random_move_order,
+        transposition_table = transposition_table,
+        alpha = alpha,
+        beta = beta,
+        maximizer_player = maximizer_player,
+        quiescence = quiescence,
+        custom_move_ordering = custom_move_ordering,
+        null_window_search = null_window_search,
+        tablebase_probe = tablebase_probe)
+    return exp_util, leaf_node, counter
+
+def ParallelMinimaxAlphaBetaSearch(initial_state,
+    util_fn,
+    eval_fn = always_zero,
+    cutoff = INF,
+    state_callback_fn =  (lambda state, state_value = 0 : False) , # Only called for the root moves searched in this process
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
+    random_move_order = False,     # If true, consider moves in random order
+    transposition_table = False,    # If true (or a TranspositionTable), use a transposition table.
+    workers = cpu_count(),          # Number of worker processes
+    quiescence = False,             # If true, keep searching capture actions past the cutoff
+    custom_move_ordering = False,   # If true (or a MoveOrdering), order moves by killer moves and history
+    null_window_search = False,     # If true, search each root move like PrincipalVariationSearch
+    executor = None,                # Optional ProcessPoolExecutor to reuse (a temporary one if None)
+    tablebase_probe = None,         # Optional function (state, maximizer_player) -> exact value, or None if unknown
+    ):
+    """
+    Minimax with alpha-beta pruning, splitting the root moves between processes
+    ("Young Brothers Wait"): the first root move is searched in this process to
+    establish a bound, then all remaining root moves are searched in parallel in a
+    ProcessPoolExecutor with that bound as their alpha-beta window.
+
+    Returns the same 4-tuple as MinimaxAlphaBetaSearch, with the same value.
+    The worker counters are added to counter. A TranspositionTable given here is only
+    used for the first move; each worker uses a fresh table of its own if transposition_table is set.
+    The same goes for a MoveOrdering given as custom_move_ordering.
+    util_fn, eval_fn and tablebase_probe must be picklable (module-level functions,
+    or e.g. a CheckersTablebase's probe_utility).
+
+    Starting worker processes is slow compared with a shallow search, so a caller that
+    searches repeatedly (e.g. an agent, for a whole game) should pass its own executor.
+    It is left running; without one, a new pool of worker processes is started and shut down per call.
+    """
+    if counter is None:
+        counter = SearchStats()
+    table = get_transposition_table(transposition_table)
+    shift_utility = partial(shift_endgame_utility, util_fn)
+    move_ordering = get_move_ordering(custom_move_ordering)
+    actions = [] if initial_state.is_endgame_state() else get_ordered_actions(initial_state, random_move_order,
+                    (table.get_best_move(hash(initial_state)) if table is not None else None,), move_ordering)
+    if workers <= 1 or cutoff < 2 or len(actions) < 2:
+        return MinimaxAlphaBetaSearch(initial_state, util_fn, eval_fn, cutoff, state_callback_fn, counter,
+                                      random_move_order, table if table is not None else False,
+                                      quiescence = quiescence,
+                                      custom_move_ordering = move_ordering if move_ordering is not None else False,
+                                      null_window_search = null_window_search,
+                                      tablebase_probe = tablebase_probe)
+
+    maximizer_player = initial_state.get_current_player()
+    counter['num_nodes_seen'] += 1
+
+    # The eldest brother: searched alone, to get a bound for the others
+    best_action = actions[0]
+    _, best_leaf_node, best_utility, terminated = MinimaxAlphaBetaSearch(
+        initial_state.generate_next_state(best_action), util_fn, eval_fn, cutoff - 1, state_callback_fn, counter,
+        random_move_order, table if table is not None else False, maximizer_player = maximizer_player,
+        quiescence = quiescence,
+        custom_move_ordering = move_ordering if move_ordering is not None else False,
+        null_window_search = null_window_search,
+        tablebase_probe = tablebase_probe)
+    if terminated:
+        return best_action, best_leaf_node, best_utility, terminated
+
+    # The younger brothers: only need to beat the bound, so search them in parallel with alpha = bound
+    children = []
+    for action in actions[1:]:
+        child_state = copy(initial_state.generate_next_state(action))
+        child_state.parent = None  # only send the state itself to the workers, not its whole history
+        children.append(child_state)
+    with ProcessPoolExecutor(workers) if executor is None else nullcontext(executor) as pool:
+        futures = [pool.submit(alpha_beta_worker, child_state, util_fn, eval_fn, cutoff - 1,
+                               random_move_order, table is not None, best_utility, INF, maximizer_player,
+                               quiescence, move_ordering is not None, null_window_search, tablebase_probe)
+                   for child_state in children]
+        results = [future.result() for future in futures]
+
+    # Merge in move order, so ties are broken the same way as MinimaxAlphaBetaSearch
+    for action, child_state, (exp_util, leaf_node, worker_counter) in zip(actions[1:], children, results):
+        for key in worker_counter:
+            counter[key] = counter.get(key, 0) + worker_counter[key]
+        if exp_util > best_utility:
+            best_utility = exp_util
+            best_action = action
+            best_leaf_node = leaf_node
+            if leaf_node is not None:
+                # Reattach the path found by the worker to initial_state
+                root = leaf_node
+                while root.get_parent() is not None:
+                    root = root.get_parent()
+                root.parent = initial_state
+
+    if table is not None:
+        table.store(hash(initial_state), cutoff, shift_utility(best_utility, initial_state.get_path_length()), EXACT, best_action)
+    if isinstance(counter, SearchStats):
+        # The eldest brother's search recorded a line from the child, not from initial_state
+        counter.principal_variation = get_principal_variation(initial_state, best_leaf_node) or [best_action]
+    terminated = state_callback_fn(initial_state, best_utility)
+    return best_action, best_leaf_node, best_utility, terminated
+
+def MTDfSearch(initial_state,
+    util_fn,
+    eval_fn = always_zero,
+    cutoff = INF,
+    state_callback_fn =  (lambda state, state_value = 0 : False) , # A callback function for the GUI. If it returns True, terminate
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
+    random_move_order = False,     # If true, consider moves in random order
+    transposition_table = True,     # A TranspositionTable to keep between searches, or True for a fresh one
+    first_guess = 0,                # Initial guess of the value of initial_state
+    principal_variation = None,     # Optional list of actions from initial_state to search first
+    quiescence = False,             # If true, keep searching capture actions past the cutoff
+    custom_move_ordering = False,   # If true (or a MoveOrdering), order moves by killer moves and history
+    tablebase_probe = None,         # Optional function (state, maximizer_player) -> exact value, or None if unknown
+    ):
+    """
+    MTD(f) ("Memory-enhanced Test Driver"): finds the minimax value of initial_state
+    with a series of null-window alpha-beta searches, each only testing whether
+    the value is above or below a guess.
+
+    A test that fails high gives a lower bound on the value, one that fails low an upper bound;
+    each next guess is the last result, until the bounds meet. The better first_guess is
+    (e.g. the value found by a shallower search), the fewer tests are needed.
+    Every test searches the same tree again, so it relies on the transposition table
+    (which is always used) to skip the parts already settled by earlier tests.
+    A new search is started on the table once per call, not per test, so that
+    the entries of earlier tests are not the first to be replaced.
+
+    Returns the same 4-tuple as MinimaxAlphaBetaSearch. The best action and leaf node are
+    those of the last test that failed high, since its action is proven to reach the value.
+    counter['num_mtdf_passes'] counts the null-window searches.
+    """
+    if counter is None:
+        counter = SearchStats()
+    table = get_transposition_table(transposition_table or True)
+    move_ordering = get_move_ordering(custom_move_ordering)
+    counter.setdefault('num_mtdf_passes', 0)
+
+    exp_util = first_guess
+    lower_bound, upper_bound = -INF, INF
+    best_action, best_leaf_node = None, None
+    while lower_bound < upper_bound:
+        # Test whether the value is at least beta; if the guess is already a lower bound, whether it is above it
+        beta = math.nextafter(exp_util, INF) if exp_util == lower_bound else exp_util
+        action, leaf_node, exp_util, terminated = MinimaxAlphaBetaSearch(initial_state, util_fn, eval_fn, cutoff,
+            state_callback_fn, counter,
+            random_move_order = random_move_order,
+            transposition_table = table,
+            principal_variation = principal_variation,
+            alpha = math.nextafter(beta, -INF),
+            beta = beta,
+            quiescence = quiescence,
+            custom_move_ordering = move_ordering if move_ordering is not None else False,
+            tablebase_probe = tablebase_probe,
+            new_search = False)
+        counter['num_mtdf_passes'] += 1
+        if best_action is None:
+            best_action, best_leaf_node = action, leaf_node
+        if terminated:
+            return best_action, best_leaf_node, exp_util, terminated
+
+        if exp_util < beta:
+            upper_bound = exp_util
         else:
-            best_action = None
-            best_leaf_node = None
-            terminated = False
-            for action in actions:
-                # What child state results from that action?
-                child_state = state.generate_next_state(action)
-                # Search recursively from the child_state
-                child_action, leaf_node, exp_util, terminated = MinimaxAlphaBeta_helper(child_state, alpha, beta)
+            lower_bound = exp_util
+            best_action, best_leaf_node = action, leaf_node
 
-                beta = min(beta, exp_util)
-                if alpha >= beta:
-                    terminated = state_callback_fn(state, beta)
-                    return None, state, beta, terminated
-
-                if transposition_table:
-                    if (action in transposition_table_list):
-                        return child_action, None, exp_util, terminated
-                    else:
-                        transposition_table_list.update({action: exp_util})
-
-                if (exp_util < min_utility):
-                    min_utility = exp_util
-                    best_action = action
-                    best_leaf_node = leaf_node
-
-                if (terminated):
-                    return best_action, best_leaf_node, min_utility, terminated
-                # Visualize on upwards traversal, now with updated utility!
-                terminated = state_callback_fn(state, exp_util) or terminated
-
-            return best_action, best_leaf_node, min_utility, terminated
-
-    return MinimaxAlphaBeta_helper(initial_state, -INF, INF)
+    if isinstance(counter, SearchStats) and best_leaf_node is not None:
+        # The last test may have failed low, so its line is not the one found
+        counter.principal_variation = get_principal_variation(initial_state, best_leaf_node)
+    return best_action, best_leaf_node, exp_util, False
 
 ### Part 3: Progressive Deepening Algorithms #################################################
 
@@ -716,9 +1555,14 @@ def ProgressiveDeepening (initial_state,
     eval_fn = always_zero,
     time_limit = INF,
     state_callback_fn =  (lambda state, state_value = 0 : False) , # A callback function for the GUI. If it returns True, terminate
-    counter = {'num_nodes_seen':[0], 'num_endgame_evals':[0], 'num_heuristic_evals':[0]}, # A counter for tracking stats
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
     random_move_order = False,     # If true, consider moves in random order
     transposition_table = False,
+    quiescence = False,             # If true, keep searching capture actions past each cutoff
+    custom_move_ordering = False,   # If true (or a MoveOrdering), order moves by killer moves and history
+    mtdf = False,                   # If true, each search is an MTDfSearch, seeded with the previous value
+    aspiration_window = 0,          # If positive, search each depth with a window of this half-width around the previous value
+    tablebase_probe = None,         # Optional function (state, maximizer_player) -> exact value, or None if unknown
     ):
     """
     Performs progressively deepening Minimax search w/ alpha beta pruning.
@@ -729,9 +1573,147 @@ def ProgressiveDeepening (initial_state,
     This helps explore "better" branches earlier, improving pruning.
     This improvement often makes up for the costs of repeatedly searching
     shallower depths.
+
+    Each search also searches the principal variation (expected line of play)
+    of the previous search first, with or without a transposition table.
+
+    With custom_move_ordering, all the searches share one MoveOrdering, so the
+    killer moves and history found by shallower searches order the deeper ones.
+
+    If mtdf is True, each search is an MTDfSearch instead, whose first guess is the
+    value found by the previous search. It always uses a transposition table.
+
+    Otherwise, with a positive aspiration_window, each search after the first one starts
+    with the narrow window (v - aspiration_window, v + aspiration_window) around the
+    previous value v, rather than (-INF, INF), which prunes much more as long as the
+    value does not change much between depths. If the value falls outside the window,
+    the search only found a bound, so it is repeated with the window widened on that side
+    (twice as far each time) until the value is inside. These re-searches are counted
+    in counter['num_aspiration_researches'], and their nodes in the counts of their depth.
+
+    tablebase_probe is passed on to every search (see MinimaxAlphaBetaSearch), and its
+    hits are counted in counter['num_tablebase_hits'].
+
+    The time limit is enforced inside each search: once it expires, the search
+    in progress is abandoned and its results are discarded. Only the first search
+    (cutoff 1) is always completed, so that there is some action to return.
+
+    counter holds lists: index 0 is the total over all searches (including an
+    abandoned one), and index c the count of the completed search with cutoff c.
+    Besides the usual counts, 'num_unresolved_leaves' counts the leaves whose value
+    depends on the cutoff (see MinimaxAlphaBetaSearch): a search without any is certain,
+    and ends the deepening. With quiescence, there is also a 'num_quiescence_nodes' list.
+    If counter has a 'search_stats' list (e.g. [SearchStats()]), each search counts into
+    a SearchStats (see MinimaxAlphaBetaSearch) that is kept in the same way:
+    merged into index 0, and appended if the search is completed.
     """
-    raise NotImplementedError
-    return [], [], [], 0
+    if counter is None:
+        counter = {}
+    deadline = time() + time_limit
+    table = get_transposition_table(transposition_table or mtdf)
+    move_ordering = get_move_ordering(custom_move_ordering)
+    counter_keys = ['num_nodes_seen', 'num_endgame_evals', 'num_heuristic_evals', 'num_unresolved_leaves']
+    if quiescence:
+        counter_keys.append('num_quiescence_nodes')
+    if mtdf:
+        counter_keys.append('num_mtdf_passes')
+    elif aspiration_window > 0:
+        counter_keys.append('num_aspiration_researches')
+    if tablebase_probe is not None:
+        counter_keys.append('num_tablebase_hits')
+    for key in counter_keys:
+        counter.setdefault(key, [0])
+
+    best_actions = []
+    best_leaf_nodes = []
+    best_exp_utils = []
+    principal_variation = []
+    cutoff = 0
+    while True:
+        cutoff += 1
+        # state_callback_fn's termination signal, or running out of time, stops the search
+        stopped = {'terminated' : False, 'timed_out' : False}
+        def check_termination(state, state_value):
+            if state_callback_fn(state, state_value):
+                stopped['terminated'] = True
+            elif cutoff > 1 and time() > deadline:
+                stopped['timed_out'] = True
+            return stopped['terminated'] or stopped['timed_out']
+
+        search_counter = SearchStats() if 'search_stats' in counter else {}
+        for key in counter_keys:
+            search_counter.setdefault(key, 0)
+        if mtdf:
+            action, leaf_node, exp_util, terminated = MTDfSearch(
+                initial_state = initial_state,
+                util_fn = util_fn,
+                eval_fn = eval_fn,
+                cutoff = cutoff,
+                state_callback_fn = check_termination,
+                counter = search_counter,
+                random_move_order = random_move_order,
+                transposition_table = table,
+                first_guess = best_exp_utils[-1] if best_exp_utils else 0,
+                principal_variation = principal_variation,
+                quiescence = quiescence,
+                custom_move_ordering = move_ordering if move_ordering is not None else False,
+                tablebase_probe = tablebase_probe
+                )
+        else:
+            alpha, beta = -INF, INF
+            alpha_width, beta_width = aspiration_window, aspiration_window
+            if aspiration_window > 0 and best_exp_utils:
+                alpha, beta = best_exp_utils[-1] - alpha_width, best_exp_utils[-1] + beta_width
+            while True:
+                action, leaf_node, exp_util, terminated = MinimaxAlphaBetaSearch(
+                    initial_state = initial_state,
+                    util_fn = util_fn,
+                    eval_fn = eval_fn,
+                    cutoff = cutoff,
+                    state_callback_fn = check_termination,
+                    counter = search_counter,
+                    random_move_order = random_move_order,
+                    transposition_table = table if table is not None else False,
+                    principal_variation = principal_variation,
+                    alpha = alpha,
+                    beta = beta,
+                    quiescence = quiescence,
+                    custom_move_ordering = move_ordering if move_ordering is not None else False,
+                    tablebase_probe = tablebase_probe
+                    )
+                if terminated:
+                    break
+                # Failed low or high: the value is outside the window, widen it on that side and search again
+                if exp_util <= alpha and alpha > -INF:
+                    alpha_width *= 2
+                    alpha = best_exp_utils[-1] - alpha_width
+                elif exp_util >= beta and beta < INF:
+                    beta_width *= 2
+                    beta = best_exp_utils[-1] + beta_width
+                else:
+                    break
+                search_counter['num_aspiration_researches'] += 1
+        for key in counter_keys:
+            counter[key][0] += search_counter[key]
+        if 'search_stats' in counter:
+            counter['search_stats'][0].merge(search_counter)
+        if terminated:
+            break
+
+        for key in counter_keys:
+            counter[key].append(search_counter[key])
+        if 'search_stats' in counter:
+            counter['search_stats'].append(search_counter)
+        best_actions.append(action)
+        best_leaf_nodes.append(leaf_node)
+        best_exp_utils.append(exp_util)
+        principal_variation = get_principal_variation(initial_state, leaf_node, table, cutoff)
+
+        # Every leaf was an endgame (or a final value from the table or tablebase): the result is certain
+        if search_counter['num_unresolved_leaves'] == 0 or time() > deadline:
+            break
+
+    return best_actions, best_leaf_nodes, best_exp_utils, len(best_actions)
 
 ### EXTENSION: Monte Carlo Tree Search #################################################
 
@@ -750,12 +1732,33 @@ You may want to do some research online (there are many decent tutorials and blo
 to understand the concept.
 """
 
+"""
+The MCTS tree is stored as parallel arrays indexed by node number (the root is node 0),
+rather than as one Python object per node:
+    visits[n]: number of simulations through node n
+    value_sums[n]: sum of their utilities, from the maximizer's point of view
+    first_child[n]: node number of n's first child, or -1 if n is not expanded yet.
+        The children of a node are allocated together, in consecutive node numbers.
+    num_children[n]: number of children of n (0 for an expanded endgame state)
+    actions[n]: the action leading from n's parent to n
+States are not stored: each simulation regenerates them from initial_state
+while walking down the tree. For state classes with supports_make_move, this is
+done on a single copy of initial_state, with make_move on the way down (and
+through the rollout) and unmake_move afterwards, so no node is allocated per action.
+
+Rollouts longer than MCTS_MAX_ROLLOUT_LENGTH actions are stopped and counted
+as a draw (utility 0), so that games which can go on forever still finish.
+"""
+MCTS_MAX_ROLLOUT_LENGTH = 1000
+
 def MonteCarloTreeSearch (initial_state,
     util_fn,
     exploration_bias = 1000,
     time_limit = INF,
     state_callback_fn =  (lambda state, state_value = 0 : False) , # A callback function for the GUI. If it returns True, terminate
-    counter = {'num_simulations':0} # A counter for tracking stats
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
+    workers = 1,                    # Number of processes searching in parallel
+    pool = None                     # With workers > 1, optional multiprocessing Pool to reuse (a temporary one if None)
     ):
     """
     Monte Carlo Tree Search builds a tree asymetrically, starting with just the root
@@ -772,14 +1775,216 @@ def MonteCarloTreeSearch (initial_state,
         expected (average) utility, walking from the expanded child back up
         to the root state node,
 
-    The process terminates when time_limit is reached, or state_callback_fn returns False.
+    The process terminates when time_limit is reached, or state_callback_fn returns True.
+
+    With workers > 1, root parallelism is used instead: each worker process
+    grows its own independent tree for the time limit, and the visit counts and
+    value sums of the root's children are added up over all trees before choosing.
+    util_fn must then be picklable (a module-level function), and state_callback_fn
+    is only called once, with the chosen child state, since the trees are in other processes.
 
     It then returns the following 4-tuple:
     1) The "best" action to take from initial_state, based on the gathered statistics.
     2) State at the end of the expected path in the grown search tree. (GameStateNode)
+        (With workers > 1, only the child of initial_state is known.)
     3) Expected utility of the action.
     4) The number of rollouts performed.
     """
-    raise NotImplementedError
-
-    return None, None, 0, 0
+    if counter is None:
+        counter = {'num_simulations':0}
+    if workers > 1:
+        return RootParallelMonteCarloTreeSearch(initial_state, util_fn, exploration_bias,
+                                                time_limit, state_callback_fn, counter, workers, pool)
+
+    visits, value_sums, first_child, num_children, actions, num_simulations = build_monte_carlo_tree(
+        initial_state, util_fn, exploration_bias, time() + time_limit, state_callback_fn)
+    counter['num_simulations'] += num_simulations
+
+    # The best action is the most visited child of the root;
+    # the expected path follows the most visited children down the grown tree.
+    best_action = None
+    best_exp_util = value_sums[0] / visits[0] if visits[0] else 0
+    node = 0
+    state = initial_state
+    while first_child[node] >= 0 and num_children[node] > 0:
+        start = first_child[node]
+        child = max(range(start, start + num_children[node]), key = lambda c : visits[c])
+        if visits[child] == 0:
+            break
+        if node == 0:
+            best_action = actions[child]
+            best_exp_util = value_sums[child] / visits[child]
+        node = child
+        state = state.generate_next_state(actions[node])
+
+    return best_action, state, best_exp_util, num_simulations
+
+def build_monte_carlo_tree(initial_state, util_fn, exploration_bias, deadline,
+    state_callback_fn = lambda state, state_value : False):
+    """
+    Runs MCTS simulations from initial_state until the time() deadline,
+    or until state_callback_fn returns True.
+    Returns the node arrays described above, followed by the number of simulations:
+    (visits, value_sums, first_child, num_children, actions, num_simulations)
+    With make_move, state_callback_fn is passed the one shared, changing state.
+    """
+    maximizer = initial_state.get_current_player()
+    in_place = type(initial_state).supports_make_move
+    root = copy(initial_state) if in_place else initial_state
+    # The undo records of the make_move calls of the current simulation
+    undos = []
+
+    visits = array('l', [0])
+    value_sums = array('d', [0.0])
+    first_child = array('l', [-1])
+    num_children = array('l', [0])
+    actions = [None]
+
+    def select_child(node, is_max_player):
+        """ Returns the child of node with the best UCT score; unvisited children come first. """
+        start = first_child[node]
+        log_visits = math.log(visits[node])
+        best_child = start
+        best_score = -INF
+        for child in range(start, start + num_children[node]):
+            n = visits[child]
+            if n == 0:
+                return child
+            mean = value_sums[child] / n
+            score = (mean if is_max_player else -mean) + exploration_bias * math.sqrt(log_visits / n)
+            if score > best_score:
+                best_score = score
+                best_child = child
+        return best_child
+
+    def play(state, action):
+        """ Returns the state after action: state itself, changed in place, if possible. """
+        if in_place:
+            undos.append(state.make_move(action))
+            return state
+        return state.generate_next_state(action)
+
+    def rollout(state):
+        """
+        Plays random actions until the endgame; returns the utility for the maximizer
+        and the final state.
+        """
+        for _ in range(MCTS_MAX_ROLLOUT_LENGTH):
+            if state.is_endgame_state():
+                return util_fn(state, maximizer), state
+            state = play(state, random.choice(state.get_cached_actions()))
+        return 0, state
+
+    num_simulations = 0
+    terminated = False
+    while not terminated and time() < deadline:
+        # 1) select: walk down the grown tree to a node that is not expanded yet
+        node = 0
+        state = root
+        path = [0]
+        while first_child[node] >= 0 and num_children[node] > 0:
+            node = select_child(node, state.get_current_player() == maximizer)
+            state = play(state, actions[node])
+            path.append(node)
+            if visits[node] == 0:
+                break
+
+        # 2) expand: allocate all children of a leaf that was already visited, pick one at random
+        if first_child[node] < 0 and (visits[node] > 0 or node == 0):
+            child_actions = () if state.is_endgame_state() else state.get_cached_actions()
+            first_child[node] = len(actions)
+            num_children[node] = len(child_actions)
+            visits.extend([0] * len(child_actions))
+            value_sums.extend([0.0] * len(child_actions))
+            first_child.extend([-1] * len(child_actions))
+            num_children.extend([0] * len(child_actions))
+            actions.extend(child_actions)
+            if child_actions:
+                node = first_child[node] + random.randrange(len(child_actions))
+                state = play(state, actions[node])
+                path.append(node)
+
+        # 3) rollout
+        value, state = rollout(state)
+
+        # 4) backpropagate
+        for n in path:
+            visits[n] += 1
+            value_sums[n] += value
+        num_simulations += 1
+        terminated = state_callback_fn(state, value)
+        while undos:
+            state.unmake_move(undos.pop())
+
+    return visits, value_sums, first_child, num_children, actions, num_simulations
+
+def monte_carlo_root_statistics(initial_state, util_fn, exploration_bias, time_limit, seed):
+    """
+    Worker for RootParallelMonteCarloTreeSearch: grows one tree for time_limit seconds,
+    counted from when the worker starts, not from when the search was dispatched.
+    Returns the root's child actions with their visit counts and value sums,
+    and the number of simulations.
+    """
+    random.seed(seed)
+    visits, value_sums, first_child, num_children, actions, num_simulations = build_monte_carlo_tree(
+        initial_state, util_fn, exploration_bias, time() + time_limit)
+    children = range(first_child[0], first_child[0] + num_children[0])
+    return ([actions[c] for c in children], [visits[c] for c in children],
+            [value_sums[c] for c in children], num_simulations)
+
+def merge_root_statistics(results):
+    """
+    Adds up the results of monte_carlo_root_statistics over the workers.
+    Returns the total visit counts and value sums per root action (as dicts),
+    and the total number of simulations.
+    """
+    visits = defaultdict(int)
+    value_sums = defaultdict(float)
+    num_simulations = 0
+    for child_actions, child_visits, child_value_sums, worker_simulations in results:
+        for action, n, v in zip(child_actions, child_visits, child_value_sums):
+            visits[action] += n
+            value_sums[action] += v
+        num_simulations += worker_simulations
+    return visits, value_sums, num_simulations
+
+def RootParallelMonteCarloTreeSearch (initial_state,
+    util_fn,
+    exploration_bias = 1000,
+    time_limit = INF,
+    state_callback_fn =  (lambda state, state_value = 0 : False) , # Only called with the chosen child state
+    counter = None,                 # A counter for tracking stats (a fresh one if None)
+    workers = cpu_count(),          # Number of worker processes (independent trees)
+    pool = None                     # Optional multiprocessing Pool to reuse (a temporary one if None)
+    ):
+    """
+    Root-parallel MCTS: runs one independent MonteCarloTreeSearch tree per worker
+    process in a multiprocessing Pool, then merges the statistics of the root's
+    children (visit counts and value sums per action) and picks the most visited action.
+    Returns the same 4-tuple as MonteCarloTreeSearch, with the chosen child state
+    as the expected state.
+
+    Each worker's time_limit starts when it starts, so that starting the pool does not
+    use up its time. Starting worker processes is still slow, so a caller that searches
+    repeatedly (e.g. an agent, for a whole game) should pass its own pool, which is left running.
+    """
+    if counter is None:
+        counter = {'num_simulations':0}
+    # Only the state itself is sent to the workers, not its whole history
+    root = copy(initial_state)
+    root.parent = None
+    seeds = [random.getrandbits(32) for _ in range(workers)]
+    with Pool(workers) if pool is None else nullcontext(pool) as worker_pool:
+        results = worker_pool.starmap(monte_carlo_root_statistics,
+            [(root, util_fn, exploration_bias, time_limit, seed) for seed in seeds])
+
+    visits, value_sums, num_simulations = merge_root_statistics(results)
+    counter['num_simulations'] += num_simulations
+
+    if not visits:
+        return None, initial_state, 0, num_simulations
+    best_action = max(visits, key = lambda a : visits[a])
+    best_exp_util = value_sums[best_action] / visits[best_action] if visits[best_action] else 0
+    best_state = initial_state.generate_next_state(best_action)
+    state_callback_fn(best_state, best_exp_util)
+    return best_action, best_state, best_exp_util, num_simulations
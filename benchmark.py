@@ -0,0 +1,390 @@
+"""
+Benchmark the search algorithms in algorithms.py on a fixed corpus of positions.
+
+Usage:
+    python benchmark.py run OUTPUT_FILE [GAME ...]
+    python benchmark.py compare BASELINE_FILE RESULTS_FILE [TOLERANCE]
+    GAME can be checkers, connectfour or tictactoe (default: all of them)
+
+run searches every position of the corpus with every algorithm and writes one JSON record
+per (game, position, algorithm) to OUTPUT_FILE. Fixed-depth algorithms are run at each
+cutoff from 1 to the game's depth, which gives the time to each depth; the other measures
+are those of the deepest search. Time-limited algorithms (ProgressiveDeepening, MCTS)
+get the game's time limit. Each record has:
+    elapsed: seconds of the (deepest) search
+    nodes, endgame_evals, heuristic_evals: its counter (for MCTS, nodes are simulations)
+    nodes_per_sec, evals_per_sec
+    ebf: effective branching factor, the b with 1 + b + b^2 + ... + b^depth = nodes
+    time_to_depth: the elapsed time of the search at each cutoff 1, 2, ... (fixed-depth only)
+    depth: the cutoff searched (or reached, for ProgressiveDeepening)
+    action, value: the search result, as game_class.action_to_str
+    peak_rss_kb: the peak resident set size of the process that ran the search
+Each record is computed in its own process, so that peak_rss_kb is that of one search
+(but not of the worker processes of the parallel algorithms). A record whose process
+raises, crashes or times out is reported and written as only its game, position,
+algorithm and error, and the other records are still run.
+
+compare prints the records of RESULTS_FILE next to those of BASELINE_FILE, and flags the ones
+whose nodes/sec dropped by more than TOLERANCE (default 0.1, i.e. 10%), or whose node count
+changed (for deterministic algorithms, that means the search itself changed).
+It exits with status 1 if any record got slower or failed (run does too if any failed).
+
+The positions are lists of action indices, applied one after another from the game's
+defaultInitialState (each index is into get_all_actions() of the current state).
+"""
+import json
+import resource
+import sys
+import traceback
+from sys import argv
+from time import time
+from multiprocessing import Process, Pipe
+from algorithms import *
+from util_eval import all_fn_dicts
+from checkersgamestate import CheckersGameState
+from connectfour_gamestate import ConnectFourGameState
+from tictactoe_gamestate import TicTacToeGameState
+
+"""
+For each game: its class, the names of its utility and heuristic evaluation functions
+(in all_fn_dicts), the depth of the fixed-depth searches, the time limit of the
+time-limited ones, and the corpus of named positions.
+"""
+BENCHMARK_GAMES = {
+    "checkers": {
+        "game_class": CheckersGameState,
+        "util_fn": "faster",
+        "eval_fn": "diff",
+        "depth": 6,
+        "time_limit": 2.0,
+        "positions": {
+            "opening": [],
+            "early": [1, 4, 1, 4, 0, 0],
+            "middle": [4, 2, 0, 0, 6, 7, 3, 0, 0, 0, 5, 7, 3, 6, 0, 0],
+        },
+    },
+    "connectfour": {
+        "game_class": ConnectFourGameState,
+        "util_fn": "faster",
+        "eval_fn": "chains",
+        "depth": 5,
+        "time_limit": 2.0,
+        "positions": {
+            "opening": [],
+            "early": [3, 3, 2, 4],
+            "middle": [3, 3, 2, 4, 4, 2, 1, 5, 3, 0],
+        },
+    },
+    "tictactoe": {
+        "game_class": TicTacToeGameState,
+        "util_fn": "faster",
+        "eval_fn": "win paths",
+        "depth": 9,
+        "time_limit": 1.0,
+        "positions": {
+            "center": [4],
+            "corner": [0],
+            "middle": [4, 0, 6],
+        },
+    },
+}
+
+""" Algorithms searched to a fixed depth, with their extra keyword arguments. """
+FIXED_DEPTH_ALGORITHMS = {
+    "maxdfs": (MaximizingDFS, {}),
+    "minimax": (MinimaxSearch, {}),
+    "iterative_minimax": (IterativeMinimaxSearch, {}),
+    "expectimax": (ExpectimaxSearch, {}),
+    "alphabeta": (MinimaxAlphaBetaSearch, {}),
+    "alphabeta_tt": (MinimaxAlphaBetaSearch, {'transposition_table': True}),
+    "iterative_alphabeta": (IterativeMinimaxAlphaBetaSearch, {}),
+    "parallel_alphabeta": (ParallelMinimaxAlphaBetaSearch, {}),
+    "pvs": (PrincipalVariationSearch, {}),
+    "mtdf": (MTDfSearch, {}),
+}
+
+""" Algorithms searched for a fixed time, with their extra keyword arguments. """
+TIME_LIMITED_ALGORITHMS = {
+    "progressive": (ProgressiveDeepening, {'transposition_table': True}),
+    "montecarlo": (MonteCarloTreeSearch, {}),
+}
+
+class BenchmarkError(Exception):
+    """ A benchmark that is misconfigured, or a record whose process raised, crashed or timed out. """
+
+def get_position(game_class, action_indices):
+    """ Applies the action indices (see the module doc string) to the game's defaultInitialState. """
+    state = game_class.defaultInitialState()
+    for i in action_indices:
+        state = state.generate_next_state(state.get_all_actions()[i])
+    return state.clone_as_root()
+
+def check_benchmark_games(game_names = None):
+    """
+    Raises BenchmarkError unless the util_fn and eval_fn of the given games (default: all)
+    name functions of all_fn_dicts that run without raising on every position of the corpus,
+    so that a misconfigured game fails at once rather than in every record.
+    """
+    for game_name in (game_names or BENCHMARK_GAMES):
+        game = BENCHMARK_GAMES[game_name]
+        game_class = game["game_class"]
+        for fn_key, dict_key in (("util_fn", 'endgame_util_fn_dict'), ("eval_fn", 'heuristic_eval_fn_dict')):
+            fn_dict = all_fn_dicts[game_class][dict_key]
+            if game[fn_key] not in fn_dict:
+                raise BenchmarkError("{} {} '{}' is not one of {}".format(game_name, fn_key, game[fn_key], list(fn_dict)))
+            for position_name, action_indices in game["positions"].items():
+                state = get_position(game_class, action_indices)
+                try:
+                    fn_dict[game[fn_key]](state, state.get_current_player())
+                except Exception as error:
+                    raise BenchmarkError("{} {} '{}' raises {!r} on position {}".format(
+                        game_name, fn_key, game[fn_key], error, position_name)) from error
+
+def effective_branching_factor(nodes, depth):
+    """ The b with 1 + b + ... + b^depth = nodes (found by bisection), or None if undefined. """
+    if depth < 1 or depth == INF or nodes <= depth + 1:
+        return None
+    low, high = 1.0, float(nodes)
+    while high - low > 1e-6:
+        b = (low + high) / 2
+        if sum(b ** i for i in range(depth + 1)) < nodes:
+            low = b
+        else:
+            high = b
+    return (low + high) / 2
+
+def peak_rss_kb():
+    """ The peak resident set size of this process so far, in kilobytes. """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS, in kilobytes elsewhere
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def run_fixed_depth(game_name, position_name, algorithm_name, depth = None):
+    """
+    Returns the record (see the module doc string) of a fixed-depth algorithm on a position,
+    searched to depth (default: the game's depth).
+    """
+    game = BENCHMARK_GAMES[game_name]
+    depth = depth or game["depth"]
+    game_class = game["game_class"]
+    fn_dicts = all_fn_dicts[game_class]
+    search_alg, kwargs = FIXED_DEPTH_ALGORITHMS[algorithm_name]
+    state = get_position(game_class, game["positions"][position_name])
+
+    time_to_depth = []
+    for cutoff in range(1, depth + 1):
+        counter = {'num_nodes_seen':0, 'num_endgame_evals':0, 'num_heuristic_evals':0}
+        start_time = time()
+        action, leaf_node, exp_util, terminated = search_alg(
+            initial_state = state,
+            util_fn = fn_dicts['endgame_util_fn_dict'][game["util_fn"]],
+            eval_fn = fn_dicts['heuristic_eval_fn_dict'][game["eval_fn"]],
+            cutoff = cutoff,
+            counter = counter,
+            **kwargs)
+        elapsed = time() - start_time
+        time_to_depth.append(elapsed)
+
+    evals = counter['num_endgame_evals'] + counter['num_heuristic_evals']
+    return {
+        "game": game_name, "position": position_name, "algorithm": algorithm_name,
+        "elapsed": elapsed,
+        "nodes": counter['num_nodes_seen'],
+        "endgame_evals": counter['num_endgame_evals'],
+        "heuristic_evals": counter['num_heuristic_evals'],
+        "nodes_per_sec": counter['num_nodes_seen'] / elapsed if elapsed > 0 else None,
+        "evals_per_sec": evals / elapsed if elapsed > 0 else None,
+        "ebf": effective_branching_factor(counter['num_nodes_seen'], depth),
+        "time_to_depth": time_to_depth,
+        "depth": depth,
+        "action": game_class.action_to_str(action) if action is not None else None,
+        "value": exp_util,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+def run_time_limited(game_name, position_name, algorithm_name, time_limit = None):
+    """
+    Returns the record (see the module doc string) of a time-limited algorithm on a position,
+    searched for time_limit seconds (default: the game's time limit).
+    """
+    game = BENCHMARK_GAMES[game_name]
+    time_limit = time_limit or game["time_limit"]
+    game_class = game["game_class"]
+    fn_dicts = all_fn_dicts[game_class]
+    search_alg, kwargs = TIME_LIMITED_ALGORITHMS[algorithm_name]
+    state = get_position(game_class, game["positions"][position_name])
+    util_fn = fn_dicts['endgame_util_fn_dict'][game["util_fn"]]
+
+    start_time = time()
+    if search_alg == MonteCarloTreeSearch:
+        counter = {'num_simulations':0}
+        action, leaf_node, exp_util, num_rollouts = MonteCarloTreeSearch(
+            initial_state = state,
+            util_fn = util_fn,
+            time_limit = time_limit,
+            counter = counter,
+            **kwargs)
+        elapsed = time() - start_time
+        nodes, endgame_evals, heuristic_evals = counter['num_simulations'], counter['num_simulations'], 0
+        depth, ebf = None, None
+    else:
+        counter = {'num_nodes_seen':[0], 'num_endgame_evals':[0], 'num_heuristic_evals':[0]}
+        best_actions, best_leaf_nodes, best_exp_utils, depth = ProgressiveDeepening(
+            initial_state = state,
+            util_fn = util_fn,
+            eval_fn = fn_dicts['heuristic_eval_fn_dict'][game["eval_fn"]],
+            time_limit = time_limit,
+            counter = counter,
+            **kwargs)
+        elapsed = time() - start_time
+        action, exp_util = best_actions[-1], best_exp_utils[-1]
+        nodes = counter['num_nodes_seen'][0]
+        endgame_evals, heuristic_evals = counter['num_endgame_evals'][0], counter['num_heuristic_evals'][0]
+        # The branching factor of the deepest completed search
+        ebf = effective_branching_factor(counter['num_nodes_seen'][depth], depth)
+
+    return {
+        "game": game_name, "position": position_name, "algorithm": algorithm_name,
+        "elapsed": elapsed,
+        "nodes": nodes,
+        "endgame_evals": endgame_evals,
+        "heuristic_evals": heuristic_evals,
+        "nodes_per_sec": nodes / elapsed if elapsed > 0 else None,
+        "evals_per_sec": (endgame_evals + heuristic_evals) / elapsed if elapsed > 0 else None,
+        "ebf": ebf,
+        "time_to_depth": None,
+        "depth": depth,
+        "action": game_class.action_to_str(action) if action is not None else None,
+        "value": exp_util,
+        "peak_rss_kb": peak_rss_kb(),
+    }
+
+def _send_result(connection, run_fn, args):
+    try:
+        result = ("ok", run_fn(*args))
+    except Exception:
+        result = ("error", traceback.format_exc())
+    connection.send(result)
+    connection.close()
+
+def run_in_new_process(run_fn, *args, timeout = None):
+    """
+    Returns run_fn(*args), computed in a new process.
+    (A plain Process rather than a Pool, whose daemonic workers could not start
+    the worker processes of the parallel algorithms.)
+    Raises BenchmarkError, with the traceback or exit code, if run_fn raises, the process
+    dies without a result, or no result comes within timeout seconds (if not None).
+    """
+    receiver, sender = Pipe(duplex = False)
+    process = Process(target = _send_result, args = (sender, run_fn, args))
+    process.start()
+    # Only the child may write: once it exits, recv raises EOFError instead of waiting forever
+    sender.close()
+    try:
+        if not receiver.poll(timeout):
+            process.terminate()
+            process.join()
+            raise BenchmarkError("No result within {} seconds".format(timeout))
+        status, result = receiver.recv()
+    except EOFError:
+        status, result = "error", None
+    finally:
+        receiver.close()
+    process.join()
+    if status == "error":
+        raise BenchmarkError(result or "The process exited with code {} without a result".format(process.exitcode))
+    if process.exitcode != 0:
+        raise BenchmarkError("The process exited with code {}".format(process.exitcode))
+    return result
+
+def run_benchmarks(game_names = None, verbose = False, timeout = None):
+    """
+    Returns the records of every position and algorithm of the given games (default: all),
+    each computed within timeout seconds (if not None). A record that fails is
+    {"game", "position", "algorithm", "error"}, with the error message.
+    """
+    check_benchmark_games(game_names)
+    records = []
+    for game_name in (game_names or BENCHMARK_GAMES):
+        for position_name in BENCHMARK_GAMES[game_name]["positions"]:
+            cases = [(run_fixed_depth, name) for name in FIXED_DEPTH_ALGORITHMS]
+            cases += [(run_time_limited, name) for name in TIME_LIMITED_ALGORITHMS]
+            for run_fn, algorithm_name in cases:
+                try:
+                    record = run_in_new_process(run_fn, game_name, position_name, algorithm_name, timeout = timeout)
+                except BenchmarkError as error:
+                    record = {"game": game_name, "position": position_name, "algorithm": algorithm_name,
+                              "error": str(error)}
+                    if verbose:
+                        print("{:12} {:8} {:20} FAILED: {}".format(game_name, position_name, algorithm_name, error))
+                records.append(record)
+                if verbose and "error" not in record:
+                    print("{:12} {:8} {:20} {:10} nodes {:10.0f} nodes/sec {:8.3f} s".format(
+                        game_name, position_name, algorithm_name, record["nodes"],
+                        record["nodes_per_sec"] or 0, record["elapsed"]))
+    return records
+
+def compare_benchmarks(baseline_records, records, tolerance = 0.1):
+    """
+    Prints each record next to its baseline (matched by game, position and algorithm).
+    Returns the list of records whose nodes/sec dropped by more than tolerance, or that failed.
+    """
+    baseline = {(r["game"], r["position"], r["algorithm"]) : r for r in baseline_records}
+    slower = []
+    print("{:12} {:8} {:20} {:>12} {:>12} {:>7} {:>10} {:>10}".format(
+        "game", "position", "algorithm", "base n/s", "new n/s", "ratio", "base nodes", "new nodes"))
+    for record in records:
+        key = (record["game"], record["position"], record["algorithm"])
+        if key not in baseline:
+            print("{:12} {:8} {:20} (not in the baseline)".format(*key))
+            continue
+        if "error" in record:
+            print("{:12} {:8} {:20} FAILED".format(*key))
+            slower.append(record)
+            continue
+        base = baseline[key]
+        if "error" in base:
+            print("{:12} {:8} {:20} (failed in the baseline)".format(*key))
+            continue
+        base_speed, speed = base["nodes_per_sec"] or 0, record["nodes_per_sec"] or 0
+        ratio = speed / base_speed if base_speed > 0 else INF
+        notes = []
+        if ratio < 1 - tolerance:
+            notes.append("SLOWER")
+            slower.append(record)
+        if record["nodes"] != base["nodes"] and record["time_to_depth"] is not None:
+            notes.append("NODES CHANGED")
+        print("{:12} {:8} {:20} {:12.0f} {:12.0f} {:7.2f} {:10} {:10} {}".format(
+            *key, base_speed, speed, ratio, base["nodes"], record["nodes"], " ".join(notes)))
+    return slower
+
+
+if __name__ == "__main__":
+    if len(argv) < 3 or argv[1] not in ("run", "compare") or (argv[1] == "compare" and len(argv) < 4):
+        print("Usage:    python benchmark.py run OUTPUT_FILE [GAME ...]")
+        print("          python benchmark.py compare BASELINE_FILE RESULTS_FILE [TOLERANCE]")
+        print("          GAME can be " + " or ".join("'{}'".format(game) for game in BENCHMARK_GAMES))
+        quit()
+
+    if argv[1] == "run":
+        game_names = argv[3:]
+        if any(game not in BENCHMARK_GAMES for game in game_names):
+            print("GAME should be one of the following: {}".format(str(list(BENCHMARK_GAMES.keys()))))
+            quit()
+        try:
+            records = run_benchmarks(game_names, verbose = True)
+        except BenchmarkError as error:
+            print(error)
+            sys.exit(1)
+        with open(argv[2], 'w') as f:
+            json.dump(records, f, indent = 1)
+        if any("error" in record for record in records):
+            sys.exit(1)
+    else:
+        with open(argv[2]) as f:
+            baseline_records = json.load(f)
+        with open(argv[3]) as f:
+            records = json.load(f)
+        tolerance = float(argv[4]) if len(argv) > 4 else 0.1
+        if compare_benchmarks(baseline_records, records, tolerance):
+            sys.exit(1)
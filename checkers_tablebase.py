@@ -0,0 +1,304 @@
+"""
+Endgame tablebase for checkers: the exact result (win / loss / draw, and the number of
+plies to the end of the game with best play) of every position with up to N pieces.
+
+Build it offline with
+    python checkers_tablebase.py OUTPUT_FILE [MAX_PIECES]
+and probe it during a search with CheckersTablebase(OUTPUT_FILE).probe_utility, e.g. through
+the tablebase setting of MinimaxAlphaBetaSearchAgent and ProgressiveDeepeningSearchAgent.
+
+Positions are grouped by material into slices (black men, black kings, red men, red kings).
+Within a slice, a position is indexed with the combinatorial number system: the squares of
+each group of pieces, as a subset of the 32 squares, have a rank (the colex rank:
+sum of binomial(square, i) over the group's squares in increasing order, i = 1, 2, ...), so
+    index = (((rank(black men) * C(32, bk) + rank(black kings)) * C(32, rm)
+              + rank(red men)) * C(32, rk) + rank(red kings)) * 2 + (current_player - 1)
+Some indices are not real positions (overlapping pieces, or men on their king row),
+which wastes some space but keeps indexing to a few additions.
+
+Each position takes one byte, from the point of view of the player to move:
+    0: not a position,  1: draw,  2 + 2 * d: win in d plies,  3 + 2 * d: loss in d plies
+(d is at most MAX_DISTANCE, the most a byte can hold). The file is a header followed by the slices' bytes:
+    "CKTB", version (uint16), number of slices (uint16), then for each slice
+    bm, bk, rm, rk (uint8 each) and the file offset of its bytes (uint64).
+"""
+import mmap
+import struct
+from math import comb
+from itertools import combinations
+from sys import argv
+from time import time
+from checkersgamestate import CheckersGameState, BLACK, RED, NUM_SQUARES, BLACK_KING_ROW, RED_KING_ROW
+from util_eval import faster_endgame_utility
+
+MAGIC = b"CKTB"
+VERSION = 1
+HEADER_FORMAT = "<4sHH"
+SLICE_FORMAT = "<BBBBQ"
+
+NOT_A_POSITION = 0
+DRAW = 1
+WIN = 2
+LOSS = 3
+MAX_DISTANCE = 126
+
+BINOMIAL = [[comb(n, k) for k in range(NUM_SQUARES + 1)] for n in range(NUM_SQUARES + 1)]
+
+def encode(result, distance = 0):
+    """
+    The byte for a result (DRAW, WIN or LOSS for the player to move) in distance plies.
+    Raises ValueError if distance is over MAX_DISTANCE: a capped distance would
+    make the searches prefer the wrong wins and losses.
+    """
+    if result == DRAW:
+        return DRAW
+    if distance > MAX_DISTANCE:
+        raise ValueError("Distance {} is over the tablebase's maximum of {} plies".format(distance, MAX_DISTANCE))
+    return result + 2 * distance
+
+def decode(value):
+    """ The (result, distance) of a byte, or None for NOT_A_POSITION. """
+    if value == NOT_A_POSITION:
+        return None
+    if value == DRAW:
+        return DRAW, 0
+    return (WIN if value % 2 == 0 else LOSS), (value - 2) // 2
+
+def material(black, red, kings):
+    """ The slice of a position: (black men, black kings, red men, red kings). """
+    black_kings = bin(black & kings).count('1')
+    red_kings = bin(red & kings).count('1')
+    return (bin(black).count('1') - black_kings, black_kings, bin(red).count('1') - red_kings, red_kings)
+
+def slice_size(material_slice):
+    bm, bk, rm, rk = material_slice
+    return BINOMIAL[NUM_SQUARES][bm] * BINOMIAL[NUM_SQUARES][bk] * BINOMIAL[NUM_SQUARES][rm] * BINOMIAL[NUM_SQUARES][rk] * 2
+
+def build_order(max_pieces):
+    """
+    All the slices with 1 to max_pieces pieces and at least one piece per side, in an order
+    where every move out of a slice leads to an earlier one: captures remove pieces, and
+    crowning turns a man into a king, so by number of pieces, then by number of men.
+    """
+    slices = [(bm, bk, rm, rk)
+              for bm in range(max_pieces + 1) for bk in range(max_pieces + 1)
+              for rm in range(max_pieces + 1) for rk in range(max_pieces + 1)
+              if bm + bk > 0 and rm + rk > 0 and bm + bk + rm + rk <= max_pieces]
+    return sorted(slices, key = lambda s: (sum(s), s[0] + s[2], s))
+
+def _rank(mask):
+    """ The colex rank of the set of squares in mask. """
+    rank = 0
+    i = 1
+    while mask:
+        low = mask & -mask
+        rank += BINOMIAL[low.bit_length() - 1][i]
+        i += 1
+        mask ^= low
+    return rank
+
+def position_index(material_slice, black, red, kings, current_player):
+    """ The index of a position within its slice (see the module doc string). """
+    bm, bk, rm, rk = material_slice
+    index = _rank(black & ~kings)
+    index = index * BINOMIAL[NUM_SQUARES][bk] + _rank(black & kings)
+    index = index * BINOMIAL[NUM_SQUARES][rm] + _rank(red & ~kings)
+    index = index * BINOMIAL[NUM_SQUARES][rk] + _rank(red & kings)
+    return index * 2 + (current_player - 1)
+
+def slice_positions(material_slice):
+    """ Yields the (black, red, kings) masks of every legal placement of the slice's pieces. """
+    bm, bk, rm, rk = material_slice
+    def masks(n, forbidden):
+        for squares in combinations(range(NUM_SQUARES), n):
+            mask = sum(1 << s for s in squares)
+            if not mask & forbidden:
+                yield mask
+    for black_men in masks(bm, BLACK_KING_ROW):
+        for black_kings in masks(bk, black_men):
+            black = black_men | black_kings
+            for red_men in masks(rm, black | RED_KING_ROW):
+                for red_kings in masks(rk, black | red_men):
+                    yield black, red_men | red_kings, black_kings | red_kings
+
+def solve_slice(material_slice, tables):
+    """
+    Returns the bytes of a slice, given the bytes of all the slices its moves can lead to
+    (tables maps slice -> bytes).
+
+    Retrograde analysis: every position's moves are generated once, which gives its
+    value bounds from the moves leaving the slice, and a graph of the moves within it.
+    Results are then settled in increasing order of distance, walking that graph backwards:
+    a position is a win in d + 1 if some move leads to a loss in d, and a loss in d + 1
+    if all its moves lead to wins, the longest of which takes d plies.
+    Positions never settled this way can be played forever: they are draws.
+    """
+    values = bytearray(slice_size(material_slice))
+    positions = []
+    parents = {}            # in-slice position -> the positions with a move to it (once per move)
+    num_unsettled = {}      # position -> number of its in-slice moves not yet settled
+    longest_win = {}        # position -> longest distance among its moves settled as wins for the opponent
+    can_lose = {}           # position -> False if some move leaving the slice does not lose
+    pending = {}            # distance -> [(position, result)] candidates to settle at that distance
+
+    for black, red, kings in slice_positions(material_slice):
+        for player in (BLACK, RED):
+            index = position_index(material_slice, black, red, kings, player)
+            positions.append(index)
+            state = CheckersGameState(black, red, kings, None, 0, None, player, zobrist_hash = 0)
+            actions = state.get_all_actions()
+            if not actions:
+                pending.setdefault(0, []).append((index, LOSS))
+                continue
+
+            num_unsettled[index] = 0
+            longest_win[index] = -1
+            can_lose[index] = True
+            shortest_win = None
+            for action in actions:
+                undo = state.make_move(action)
+                child_black, child_red, child_kings, child_player = state.get_all_features()
+                state.unmake_move(undo)
+                child_slice = material(child_black, child_red, child_kings)
+                if child_slice == material_slice:
+                    child_index = position_index(material_slice, child_black, child_red, child_kings, child_player)
+                    parents.setdefault(child_index, []).append(index)
+                    num_unsettled[index] += 1
+                    continue
+                if (child_red if child_player == RED else child_black) == 0:
+                    child_result, distance = LOSS, 0
+                else:
+                    child_index = position_index(child_slice, child_black, child_red, child_kings, child_player)
+                    child_result, distance = decode(tables[child_slice][child_index])
+                if child_result == LOSS:
+                    can_lose[index] = False
+                    if shortest_win is None or distance < shortest_win:
+                        shortest_win = distance
+                elif child_result == WIN:
+                    longest_win[index] = max(longest_win[index], distance)
+                else:
+                    can_lose[index] = False
+
+            if shortest_win is not None:
+                pending.setdefault(shortest_win + 1, []).append((index, WIN))
+            elif num_unsettled[index] == 0 and can_lose[index]:
+                pending.setdefault(longest_win[index] + 1, []).append((index, LOSS))
+
+    distance = 0
+    while pending:
+        for index, result in pending.pop(distance, ()):
+            if values[index] != NOT_A_POSITION:
+                continue
+            values[index] = encode(result, distance)
+            for parent in parents.get(index, ()):
+                if values[parent] != NOT_A_POSITION:
+                    continue
+                if result == LOSS:
+                    pending.setdefault(distance + 1, []).append((parent, WIN))
+                else:
+                    num_unsettled[parent] -= 1
+                    longest_win[parent] = max(longest_win[parent], distance)
+                    if num_unsettled[parent] == 0 and can_lose[parent]:
+                        pending.setdefault(longest_win[parent] + 1, []).append((parent, LOSS))
+        distance += 1
+
+    for index in positions:
+        if values[index] == NOT_A_POSITION:
+            values[index] = DRAW
+    return values
+
+def build_tablebase(filename, max_pieces = 3, verbose = False):
+    """ Solves every slice with up to max_pieces pieces and writes the tablebase file. """
+    tables = {}
+    for material_slice in build_order(max_pieces):
+        start_time = time()
+        tables[material_slice] = solve_slice(material_slice, tables)
+        if verbose:
+            print("Slice {}: {} bytes in {:.1f} seconds".format(material_slice, len(tables[material_slice]), time() - start_time))
+
+    offset = struct.calcsize(HEADER_FORMAT) + len(tables) * struct.calcsize(SLICE_FORMAT)
+    with open(filename, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(tables)))
+        for material_slice in tables:
+            f.write(struct.pack(SLICE_FORMAT, *material_slice, offset))
+            offset += len(tables[material_slice])
+        for material_slice in tables:
+            f.write(tables[material_slice])
+
+class CheckersTablebase:
+
+    def __init__(self, filename):
+        """ Opens a tablebase file written by build_tablebase, memory-mapped (read only). """
+        self.filename = filename
+        self.file = open(filename, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, num_slices = struct.unpack_from(HEADER_FORMAT, self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not a checkers tablebase (version {})".format(filename, VERSION))
+        self.offsets = {}
+        position = struct.calcsize(HEADER_FORMAT)
+        for _ in range(num_slices):
+            bm, bk, rm, rk, offset = struct.unpack_from(SLICE_FORMAT, self.data, position)
+            self.offsets[(bm, bk, rm, rk)] = offset
+            position += struct.calcsize(SLICE_FORMAT)
+        self.max_pieces = max((sum(material_slice) for material_slice in self.offsets), default = 0)
+        self.num_probes = 0
+        self.num_hits = 0
+
+    def probe(self, state):
+        """
+        Returns the (result, distance) of a CheckersGameState for its player to move
+        (result is WIN, LOSS or DRAW; distance is in plies), or None if it is not in the tablebase.
+        """
+        self.num_probes += 1
+        if bin(state.black | state.red).count('1') > self.max_pieces:
+            return None
+        material_slice = material(state.black, state.red, state.kings)
+        offset = self.offsets.get(material_slice)
+        if offset is None:
+            return None
+        index = position_index(material_slice, state.black, state.red, state.kings, state.current_player)
+        result = decode(self.data[offset + index])
+        if result is not None:
+            self.num_hits += 1
+        return result
+
+    def probe_utility(self, state, maximizer_player, util_fn = faster_endgame_utility):
+        """
+        The tablebase probe hook of the search algorithms: returns the exact value of state
+        for maximizer_player, or None if it is not in the tablebase.
+        A win or loss is worth what util_fn (the search's endgame utility function; bind it
+        with functools.partial) gives the state that ends the game with best play, at path
+        length state.get_path_length() + distance. A draw is worth 0.
+        """
+        entry = self.probe(state)
+        if entry is None:
+            return None
+        result, distance = entry
+        if result == DRAW:
+            return 0
+        loser = state.get_current_player() if result == LOSS else state.get_current_player() % 2 + 1
+        # The player to move without a piece has lost: enough for util_fn, which only asks for the winner and path length
+        end_state = CheckersGameState(0, 0, 0, None, state.get_path_length() + distance, None, loser, zobrist_hash = 0)
+        return util_fn(end_state, maximizer_player)
+
+    def __getstate__(self):
+        """ Pickles as the file name only (e.g. for the worker processes of a parallel search). """
+        return self.filename
+
+    def __setstate__(self, filename):
+        self.__init__(filename)
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print("Usage:    python checkers_tablebase.py OUTPUT_FILE [MAX_PIECES]")
+        quit()
+    max_pieces = int(argv[2]) if len(argv) > 2 else 3
+    start_time = time()
+    build_tablebase(argv[1], max_pieces, verbose = True)
+    print("Built tablebase for up to {} pieces in {:.1f} seconds".format(max_pieces, time() - start_time))
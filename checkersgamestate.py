@@ -1,234 +1,493 @@
 from gamestatenode import GameStateNode
-from copy import deepcopy
-is_king = False
+from random import Random
+
+"""
+Bitboard layout:
+Only the 32 dark squares of the 8x8 board are playable. Square number s (0-31)
+is bit s of a 32-bit integer mask, counted left to right, top to bottom:
+
+    row 0:  .  0  .  1  .  2  .  3
+    row 1:  4  .  5  .  6  .  7  .
+    row 2:  .  8  .  9  . 10  . 11
+    ...
+    row 7: 28  . 29  . 30  . 31  .
+
+Black ('x', player 1) starts on rows 0-2 and moves "down" (towards row 7).
+Red ('o', player 2) starts on rows 5-7 and moves "up" (towards row 0).
+Kings ('X', 'O') move in all four diagonal directions.
+
+A diagonal step is a shift by 3, 4 or 5 bits depending on the parity of the row,
+so each direction is a pair of masked shifts (see the _step functions below).
+"""
+
+NUM_SQUARES = 32
+FULL_BOARD = 0xFFFFFFFF
+EVEN_ROWS = 0x0F0F0F0F              # rows 0, 2, 4, 6
+ODD_ROWS = 0xF0F0F0F0               # rows 1, 3, 5, 7
+EVEN_ROWS_NOT_RIGHT = 0x07070707    # even rows, without the square on column 7
+ODD_ROWS_NOT_LEFT = 0xE0E0E0E0      # odd rows, without the square on column 0
+BLACK_KING_ROW = 0xF0000000         # row 7: black men are crowned here
+RED_KING_ROW = 0x0000000F           # row 0: red men are crowned here
+
+BLACK = 1
+RED = 2
+
+# (row, col) of each square, and the inverse mapping.
+SQUARE_TO_POS = tuple((s // 4, 2 * (s % 4) + (1 - (s // 4) % 2)) for s in range(NUM_SQUARES))
+POS_TO_SQUARE = {pos: s for s, pos in enumerate(SQUARE_TO_POS)}
+
+
+def _step_down_left(b):
+    return (((b & EVEN_ROWS) << 4) | ((b & ODD_ROWS_NOT_LEFT) << 3)) & FULL_BOARD
+
+def _step_down_right(b):
+    return (((b & EVEN_ROWS_NOT_RIGHT) << 5) | ((b & ODD_ROWS) << 4)) & FULL_BOARD
+
+def _step_up_left(b):
+    return ((b & EVEN_ROWS) >> 4) | ((b & ODD_ROWS_NOT_LEFT) >> 5)
+
+def _step_up_right(b):
+    return ((b & EVEN_ROWS_NOT_RIGHT) >> 3) | ((b & ODD_ROWS) >> 4)
+
+# Each direction paired with the step in the opposite direction,
+# which is used to walk back from a target square to the moving piece.
+DOWN_DIRECTIONS = ((_step_down_left, _step_up_right), (_step_down_right, _step_up_left))
+UP_DIRECTIONS = ((_step_up_left, _step_down_right), (_step_up_right, _step_down_left))
+
+
+# Zobrist keys: one random 64-bit key per (piece kind, square), plus one for red to move.
+# Seeded so that hashes are stable between runs (e.g. for on-disk tables keyed by them).
+BLACK_MAN, BLACK_KING, RED_MAN, RED_KING = range(4)
+_zobrist_rng = Random(0x5EED)
+ZOBRIST_PIECES = tuple(tuple(_zobrist_rng.getrandbits(64) for s in range(NUM_SQUARES)) for kind in range(4))
+ZOBRIST_RED_TO_MOVE = _zobrist_rng.getrandbits(64)
+
+
+def compute_zobrist_hash(black, red, kings, current_player):
+    """ Computes the Zobrist hash of a position from scratch. """
+    h = ZOBRIST_RED_TO_MOVE if current_player == RED else 0
+    for s in _squares(black & ~kings):
+        h ^= ZOBRIST_PIECES[BLACK_MAN][s]
+    for s in _squares(black & kings):
+        h ^= ZOBRIST_PIECES[BLACK_KING][s]
+    for s in _squares(red & ~kings):
+        h ^= ZOBRIST_PIECES[RED_MAN][s]
+    for s in _squares(red & kings):
+        h ^= ZOBRIST_PIECES[RED_KING][s]
+    return h
+
+
+def _squares(b):
+    """ Yields the square numbers of the set bits of mask b, lowest first. """
+    while b:
+        low = b & -b
+        yield low.bit_length() - 1
+        b ^= low
+
+
+"""
+Move tables, indexed by square number, computed once from the step functions:
+    STEPS_*[s]: the squares one diagonal step away from s
+    JUMPS_*[s]: the (captured square, landing square) pairs of the jumps from s
+for men moving down (black), men moving up (red) and kings (both ways).
+STEP_TABLES[player] and JUMP_TABLES[player] are (men table, kings table) pairs.
+CAPTURED_SQUARE[from][to] is the square jumped over by a jump from -> to, or -1.
+"""
+def _step_targets(directions, s):
+    return tuple(step(1 << s).bit_length() - 1 for step, back in directions if step(1 << s))
+
+def _jump_pairs(directions, s):
+    return tuple((step(1 << s).bit_length() - 1, step(step(1 << s)).bit_length() - 1)
+                 for step, back in directions if step(step(1 << s)))
+
+STEPS_DOWN = tuple(_step_targets(DOWN_DIRECTIONS, s) for s in range(NUM_SQUARES))
+STEPS_UP = tuple(_step_targets(UP_DIRECTIONS, s) for s in range(NUM_SQUARES))
+STEPS_KING = tuple(STEPS_DOWN[s] + STEPS_UP[s] for s in range(NUM_SQUARES))
+JUMPS_DOWN = tuple(_jump_pairs(DOWN_DIRECTIONS, s) for s in range(NUM_SQUARES))
+JUMPS_UP = tuple(_jump_pairs(UP_DIRECTIONS, s) for s in range(NUM_SQUARES))
+JUMPS_KING = tuple(JUMPS_DOWN[s] + JUMPS_UP[s] for s in range(NUM_SQUARES))
+
+STEP_TABLES = {BLACK: (STEPS_DOWN, STEPS_KING), RED: (STEPS_UP, STEPS_KING)}
+JUMP_TABLES = {BLACK: (JUMPS_DOWN, JUMPS_KING), RED: (JUMPS_UP, JUMPS_KING)}
+
+CAPTURED_SQUARE = [[-1] * NUM_SQUARES for s in range(NUM_SQUARES)]
+for _s in range(NUM_SQUARES):
+    for _captured, _landing in JUMPS_KING[_s]:
+        CAPTURED_SQUARE[_s][_landing] = _captured
+
+"""
+Scratch space reused by every capture search, so that no lists are allocated per node.
+_capture_path[i] is the square reached after i jumps on the sequence being explored;
+a piece can capture at most 12 opponent pieces, hence 13 squares.
+_capture_stack holds the (square, captured mask, number of jumps) of the squares
+still to explore, and is always left empty.
+"""
+_capture_path = [0] * 13
+_capture_stack = []
 
 
 class CheckersGameState(GameStateNode):
-    # A class-level variable (static) representing all the directions
-    # the position can move.
-    # "RF": right forward; "LF": left forward; "RB": right bottom; "LB": left bottom
-    if (is_king):
-        NEIGHBORING_STEPS = {(1, 1): "RF", (-1, 1):"LF", (1, -1): "RB", (-1, -1): "LB"}
-    else:
-        NEIGHBORING_STEPS = {(1, 1): "RF", (-1, 1):"LF"}
-
 
+    supports_make_move = True
+    has_zobrist_hash = True
     num_rows = 8
     board_str = {'-': "BOARD", 'x': "BLACK", 'o': "WHITE", 'X': "KBLACK", 'O': "KWHITE"}
-    positions_black = []
-    positions_red = []
-    # A class-level variable (static) representing the cost to move onto
-    # different types of terrain.
-
-    #PATH_COSTS = {FLOOR: 1, CARPET: 2, WALL: 0, GOAL: 1}
 
-    """
-    A 'static' method that reads mazes from text files and returns
-    a RoombaRouteState which is an initial state.
-    """
+    @staticmethod
     def readFromFile(filename):
+        """
+        Reads a board from a text file and returns an initial CheckersGameState.
+        The first line is the number of the player to move first,
+        followed by 8 rows of 8 characters from board_str.
+        Pieces may only be placed on the dark squares (row + col odd).
+        """
         with open(filename, 'r') as file:
-            grid = []
-            # max_r, max_c = [int(x) for x in file.readline().split()]
-            # init_r, init_c = [int(x) for x in file.readline().split()]
             first_player = int(file.readline())
-            for i in range(CheckersGameState.num_rows):
-                row = list(file.readline().strip()) # or file.readline().split()
+            black = red = kings = 0
+            for r in range(CheckersGameState.num_rows):
+                row = file.readline().strip()
                 assert (len(row) == CheckersGameState.num_rows)
-                grid.append(tuple(row)) # list -> tuple makes it immutable, needed for hashing
-
-                for j in range(CheckersGameState.num_rows):
-                    if row[j] == 'x' or row[j] == 'X':
-                        CheckersGameState.positions_black.append([i, j])
-                    elif row[j] == 'o' or row[j] == 'O':
-                        CheckersGameState.positions_red.append([i, j])
-
-            grid = tuple(grid) # grid is a tuple of tuples - a 2d grid!
-            return CheckersGameState(CheckersGameState.positions_black, CheckersGameState.positions_red,
-                                grid = grid,
-                                last_action = None,
+                for c, ch in enumerate(row):
+                    if ch == '-':
+                        continue
+                    assert ch in CheckersGameState.board_str and (r, c) in POS_TO_SQUARE
+                    bit = 1 << POS_TO_SQUARE[(r, c)]
+                    if ch in 'xX':
+                        black |= bit
+                    else:
+                        red |= bit
+                    if ch.isupper():
+                        kings |= bit
+
+        return CheckersGameState(black = black,
+                                red = red,
+                                kings = kings,
                                 parent = None,
                                 path_length = 0,
+                                previous_action = None,
                                 current_player = first_player)
 
-    """
-    Creates a CheckeState node.
-    Takes:
-    position: 2-tuple of current coordinates
-    grid: 2-d grid representing features of the maze.
-    last_action: string describing the last action taken
-
-    parent: the preceding StateNode along the path taken to reach the state
-            (the initial state's parent should be None)
-    path_cost (optional), the cost of the entire path to reach the state
-    """
-    def __init__(self, positions_black, positions_red, grid, last_action, parent, path_length, current_player) :
-
-        super().__init__(parent, path_length)
-        self.positions_black = positions_black
-        self.positions_red = positions_red
-        self.grid = grid
-        self.last_action = last_action
-        self.current_player = current_player
-
-
-
-    """
-    Returns a full feature representation of the environment's current state.
-    This should be an immutable type - only primitives, strings, and tuples.
-    (no lists or objects).
-    If two StateNode objects represent the same state,
-    get_features() should return the same for both objects.
-    Note, however, that two states with identical features
-    may have different paths.
-    """
-    # Override
-    def get_all_features(self) :
-        return (self.get_position(), self.get_grid())
+    @staticmethod
+    def defaultInitialState():
+        """
+        The standard starting position: 12 black men on rows 0-2,
+        12 red men on rows 5-7, black to move.
+        """
+        return CheckersGameState(black = 0x00000FFF,
+                                red = 0xFFF00000,
+                                kings = 0,
+                                parent = None,
+                                path_length = 0,
+                                previous_action = None,
+                                current_player = BLACK)
+
+    @staticmethod
+    def str_to_action(str):
+        """
+        Actions use standard checkers notation with squares numbered 1-32:
+        "11-15" for a step, "15x22" for a jump.
+        Internally, an action is a tuple of 0-based square numbers.
+        """
+        return tuple(int(s) - 1 for s in str.replace('x', '-').split('-'))
+
+    @staticmethod
+    def action_to_str(action):
+        sep = 'x' if CheckersGameState.is_jump(action) else '-'
+        return sep.join(str(s + 1) for s in action)
+
+    @staticmethod
+    def action_to_pretty_str(action):
+        verb = "Jump" if CheckersGameState.is_jump(action) else "Move"
+        return "{} from {} to {}".format(verb,
+            SQUARE_TO_POS[action[0]],
+            " to ".join(str(SQUARE_TO_POS[s]) for s in action[1:]))
+
+    @staticmethod
+    def is_jump(action):
+        """ Returns whether the action is a capture. """
+        return CAPTURED_SQUARE[action[0]][action[1]] >= 0
+
+    def __init__(self, black, red, kings, parent, path_length, previous_action, current_player, zobrist_hash = None):
+        """
+        Creates a CheckersGameState node.
+        Takes:
+        black: 32-bit mask of the squares holding black pieces (men and kings)
+        red: 32-bit mask of the squares holding red pieces (men and kings)
+        kings: 32-bit mask of the squares holding kings of either color
+
+        parent, path_length, previous_action, current_player: see GameStateNode
+        zobrist_hash: the hash of this position, computed from scratch if None.
+            generate_next_state passes the parent's hash updated incrementally.
+        """
+        if zobrist_hash is None:
+            zobrist_hash = compute_zobrist_hash(black, red, kings, current_player)
+        super().__init__(parent, path_length, previous_action, current_player, zobrist_hash)
+        self.black = black
+        self.red = red
+        self.kings = kings
 
-    """
-    Returns True if a goal state.
-    """
-    # Override
-    def is_goal_state(self) :
-        if (self.positions_black.length() == 0 or self.positions_red.length() == 0):
-            return True
-
-    """
-    Return a string representation of the State
-    This gets called when str() is used on an Object.
-    """
     # Override
     def __str__(self):
-        s = "\n".join(["".join(row) for row in self.grid])
-        pos = self.my_r * (self.get_width()+1) + self.my_c
-        return s[:pos] + 'X' + s[pos+1:] + "\n"
-
-
-    """
-    Returns a string describing the action taken from the parent StateNode
-    that results in transitioning to this StateNode
-    along the path taken to reach this state.
-    (None if the initial state)
-    
-    """
-    # Override
-    def describe_previous_action(self):
-        return self.last_action
-
-    def generate_all_actions(self):
-        # returns a list of all possible moves
-        actions = []
+        return "\n".join("".join(row) for row in self.get_grid()) + "\n"
 
-        if self.get_current_player() == 1:
-            for black in self.positions_black:
-                actions.append(self.single_next_black_state(black))
+    # Override
+    def get_all_features(self):
+        return (self.black, self.red, self.kings, self.current_player)
 
+    # Override
+    def endgame_winner(self):
+        """ The player to move with no legal action loses. """
+        if self.is_endgame_state():
+            return self.current_player % 2 + 1
+        return None
+
+    def _own_and_opponent(self):
+        if self.current_player == BLACK:
+            return self.black, self.red
+        return self.red, self.black
+
+    def _directions(self):
+        """
+        Returns (direction, back_direction, pieces) triples: for each direction,
+        the pieces of the current player that are allowed to move that way.
+        """
+        own, _ = self._own_and_opponent()
+        if self.current_player == BLACK:
+            forward, backward = DOWN_DIRECTIONS, UP_DIRECTIONS
         else:
-            for red in self.positions_red:
-                actions.append(self.single_next_red_state(red))
-
-        return actions
-
-
-    def single_next_black_states(self, cur_piece_pos):
-        """ returns a list of possible moves for a single black piece"""
-        neighboring_states = [(1, -1), (-1,-1)]
-        return self.generate_next_actions_for_singlePiece(cur_piece_pos, neighboring_states)
-
-    def single_next_red_states(self, cur_piece_pos):
-        """ returns a list of possible moves for a single black piece"""
-        neighboring_states = [(1, 1), (-1, 1)]
-        return self.generate_next_actions_for_singlePiece(cur_piece_pos, neighboring_states)
-
-    def generate_next_actions_for_singlePiece(self, cur_piece_pos, possible_pos):
-        BLACK = 1
-        RED = 0
-        for move_pos in possible_pos:
-            # regular moving
-            next_state_x = cur_piece_pos[0] + move_pos[0]
-            next_state_y = cur_piece_pos[1] + move_pos[1]
-
-            # stops if the move would place the piece out of bounds
-            if (next_state_x >= self.get_dimension() or next_state_y >= self.get_dimension()):
-                continue
+            forward, backward = UP_DIRECTIONS, DOWN_DIRECTIONS
+        own_kings = own & self.kings
+        return ([(step, back, own) for step, back in forward] +
+                [(step, back, own_kings) for step, back in backward if own_kings])
+
+    def _has_capture(self):
+        """ Checks with masks only whether the current player has at least one jump. """
+        _, opponent = self._own_and_opponent()
+        empty = ~(self.black | self.red) & FULL_BOARD
+        for step, back, pieces in self._directions():
+            if step(step(pieces) & opponent) & empty:
+                return True
+        return False
+
+    def _movable_pieces(self):
+        """
+        Returns, with masks only, the masks of the current player's pieces that
+        have a first jump and of those that have a step: (jumpers, steppers).
+        Walking back from the targets of each direction finds the pieces they came from.
+        """
+        _, opponent = self._own_and_opponent()
+        empty = ~(self.black | self.red) & FULL_BOARD
+        jumpers = steppers = 0
+        for step, back, pieces in self._directions():
+            targets = step(pieces)
+            steppers |= back(targets & empty)
+            jumpers |= back(back(step(targets & opponent) & empty))
+        return jumpers, steppers
 
-            next_state_pos = (next_state_x, next_state_y)
-
-            # booleans for whether or not there is a piece in the way of moving
-            target_is_black = next_state_pos in self.get_position_black()
-            target_is_red = next_state_pos in self.get_position_red()
-
-            # if the move is complete and there is nothing in the way
-            if (not target_is_black or not target_is_red):
-                return next_state_pos
-
-            # there is a piece in the target area, so we can possibly jump
-            else:
-                # if the piece in the way is the same color as the current player, then don't jump"""
-                if ((self.get_current_player() == BLACK and target_is_black) or (self.get_current_player() == RED and target_is_red)):
-                    continue
-
-                else:
-                    # jump
-                    jump_x = next_state_x[0] + move_pos[0]
-                    jump_y = next_state_y[1] + move_pos[1]
+    # Override
+    def has_any_action(self):
+        """ Checks each direction with masks only, without listing the actions. """
+        if self.cached_actions is not None:
+            return len(self.cached_actions) > 0
+        _, opponent = self._own_and_opponent()
+        empty = ~(self.black | self.red) & FULL_BOARD
+        for step, back, pieces in self._directions():
+            targets = step(pieces)
+            if targets & empty or step(targets & opponent) & empty:
+                return True
+        return False
 
-                    # stops if the next move is going to be out of bounds
-                    if (jump_x < 0 or jump_x > self.get_dimension() or jump_y < 0 or jump_y < 0 or jump_y > self.get_dimension()):
-                        continue
+    # Override
+    def get_all_actions(self, custom_move_ordering = False):
+        """
+        Generates the legal actions of the current player. Captures are mandatory:
+        if any piece can jump, only the capture sequences are returned.
+        Otherwise, every step of every piece, looked up in the precomputed move tables.
+        Only the pieces that masks show to have a jump (or a step) are looked up.
+
+        With custom_move_ordering, the longest capture sequences are listed first.
+        """
+        jumpers, steppers = self._movable_pieces()
+        if jumpers:
+            captures = []
+            for square in _squares(jumpers):
+                self._add_piece_captures(square, captures)
+            if custom_move_ordering:
+                captures.sort(key = len, reverse = True)
+            return captures
+        steps = []
+        for square in _squares(steppers):
+            self._add_piece_steps(square, steps)
+        return steps
 
-                    jump_pos = (jump_x, jump_y)
-                    jump_is_black = jump_pos in self.get_position_black()
-                    jump_is_red = jump_pos in self.get_position_red()
+    # Override
+    def get_capture_actions(self):
+        """
+        Returns every complete capture sequence of the current player,
+        each as one compound action (from, landing 1, landing 2, ...).
+        Only the pieces that masks show to have a first jump are searched.
+        """
+        captures = []
+        jumpers, _ = self._movable_pieces()
+        for square in _squares(jumpers):
+            self._add_piece_captures(square, captures)
+        return captures
+
+    def generate_next_actions_for_singlePiece(self, square):
+        """
+        Returns a list of the legal actions of the current player's piece on the given square:
+        its capture sequences if the player has any capture, its steps otherwise.
+        """
+        actions = []
+        if self._has_capture():
+            self._add_piece_captures(square, actions)
+        else:
+            self._add_piece_steps(square, actions)
+        return actions
 
-                    if (not jump_is_black or not jump_is_red):
-                        return jump_pos
+    def _add_piece_steps(self, square, steps):
+        """ Appends the steps of the piece on square to the given list. """
+        empty = ~(self.black | self.red) & FULL_BOARD
+        is_king = self.kings >> square & 1
+        for target in STEP_TABLES[self.current_player][is_king][square]:
+            if empty >> target & 1:
+                steps.append((square, target))
+
+    def _add_piece_captures(self, square, captures):
+        """
+        Appends the maximal capture sequences of the piece on square to the given list,
+        with an iterative depth-first search over the jump tables.
+
+        Captured pieces stay on the board until the move is complete, so they can be
+        neither jumped twice nor landed on. The moving piece's own square is empty.
+        A man that reaches the king row stops there: men have no jumps from their king row.
+
+        Sequences with the same landing square and captured pieces lead to the same position
+        (e.g. a king's capture loop, taken clockwise or counter-clockwise): only the first is kept.
+        """
+        _, opponent = self._own_and_opponent()
+        empty = ~(self.black | self.red) & FULL_BOARD | 1 << square
+        jumps = JUMP_TABLES[self.current_player][self.kings >> square & 1]
+        path = _capture_path
+        stack = _capture_stack
+        results = set()
+        stack.append((square, 0, 0))
+        while stack:
+            at, captured, num_jumps = stack.pop()
+            # Everything pushed after this entry has been popped,
+            # so path[:num_jumps] still holds the sequence leading here
+            path[num_jumps] = at
+            extended = False
+            for over, landing in reversed(jumps[at]):
+                if opponent >> over & 1 and not captured >> over & 1 and empty >> landing & 1:
+                    stack.append((landing, captured | 1 << over, num_jumps + 1))
+                    extended = True
+            if not extended and num_jumps and (at, captured) not in results:
+                results.add((at, captured))
+                captures.append(tuple(path[:num_jumps + 1]))
 
+    # Override
     def generate_next_state(self, action):
-        BLACK = 1
-        RED = 0
-
-        # in this case, action would be the position of where the piece would jump
-        newboard = deepcopy(self.grid)
-        action_x = action[0]
-        action_y = action[1]
-
-        newboard[action_x][action_y] = self.current_player
+        black, red, kings, h = self._apply_action(action)
+        return CheckersGameState(black = black,
+                                red = red,
+                                kings = kings,
+                                parent = self,
+                                path_length = self.path_length + 1,
+                                previous_action = action,
+                                current_player = self.current_player % 2 + 1,
+                                zobrist_hash = h)
 
-        # if it is the black
-        if self.current_player == 1:
-            self.positions_black.append(action)
+    # Override
+    def make_move(self, action):
+        undo = (self.black, self.red, self.kings, self.zobrist_hash, self.previous_action, self.cached_actions)
+        self.black, self.red, self.kings, self.zobrist_hash = self._apply_action(action)
+        self.cached_actions = None
+        self.path_length += 1
+        self.previous_action = action
+        self.current_player = self.current_player % 2 + 1
+        return undo
 
+    # Override
+    def unmake_move(self, undo):
+        self.black, self.red, self.kings, self.zobrist_hash, self.previous_action, self.cached_actions = undo
+        self.path_length -= 1
+        self.current_player = self.current_player % 2 + 1
+
+    def _apply_action(self, action):
+        """
+        Returns the (black, red, kings, zobrist_hash) resulting from the action.
+        The Zobrist hash is updated incrementally: only the moved piece,
+        the captured pieces and the side to move change.
+        """
+        from_sq, to_sq = action[0], action[-1]
+        from_bit = 1 << from_sq
+        to_bit = 1 << to_sq
+        black, red, kings = self.black, self.red, self.kings
+        h = self.zobrist_hash ^ ZOBRIST_RED_TO_MOVE
+
+        for i in range(len(action) - 1):
+            captured_sq = CAPTURED_SQUARE[action[i]][action[i + 1]]
+            if captured_sq < 0:
+                break
+            captured_bit = 1 << captured_sq
+            if self.current_player == BLACK:
+                h ^= ZOBRIST_PIECES[RED_KING if kings & captured_bit else RED_MAN][captured_sq]
+            else:
+                h ^= ZOBRIST_PIECES[BLACK_KING if kings & captured_bit else BLACK_MAN][captured_sq]
+            captured = ~captured_bit & FULL_BOARD
+            black &= captured
+            red &= captured
+            kings &= captured
+
+        # Cleared, then set: a king's capture loop can end on its starting square
+        if self.current_player == BLACK:
+            black = black & ~from_bit | to_bit
+            king_row = BLACK_KING_ROW
+            man, king = BLACK_MAN, BLACK_KING
         else:
-            self.positions_red.append(action)
+            red = red & ~from_bit | to_bit
+            king_row = RED_KING_ROW
+            man, king = RED_MAN, RED_KING
+
+        if kings & from_bit:
+            kings = kings & ~from_bit | to_bit
+            if from_sq != to_sq:
+                h ^= ZOBRIST_PIECES[king][from_sq] ^ ZOBRIST_PIECES[king][to_sq]
+        elif to_bit & king_row:
+            kings |= to_bit
+            h ^= ZOBRIST_PIECES[man][from_sq] ^ ZOBRIST_PIECES[king][to_sq]
+        else:
+            h ^= ZOBRIST_PIECES[man][from_sq] ^ ZOBRIST_PIECES[man][to_sq]
 
-        return CheckersGameState(positions_black = self.positions_black,
-                         positions_red = self.positions_red,
-                         grid = newboard,
-                         last_action = action,
-                         parent = self,
-                         path_length = self.path_length + 1,
-                         current_player =  self.current_player % 2 + 1)
+        return black, red, kings, h
 
 
     """ Additional accessor methods used the GUI """
 
-    """
-    Returns a 2d tuple grid of the maze.
-    """
+    def describe_previous_action(self):
+        return self.previous_action
 
     def get_dimension(self):
         return 8
 
-    def get_grid(self) :
-        return self.grid
+    def get_grid(self):
+        """
+        Returns a 2d tuple grid of characters from board_str.
+        Built from the bitboards on demand; not used by the search.
+        """
+        grid = [['-'] * self.num_rows for _ in range(self.num_rows)]
+        for s in _squares(self.black | self.red):
+            r, c = SQUARE_TO_POS[s]
+            ch = 'x' if self.black >> s & 1 else 'o'
+            grid[r][c] = ch.upper() if self.kings >> s & 1 else ch
+        return tuple(tuple(row) for row in grid)
 
     def get_position_black(self):
-        return self.positions_black
+        return [SQUARE_TO_POS[s] for s in _squares(self.black)]
 
     def get_position_red(self):
-        return self.positions_red
+        return [SQUARE_TO_POS[s] for s in _squares(self.red)]
 
     def get_current_player(self):
         return self.current_player
@@ -1,14 +1,36 @@
-from lab2_algorithms import *
+from algorithms import *
 from time import time
 from math import sqrt
-from lab2_util_eval import all_fn_dicts, always_zero
+from multiprocessing import Pool, cpu_count
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from util_eval import all_fn_dicts, always_zero
+from transposition_table import TranspositionTable
+from opening_book import OpeningBook
+from checkers_tablebase import CheckersTablebase
+from search_stats import SearchStats
+from profiler import SamplingProfiler
 from connectfour_gamestate import ConnectFourGameState
 from tictactoe_gamestate import TicTacToeGameState
 from roomba_gamestate import RoombaRaceGameState
 from nim_gamestate import NimGameState
+from checkersgamestate import CheckersGameState
 
 INF = float('inf')
 
+def set_up_tablebase(agent, kwargs):
+    """
+    Sets agent.tablebase (asking for the file, for checkers only) and agent.tablebase_probe,
+    the search algorithms' tablebase probe hook on the scale of agent.util_fn (None without a tablebase).
+    The tablebase is opened once for the whole game.
+    """
+    if 'tablebase' not in kwargs:
+        filename = input("Endgame tablebase file (leave blank for none): >>> ") if agent.game_class is CheckersGameState else ""
+        agent.tablebase = filename if filename != "" else None
+    if isinstance(agent.tablebase, str):
+        agent.tablebase = CheckersTablebase(agent.tablebase)
+    agent.tablebase_probe = partial(agent.tablebase.probe_utility, util_fn = agent.util_fn) if agent.tablebase is not None else None
+
 QUIT = ['q', 'Q', 'quit', 'Quit', 'QUIT']
 YES = ['y', 'yes', 'Y', 'Yes', 'YES']
 NO = ['n', 'no', 'N', 'No', 'NO']
@@ -103,7 +125,7 @@ class HumanTextInputAgent(GamePlayingAgent) :
         Should prompt user (via command prompt)
         """
         for kw in kwargs:
-            self.kw = kwargs[kw]
+            setattr(self, kw, kwargs[kw])
 
         if 'name' not in kwargs:
             new_name= input("Name: >>> ")
@@ -160,7 +182,7 @@ class ClassicSearchAgent(GamePlayingAgent) :
         Should prompt user (via commnand prompt)
         """
         for kw in kwargs:
-            self.kw = kwargs[kw]
+            setattr(self, kw, kwargs[kw])
 
         if 'name' not in kwargs:
             new_name= input("Name: >>> ")
@@ -185,13 +207,34 @@ class ClassicSearchAgent(GamePlayingAgent) :
                 self.random_move_order = ask_yes_no("Random move order? >>> ")
             if 'transposition_table' not in kwargs:
                 self.transposition_table = ask_yes_no("Use a transposition table? >>> ")
+            # Keep one table for the whole game, so later moves reuse earlier searches
+            if self.transposition_table is True:
+                self.transposition_table = TranspositionTable()
         else:
             self.random_move_order = False
             self.transposition_table = False
 
+        if self.search_alg != RandChoice and self.game_class.has_zobrist_hash:
+            if 'opening_book' not in kwargs:
+                filename = input("Opening book file (leave blank for none): >>> ")
+                self.opening_book = filename if filename != "" else None
+            # Open the book once for the whole game
+            if isinstance(self.opening_book, str):
+                self.opening_book = OpeningBook(self.opening_book)
+        else:
+            self.opening_book = None
+
         if 'verbose' not in kwargs:
             self.verbose = ask_yes_no("Be verbose? >>> ")
 
+        if 'stats_file' not in kwargs:
+            self.stats_file = input("File to append search stats to, as JSON (leave blank for none): >>> ") or None
+
+        if 'profile_every' not in kwargs:
+            self.profile_every = get_int("Profile the search: sample every Nth state callback (0 = off): >>> ")
+        if self.profile_every > 0 and 'profile_prefix' not in kwargs:
+            self.profile_prefix = input("Profile file prefix (writes PREFIX-MOVE.folded per move): >>> ") or "profile"
+
         if 'GUI' in kwargs and kwargs['GUI']:
             self.show_thinking = ask_yes_no("Show thinking? (slower) >>> ")
 
@@ -207,24 +250,52 @@ class ClassicSearchAgent(GamePlayingAgent) :
         if 'state_callback_fn' not in kwargs:
             kwargs['state_callback_fn'] = lambda s, v :False
         if 'counter' not in kwargs :
-            kwargs['counter'] = {'num_nodes_seen':0, 'num_endgame_evals':0, 'num_heuristic_evals':0}
+            kwargs['counter'] = SearchStats()
+
+        # Play from the opening book without searching, if it knows the state
+        if self.opening_book is not None:
+            book_entry = self.opening_book.lookup(state, self.util_fn)
+            if book_entry is not None:
+                action, exp_util = book_entry
+                if self.verbose:
+                    print("{} plays {} from its opening book (utility {:.4f})".format(
+                        self.name, self.game_class.action_to_str(action), exp_util))
+                return action, exp_util
+
+        util_fn, eval_fn, state_callback_fn = self.util_fn, self.eval_fn, kwargs['state_callback_fn']
+        profiler = SamplingProfiler(self.profile_every) if self.profile_every > 0 else None
+        if profiler is not None:
+            util_fn, eval_fn, state_callback_fn = profiler.start(state, util_fn, eval_fn, state_callback_fn)
 
         search_start_time = time()
-        action, leaf_node, exp_util, terminated = self.search_alg(
-            initial_state = state,
-            util_fn = self.util_fn,
-            eval_fn = self.eval_fn,
-            cutoff = self.cutoff,
-            state_callback_fn = kwargs['state_callback_fn'],
-            counter = kwargs['counter'],
-            random_move_order = self.random_move_order,
-            transposition_table = self.transposition_table
-            )
+        try:
+            action, leaf_node, exp_util, terminated = self.search_alg(
+                initial_state = state,
+                util_fn = util_fn,
+                eval_fn = eval_fn,
+                cutoff = self.cutoff,
+                state_callback_fn = state_callback_fn,
+                counter = kwargs['counter'],
+                random_move_order = self.random_move_order,
+                transposition_table = self.transposition_table
+                )
+        finally:
+            if profiler is not None:
+                profiler.stop()
         elapsed_time = time() - search_start_time
+        if profiler is not None:
+            profiler.write_collapsed("{}-{}.folded".format(self.profile_prefix, state.get_path_length()))
+        stats = kwargs['counter']
         if self.verbose:
             print("{} values this state at utility {:.4f}".format(self.name, exp_util))
-            print("{} nodes seen, {} endgame evals, {} heuristic evals ".format(kwargs['counter']['num_nodes_seen'], kwargs['counter']['num_endgame_evals'],kwargs['counter']['num_heuristic_evals']))
+            if isinstance(stats, SearchStats):
+                print(stats.summary(self.game_class.action_to_str))
+            else:
+                print("{} nodes seen, {} endgame evals, {} heuristic evals ".format(stats['num_nodes_seen'], stats['num_endgame_evals'], stats['num_heuristic_evals']))
             print("Total elapsed time: {:.4f}".format(elapsed_time))
+        if self.stats_file is not None and isinstance(stats, SearchStats):
+            stats.dump_json(self.stats_file, self.game_class.action_to_str,
+                            agent = self.name, path_length = state.get_path_length(), total_elapsed_time = elapsed_time)
         return action, exp_util
 
 
@@ -252,11 +323,66 @@ class ExpectimaxSearchAgent(ClassicSearchAgent) :
 
 class MinimaxAlphaBetaSearchAgent(ClassicSearchAgent) :
 
+    """ Whether to search all but the first action with a null window (PrincipalVariationSearch). """
+    null_window_search = False
+
     def __init__(self, game_class, name="Minimax w/ Alpha-Beta (Pessimistic Pruning) Player"):
         super().__init__(game_class, search_alg = MinimaxAlphaBetaSearch, name = name)
 
+    def set_up(self, **kwargs):
+        """
+        Same settings as ClassicSearchAgent, plus quiescence search, killer / history move ordering,
+        an endgame tablebase (checkers only) and the number of worker processes.
+        With more than 1 worker, the root moves are split between processes
+        (ParallelMinimaxAlphaBetaSearch), in one pool kept for the whole game.
+        """
+        super().set_up(**kwargs)
+
+        if 'quiescence' not in kwargs:
+            self.quiescence = self.cutoff != INF and ask_yes_no("Search captures past the cutoff (quiescence)? >>> ")
+
+        if 'custom_move_ordering' not in kwargs:
+            self.custom_move_ordering = ask_yes_no("Order moves by killer moves and history? >>> ")
+
+        set_up_tablebase(self, kwargs)
+
+        if 'workers' not in kwargs:
+            self.workers = get_int("Worker processes (1 = no parallelism, {} cores available): >>> ".format(cpu_count()))
+
+        if self.workers > 1:
+            self.executor = ProcessPoolExecutor(self.workers)
+            self.search_alg = partial(ParallelMinimaxAlphaBetaSearch, workers = self.workers, executor = self.executor,
+                                      quiescence = self.quiescence, custom_move_ordering = self.custom_move_ordering,
+                                      null_window_search = self.null_window_search, tablebase_probe = self.tablebase_probe)
+        else:
+            self.search_alg = partial(PrincipalVariationSearch if self.null_window_search else MinimaxAlphaBetaSearch,
+                                      quiescence = self.quiescence, custom_move_ordering = self.custom_move_ordering,
+                                      tablebase_probe = self.tablebase_probe)
+
+class PrincipalVariationSearchAgent(MinimaxAlphaBetaSearchAgent) :
+
+    null_window_search = True
+
+    def __init__(self, game_class, name="Principal Variation Search Player"):
+        super().__init__(game_class, name = name)
+        self.search_alg = PrincipalVariationSearch
+
+    def set_up(self, **kwargs):
+        """
+        Same settings as MinimaxAlphaBetaSearchAgent, except that moves are ordered by a
+        transposition table and by killer moves and history unless told otherwise:
+        without a good move ordering, PVS visits more nodes than plain alpha-beta.
+        """
+        kwargs.setdefault('transposition_table', True)
+        kwargs.setdefault('custom_move_ordering', True)
+        super().set_up(**kwargs)
+
 
 class ProgressiveDeepeningSearchAgent(GamePlayingAgent) :
+
+    """ Whether each search is an MTD(f) search (MTDfSearch) rather than a full-window alpha-beta search. """
+    mtdf = False
+
     def __init__(self, game_class, name="Progressive Deepening Player"):
         self.search_alg = ProgressiveDeepening
         super().__init__(game_class, name)
@@ -267,7 +393,7 @@ class ProgressiveDeepeningSearchAgent(GamePlayingAgent) :
         Should prompt user (via commnand prompt)
         """
         for kw in kwargs:
-            self.kw = kwargs[kw]
+            setattr(self, kw, kwargs[kw])
 
         if 'name' not in kwargs:
             new_name= input("Name: >>> ")
@@ -290,12 +416,34 @@ class ProgressiveDeepeningSearchAgent(GamePlayingAgent) :
 
         if 'transposition_table' not in kwargs:
             self.transposition_table = ask_yes_no("Use a transposition table? >>> ")
+        # Keep one table for the whole game, so later moves reuse earlier searches
+        if self.transposition_table is True:
+            self.transposition_table = TranspositionTable()
+
+        if 'quiescence' not in kwargs:
+            self.quiescence = ask_yes_no("Search captures past the cutoff (quiescence)? >>> ")
+
+        if 'custom_move_ordering' not in kwargs:
+            self.custom_move_ordering = ask_yes_no("Order moves by killer moves and history? >>> ")
+
+        if 'aspiration_window' not in kwargs:
+            self.aspiration_window = 0 if self.mtdf else get_float("Aspiration window half-width (0 = full window): >>> ")
+
+        set_up_tablebase(self, kwargs)
 
         if 'verbose' not in kwargs:
             self.verbose = ask_yes_no("Be verbose? >>> ")
             if self.verbose:
                 self.super_verbose = ask_yes_no("Be SUPER verbose? >>> ")
 
+        if 'stats_file' not in kwargs:
+            self.stats_file = input("File to append search stats to, as JSON (leave blank for none): >>> ") or None
+
+        if 'profile_every' not in kwargs:
+            self.profile_every = get_int("Profile the search: sample every Nth state callback (0 = off): >>> ")
+        if self.profile_every > 0 and 'profile_prefix' not in kwargs:
+            self.profile_prefix = input("Profile file prefix (writes PREFIX-MOVE.folded per move): >>> ") or "profile"
+
         if 'GUI' in kwargs and kwargs['GUI']:
             self.show_thinking = ask_yes_no("Show thinking? (slower) >>> ")
 
@@ -310,21 +458,36 @@ class ProgressiveDeepeningSearchAgent(GamePlayingAgent) :
         if 'state_callback_fn' not in kwargs:
             kwargs['state_callback_fn'] = lambda s, v :False
         if 'counter' not in kwargs :
-            kwargs['counter'] = {'num_nodes_seen':[0],'num_endgame_evals':[0], 'num_heuristic_evals':[0], }
+            kwargs['counter'] = {'num_nodes_seen':[0],'num_endgame_evals':[0], 'num_heuristic_evals':[0], 'search_stats':[SearchStats()]}
+
+        util_fn, eval_fn, state_callback_fn = self.util_fn, self.eval_fn, kwargs['state_callback_fn']
+        profiler = SamplingProfiler(self.profile_every) if self.profile_every > 0 else None
+        if profiler is not None:
+            util_fn, eval_fn, state_callback_fn = profiler.start(state, util_fn, eval_fn, state_callback_fn)
 
         search_start_time = time()
-        best_actions, best_leaf_nodes, best_exp_utils, max_cutoff = self.search_alg(
-            initial_state = state,
-            util_fn = self.util_fn,
-            eval_fn = self.eval_fn,
-            time_limit = self.time_limit,
-            state_callback_fn = kwargs['state_callback_fn'],
-            counter = kwargs['counter'],
-            random_move_order = self.random_move_order,
-            transposition_table = self.transposition_table
-
-            )
+        try:
+            best_actions, best_leaf_nodes, best_exp_utils, max_cutoff = self.search_alg(
+                initial_state = state,
+                util_fn = util_fn,
+                eval_fn = eval_fn,
+                time_limit = self.time_limit,
+                state_callback_fn = state_callback_fn,
+                counter = kwargs['counter'],
+                random_move_order = self.random_move_order,
+                transposition_table = self.transposition_table,
+                quiescence = self.quiescence,
+                custom_move_ordering = self.custom_move_ordering,
+                mtdf = self.mtdf,
+                aspiration_window = self.aspiration_window,
+                tablebase_probe = self.tablebase_probe
+                )
+        finally:
+            if profiler is not None:
+                profiler.stop()
         elapsed_time = time() - search_start_time
+        if profiler is not None:
+            profiler.write_collapsed("{}-{}.folded".format(self.profile_prefix, state.get_path_length()))
         if self.verbose:
             if self.super_verbose:
                 for c in range(1,max_cutoff+1):
@@ -337,12 +500,36 @@ class ProgressiveDeepeningSearchAgent(GamePlayingAgent) :
                     max_cutoff, best_actions[-1], best_exp_utils[-1],
                     ))
             print("Total:\n Nodes seen: {} | Endgame evals: {} | Cutoff evals: {}".format(kwargs['counter']['num_nodes_seen'][0],kwargs['counter']['num_endgame_evals'][0],kwargs['counter']['num_heuristic_evals'][0]))
+            if 'search_stats' in kwargs['counter'] and max_cutoff > 0:
+                print("Search with cutoff {}:".format(max_cutoff))
+                print(kwargs['counter']['search_stats'][max_cutoff].summary(self.game_class.action_to_str))
             print("Total elapsed time: {:.4f}".format(elapsed_time))
+        if self.stats_file is not None and 'search_stats' in kwargs['counter']:
+            search_stats = kwargs['counter']['search_stats']
+            search_stats[0].dump_json(self.stats_file, self.game_class.action_to_str,
+                                      agent = self.name, path_length = state.get_path_length(), total_elapsed_time = elapsed_time,
+                                      per_cutoff = [stats.to_dict(self.game_class.action_to_str) for stats in search_stats[1:]])
         if max_cutoff > 0:
             return best_actions[-1], best_exp_utils[-1]
         else :
             return None, None
 
+class MTDfSearchAgent(ProgressiveDeepeningSearchAgent) :
+
+    mtdf = True
+
+    def __init__(self, game_class, name="MTD(f) Progressive Deepening Player"):
+        super().__init__(game_class, name)
+
+    def set_up(self, **kwargs):
+        """
+        Same settings as ProgressiveDeepeningSearchAgent, except that
+        MTD(f) always uses a transposition table, kept for the whole game.
+        """
+        if not kwargs.get('transposition_table'):
+            kwargs['transposition_table'] = True
+        super().set_up(**kwargs)
+
 class MonteCarloTreeSearchAgent(GamePlayingAgent):
     def __init__(self, game_class, name="Monte Carlo Tree Search Player"):
         self.search_alg = MonteCarloTreeSearch
@@ -354,7 +541,7 @@ class MonteCarloTreeSearchAgent(GamePlayingAgent):
         Should prompt user (via commnand prompt).
         """
         for kw in kwargs:
-            self.kw = kwargs[kw]
+            setattr(self, kw, kwargs[kw])
 
         if 'name' not in kwargs:
             new_name= input("Name: >>> ")
@@ -371,6 +558,11 @@ class MonteCarloTreeSearchAgent(GamePlayingAgent):
         if 'time_limit' not in kwargs:
             self.time_limit = get_float("Time Limit (seconds): >>> ")
 
+        if 'workers' not in kwargs:
+            self.workers = get_int("Worker processes (1 = no parallelism, {} cores available): >>> ".format(cpu_count()))
+        # Keep one pool of workers for the whole game
+        self.pool = Pool(self.workers) if self.workers > 1 else None
+
         if 'verbose' not in kwargs:
             self.verbose = ask_yes_no("Be verbose? >>> ")
 
@@ -398,7 +590,9 @@ class MonteCarloTreeSearchAgent(GamePlayingAgent):
                                 exploration_bias = self.exploration_bias * sqrt(2),
                                 time_limit = self.time_limit,
                                 state_callback_fn = kwargs['state_callback_fn'],
-                                counter = kwargs['counter']
+                                counter = kwargs['counter'],
+                                workers = self.workers,
+                                pool = self.pool
                                 )
         elapsed_time = time() - search_start_time
         if self.verbose:
@@ -71,7 +71,7 @@ class GameStateNode:
         raise NotImplementedError
 
 
-    def __init__(self, parent, path_length, previous_action, current_player) :
+    def __init__(self, parent, path_length, previous_action, current_player, zobrist_hash = None) :
         """
         Creates a game state node.
         Takes:
@@ -79,6 +79,9 @@ class GameStateNode:
         path_length: the number of actions taken in the path to reach the state (aka level or ply)
         previous_action: whatever action was last taken to arrive at this state (None if root)
         current_player: the number of the player whose turn it is to take an action
+        zobrist_hash: optional precomputed hash of get_all_features(). Subclasses that
+            can update a Zobrist hash incrementally in generate_next_state should pass it;
+            otherwise it is left as None and hashing falls back to get_all_features().
 
         In any subclass of GameStateNode, the __init__() should take any
         additional parameters that are needed to define its state.
@@ -89,6 +92,8 @@ class GameStateNode:
         self.path_length = path_length
         self.previous_action = previous_action
         self.current_player = current_player
+        self.zobrist_hash = zobrist_hash
+        self.cached_actions = None
 
     def __str__(self) :
         """
@@ -117,11 +122,29 @@ class GameStateNode:
     def is_endgame_state(self):
         """
         Returns whether or not this state is an endgame (terminal) state (True/False)
+        By default, a state is an endgame if there is no legal action.
         """
-        if not self.generate_next_states_and_actions():
-            return True
+        return not self.has_any_action()
 
-        return False
+    def has_any_action(self):
+        """
+        Returns whether there is at least one legal action from this state.
+        Uses get_cached_actions(); subclasses may override this with a cheaper
+        test that does not list the actions.
+        """
+        return len(self.get_cached_actions()) > 0
+
+    def get_cached_actions(self):
+        """
+        Returns get_all_actions() (in default order) as a tuple, computed only once
+        per state and remembered in self.cached_actions.
+        Searches should use this instead of get_all_actions(), since the same
+        node is usually asked for its actions more than once.
+        Subclasses that implement make_move must reset the cache when the state changes.
+        """
+        if self.cached_actions is None:
+            self.cached_actions = tuple(self.get_all_actions())
+        return self.cached_actions
 
 
     def endgame_winner(self):
@@ -133,6 +156,7 @@ class GameStateNode:
         Since nonzero numbers are interpreted as "True" in Python, and 0 or None as "False",
         this method may be used as a condition check for the endgame if the player_numbers
         are nonzero numbers and ties are not possible.
+        Relies on is_endgame_state(), so the cached actions are reused.
 
         In some games there is no clear "winner," such as in abstract game trees.
         An endgame utility function is needed to evaluate the relative
@@ -155,6 +179,17 @@ class GameStateNode:
         raise NotImplementedError
 
 
+    def get_capture_actions(self) :
+        """
+        Returns an iterable of the "capture" actions from this state: the actions that
+        make a big, sudden change to the state's value (e.g. taking an opponent's piece).
+        Quiescence search keeps searching these past the cutoff depth.
+
+        By default, a game has no captures. Subclasses may override this.
+        """
+        return ()
+
+
     def generate_next_state(self, action) :
         """
         Generate and return the next state (GameStateNode object) that would
@@ -164,6 +199,34 @@ class GameStateNode:
         raise NotImplementedError
 
 
+    """ Whether the subclass implements make_move and unmake_move. """
+    supports_make_move = False
+
+    """
+    Whether every state of the subclass carries a zobrist_hash that is the same between runs,
+    so that states can be looked up in files (e.g. an opening book).
+    """
+    has_zobrist_hash = False
+
+    def make_move(self, action) :
+        """
+        OPTIONAL: Applies the action to this state IN PLACE, turning it into the
+        state generate_next_state(action) would return (except that parent is unchanged).
+        Returns an "undo" record that unmake_move uses to restore the previous state.
+
+        This lets a search walk the game tree with a single state object instead of
+        allocating a new node per edge. Subclasses that implement it should also
+        set supports_make_move = True.
+        """
+        raise NotImplementedError
+
+    def unmake_move(self, undo) :
+        """
+        OPTIONAL: Reverts the most recent make_move that has not yet been undone,
+        given the undo record it returned.
+        """
+        raise NotImplementedError
+
     def generate_next_states_and_actions(self, custom_move_ordering = False) :
         """
         Generate and return an iterable (e.g. a list) of all possible next
@@ -235,16 +298,21 @@ class GameStateNode:
         """
         This is needed to make GameStateNode comparable and usable in Sets/Dicts
         It compares types and get_all_features().
-        You probably want to leave this function alone, but subclasses could override
-        this to be more efficient.
+        If both nodes carry a zobrist_hash, differing hashes settle it without
+        building the features; the features are only compared when the hashes match.
         """
-        return (isinstance(other, type(self)) and (self.get_all_features() == other.get_all_features()))
+        if not isinstance(other, type(self)):
+            return False
+        if (self.zobrist_hash is not None and other.zobrist_hash is not None
+                and self.zobrist_hash != other.zobrist_hash):
+            return False
+        return self.get_all_features() == other.get_all_features()
 
     def __hash__(self):
         """
         This is important to make GameStateNode hashable and usable in Sets/Dicts;
-        it hashes get_all_features().
-        You probably want to leave this function alone, but subclasses could override
-        this to be more efficient.
+        it returns the zobrist_hash if there is one, or hashes get_all_features().
         """
+        if self.zobrist_hash is not None:
+            return self.zobrist_hash
         return hash(self.get_all_features())
@@ -5,7 +5,7 @@ Usage:
     python lab2_play_text.py [GAME] [INITIAL_STATE_FILE] [AGENT_1] [AGENT_2] ...")
     GAME can be tictactoe, nim, connectfour, or roomba
     INITIAL_STATE_FILE is a path to a text file or 'default'
-    AGENT_# can be human, random, maxdfs, minimax, expectimax, alphabeta, progressive, or montecarlo
+    AGENT_# can be human, random, maxdfs, minimax, expectimax, alphabeta, pvs, progressive, mtdf, or montecarlo
 """
 from sys import argv
 from time import sleep, time
@@ -21,7 +21,9 @@ GAME_CLASSES = {"checkers": CheckersGameState,"connectfour":ConnectFourGameState
 PLAYING_AGENTS = {"human":HumanTextInputAgent, "random":RandChoiceAgent,
                     "maxdfs": MaximizingDFSAgent, "minimax":MinimaxSearchAgent,
                     "expectimax": ExpectimaxSearchAgent, "alphabeta": MinimaxAlphaBetaSearchAgent,
-                    "progressive":ProgressiveDeepeningSearchAgent, "montecarlo":MonteCarloTreeSearchAgent}
+                    "pvs": PrincipalVariationSearchAgent,
+                    "progressive":ProgressiveDeepeningSearchAgent, "mtdf": MTDfSearchAgent,
+                    "montecarlo":MonteCarloTreeSearchAgent}
 
 if len(argv) < 2 :
     print("Usage:    python lab2_play_text.py [GAME] [INITIAL_STATE_FILE] [AGENT_1] [AGENT_2] ...")
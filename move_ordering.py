@@ -0,0 +1,64 @@
+"""
+Killer moves and the history heuristic, used by the search algorithms in algorithms.py
+to order moves when custom_move_ordering is set.
+
+Both remember moves that caused a beta cutoff (made the other player avoid a branch),
+on the assumption that a move that was good in one position is often good in similar ones:
+    killers: for each ply (depth below the root of the search), the last few distinct
+        moves that caused a cutoff at that ply, most recent first.
+    history: for each move, the sum of remaining_depth ** 2 over the cutoffs it caused,
+        so that cutoffs high in the tree (which prune the most) weigh the most.
+Moves are identified by history_key: for actions that are tuples of squares (e.g. checkers),
+the (from, to) pair, so the same piece movement matches across positions.
+
+One MoveOrdering can be kept across searches of the same position
+(e.g. by ProgressiveDeepening), since the plies then mean the same thing.
+"""
+
+class MoveOrdering:
+
+    def __init__(self, num_killers = 2):
+        """ Creates empty killer slots (num_killers per ply) and an empty history table. """
+        self.num_killers = num_killers
+        self.killers = []
+        self.history = {}
+
+    @staticmethod
+    def history_key(action):
+        """ Returns (from, to) for a tuple action of 2 or more squares, or the action itself. """
+        if isinstance(action, tuple) and len(action) >= 2:
+            return (action[0], action[-1])
+        return action
+
+    def record_cutoff(self, action, ply, remaining_depth):
+        """ Remembers that action caused a beta cutoff at the given ply, with remaining_depth left to search. """
+        while len(self.killers) <= ply:
+            self.killers.append([])
+        killers = self.killers[ply]
+        if action in killers:
+            killers.remove(action)
+        killers.insert(0, action)
+        del killers[self.num_killers:]
+
+        key = self.history_key(action)
+        self.history[key] = self.history.get(key, 0) + remaining_depth * remaining_depth
+
+    def order(self, actions, ply):
+        """
+        Returns a new list of actions sorted best first: the killers of this ply
+        (most recent first), then the other actions by decreasing history score.
+        The sort is stable, so actions without a score keep their relative order.
+        """
+        killers = self.killers[ply] if ply < len(self.killers) else ()
+        history = self.history
+        history_key = self.history_key
+        def sort_key(action):
+            if action in killers:
+                return (0, killers.index(action))
+            return (1, -history.get(history_key(action), 0))
+        return sorted(actions, key = sort_key)
+
+    def clear(self):
+        """ Forgets all killers and history. """
+        self.killers = []
+        self.history = {}
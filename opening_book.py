@@ -0,0 +1,154 @@
+"""
+Opening book: the best move (and its expected utility) for positions of the first plies
+of the game, found offline by deep searches, so that agents can play them without searching.
+
+Build a checkers book with
+    python opening_book.py OUTPUT_FILE [PLIES] [SECONDS_PER_POSITION] [progressive|montecarlo]
+and use it with OpeningBook(OUTPUT_FILE).lookup(state, util_fn), e.g. through the opening_book
+setting of ClassicSearchAgent.
+
+Positions are keyed by their Zobrist hash (state.zobrist_hash), which is stable between runs,
+so only games whose states carry one (has_zobrist_hash, e.g. CheckersGameState) can have a book.
+Positions are searched as roots, so the expected utilities stored are those of path length 0;
+lookup shifts them to the path length of the state looked up.
+The file is a header followed by fixed-size records sorted by key,
+so that it can be memory-mapped and searched with a binary search:
+    header: "CKOB", version (uint16), number of records (uint32)
+    record: key (uint64), expected utility for the player to move (float64),
+            the action as game_class.action_to_str, in ASCII, zero-padded to ACTION_SIZE bytes
+"""
+import mmap
+import struct
+from sys import argv
+from time import time
+from algorithms import ProgressiveDeepening, MonteCarloTreeSearch
+from util_eval import shift_endgame_utility
+
+MAGIC = b"CKOB"
+VERSION = 1
+HEADER_FORMAT = "<4sHI"
+ACTION_SIZE = 40
+RECORD_FORMAT = "<Qd{}s".format(ACTION_SIZE)
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+RECORD_SIZE = struct.calcsize(RECORD_FORMAT)
+
+def book_positions(initial_state, plies):
+    """
+    Returns the distinct states (by Zobrist hash) reachable from initial_state
+    in fewer than plies actions, in breadth-first order, each as a root (path length 0).
+    """
+    initial_state = initial_state.clone_as_root()
+    positions = {initial_state.zobrist_hash: initial_state}
+    frontier = [initial_state]
+    for ply in range(plies - 1):
+        next_frontier = []
+        for state in frontier:
+            for action in state.get_cached_actions():
+                child_state = state.generate_next_state(action).clone_as_root()
+                if child_state.zobrist_hash not in positions:
+                    positions[child_state.zobrist_hash] = child_state
+                    next_frontier.append(child_state)
+        frontier = next_frontier
+    return [state for state in positions.values() if not state.is_endgame_state()]
+
+def build_opening_book(filename, initial_state, util_fn, eval_fn, plies = 4, time_limit = 1.0,
+                       search = "progressive", exploration_bias = 1000, verbose = False):
+    """
+    Searches every position of the first plies (see book_positions) for time_limit seconds,
+    with ProgressiveDeepening (using eval_fn and a transposition table) or, if search is
+    "montecarlo", MonteCarloTreeSearch (using exploration_bias), and writes the book file.
+    """
+    game_class = type(initial_state)
+    records = []
+    positions = book_positions(initial_state, plies)
+    for i, state in enumerate(positions):
+        if search == "montecarlo":
+            action, _, exp_util, _ = MonteCarloTreeSearch(state, util_fn, exploration_bias, time_limit,
+                                                          counter = {'num_simulations':0})
+        else:
+            counter = {'num_nodes_seen':[0], 'num_endgame_evals':[0], 'num_heuristic_evals':[0]}
+            best_actions, _, best_exp_utils, _ = ProgressiveDeepening(state, util_fn, eval_fn, time_limit,
+                                                                     counter = counter, transposition_table = True)
+            action, exp_util = best_actions[-1], best_exp_utils[-1]
+        action_str = game_class.action_to_str(action).encode('ascii')
+        assert len(action_str) <= ACTION_SIZE
+        records.append((state.zobrist_hash, float(exp_util), action_str))
+        if verbose:
+            print("{}/{}: {} ({:.4f})".format(i + 1, len(positions), game_class.action_to_str(action), exp_util))
+    write_opening_book(filename, records)
+
+def write_opening_book(filename, records):
+    """
+    Writes a book file from (key, expected utility at path length 0, action string as ASCII bytes)
+    records, in any order.
+    """
+    records = sorted(records)
+    with open(filename, 'wb') as f:
+        f.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, len(records)))
+        for record in records:
+            f.write(struct.pack(RECORD_FORMAT, *record))
+
+class OpeningBook:
+
+    def __init__(self, filename):
+        """ Opens a book file written by build_opening_book, memory-mapped (read only). """
+        self.file = open(filename, 'rb')
+        self.data = mmap.mmap(self.file.fileno(), 0, access = mmap.ACCESS_READ)
+        magic, version, self.num_records = struct.unpack_from(HEADER_FORMAT, self.data, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("{} is not an opening book (version {})".format(filename, VERSION))
+        self.num_hits = 0
+
+    def _find(self, key):
+        """ Binary search for key; returns the (expected utility, action bytes) of its record, or None. """
+        low, high = 0, self.num_records
+        while low < high:
+            middle = (low + high) // 2
+            record_key, exp_util, action_str = struct.unpack_from(RECORD_FORMAT, self.data,
+                                                                  HEADER_SIZE + middle * RECORD_SIZE)
+            if record_key < key:
+                low = middle + 1
+            elif record_key > key:
+                high = middle
+            else:
+                return exp_util, action_str
+        return None
+
+    def lookup(self, state, util_fn):
+        """
+        Returns the book's (action, expected utility for the player to move) for state,
+        or None if the state is not in the book (or has no Zobrist hash).
+        The action is checked to be legal, in case of a hash collision.
+        util_fn is the endgame utility function the book was built with: wins and losses
+        of the path-length dependent ones are shifted from path length 0 to the state's.
+        """
+        if state.zobrist_hash is None:
+            return None
+        record = self._find(state.zobrist_hash)
+        if record is None:
+            return None
+        exp_util, action_str = record
+        action = type(state).str_to_action(action_str.rstrip(b'\0').decode('ascii'))
+        if action not in state.get_cached_actions():
+            return None
+        self.num_hits += 1
+        return action, shift_endgame_utility(util_fn, exp_util, -state.get_path_length())
+
+    def close(self):
+        self.data.close()
+        self.file.close()
+
+
+if __name__ == "__main__":
+    from checkersgamestate import CheckersGameState
+    from util_eval import faster_endgame_utility, checkers_heuristic_eval_diff
+    if len(argv) < 2:
+        print("Usage:    python opening_book.py OUTPUT_FILE [PLIES] [SECONDS_PER_POSITION] [progressive|montecarlo]")
+        quit()
+    plies = int(argv[2]) if len(argv) > 2 else 4
+    time_limit = float(argv[3]) if len(argv) > 3 else 1.0
+    search = argv[4] if len(argv) > 4 else "progressive"
+    start_time = time()
+    build_opening_book(argv[1], CheckersGameState.defaultInitialState(), faster_endgame_utility,
+                       checkers_heuristic_eval_diff, plies, time_limit, search, verbose = True)
+    print("Built opening book for the first {} plies in {:.1f} seconds".format(plies, time() - start_time))
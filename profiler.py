@@ -0,0 +1,150 @@
+"""
+A sampling profiler for the searches of the agents in game_playing_agents.py,
+driven by the state_callback_fn that every search calls at every node.
+
+Every sample_every-th callback is a sample: the profiler records the ply of the state
+(its depth below the root of the search), the wall time since the search started,
+and the call stack of the search at that point. The wall time since the previous sample
+is charged to that stack, split between the layers the search spends its time in:
+    generate_next_state, get_all_actions, get_capture_actions, get_cached_actions,
+    is_endgame_state, has_any_action, make_move, unmake_move: the game class's methods
+        (patched with timing wrappers on the class while profiling),
+    util_fn, eval_fn: the evaluation functions (wrapped),
+and whatever is left to the search code itself. Time inside one layer called by
+another (e.g. an eval_fn listing actions, or get_cached_actions filling its cache with
+get_all_actions) counts for the outer layer only.
+
+The result is written as "collapsed stacks", the input format of flame graph tools
+(e.g. flamegraph.pl or speedscope): one line per stack, its frames separated by ';',
+then the number of microseconds spent in it, e.g.
+    choose_action;ProgressiveDeepening;MinimaxAlphaBetaSearch;MinimaxAlphaBeta_helper;ply 3;eval_fn 1520
+Recursive calls of one function are merged into one frame, followed by the ply.
+
+Only the process calling choose_action is profiled: the evaluation functions sent to
+worker processes (e.g. by ParallelMinimaxAlphaBetaSearch) are the unwrapped ones.
+"""
+import sys
+from time import perf_counter
+from types import MethodType
+
+STATE_LAYERS = ('generate_next_state', 'get_all_actions', 'get_capture_actions', 'get_cached_actions',
+                'is_endgame_state', 'has_any_action', 'make_move', 'unmake_move')
+FUNCTION_LAYERS = ('util_fn', 'eval_fn')
+
+def _identity(fn):
+    return fn
+
+class _TimedFunction:
+    """ Calls fn, adding the time it takes to the profiler's time for layer. """
+
+    def __init__(self, profiler, layer, fn):
+        self.profiler = profiler
+        self.layer = layer
+        self.fn = fn
+
+    def __call__(self, *args, **kwargs):
+        profiler = self.profiler
+        if profiler.current_layer is not None:
+            return self.fn(*args, **kwargs)
+        profiler.current_layer = self.layer
+        start_time = perf_counter()
+        try:
+            return self.fn(*args, **kwargs)
+        finally:
+            profiler.layer_times[self.layer] += perf_counter() - start_time
+            profiler.current_layer = None
+
+    def __get__(self, instance, owner):
+        """ Binds like a function, when patched onto a class as a method. """
+        return self if instance is None else MethodType(self, instance)
+
+    def __reduce__(self):
+        """ Pickles as the plain fn, so that other processes run it unprofiled. """
+        return (_identity, (self.fn,))
+
+class SamplingProfiler:
+
+    def __init__(self, sample_every = 100):
+        """ Creates a profiler that samples every sample_every-th state callback. """
+        self.sample_every = sample_every
+        self.stacks = {}        # collapsed stack -> seconds
+        self.samples = []       # (ply, wall time since start) of each sample
+        self.num_callbacks = 0
+        self.layer_times = {layer : 0.0 for layer in STATE_LAYERS + FUNCTION_LAYERS}
+        self.current_layer = None
+        self.patched = {}
+
+    def start(self, initial_state, util_fn, eval_fn, state_callback_fn):
+        """
+        Starts profiling a search from initial_state, to be called by the function
+        running the search (e.g. choose_action), whose frame becomes the root of the stacks.
+        Patches the state class's methods, and returns the (util_fn, eval_fn,
+        state_callback_fn) that the search should use instead of the given ones.
+        """
+        self.root_frame = sys._getframe(1)
+        self.root_path_length = initial_state.get_path_length()
+        state_class = type(initial_state)
+        for layer in STATE_LAYERS:
+            # Remember whether the class itself defines the method, or inherits it
+            self.patched[(state_class, layer)] = state_class.__dict__.get(layer)
+            setattr(state_class, layer, _TimedFunction(self, layer, getattr(state_class, layer)))
+
+        def profiled_callback(state, state_value):
+            self.num_callbacks += 1
+            if self.num_callbacks % self.sample_every == 0:
+                self.sample(state, sys._getframe(1))
+            return state_callback_fn(state, state_value)
+
+        self.start_time = self.last_sample_time = perf_counter()
+        return (_TimedFunction(self, 'util_fn', util_fn), _TimedFunction(self, 'eval_fn', eval_fn),
+                profiled_callback)
+
+    def stop(self):
+        """ Restores the patched methods, and charges the time since the last sample to the root. """
+        for (state_class, layer), method in self.patched.items():
+            if method is None:
+                delattr(state_class, layer)
+            else:
+                setattr(state_class, layer, method)
+        self.patched = {}
+        self._charge(self.root_frame.f_code.co_name, perf_counter())
+        self.root_frame = None
+
+    def sample(self, state, frame):
+        """ Records a sample at state, with the search's stack starting at frame. """
+        now = perf_counter()
+        ply = state.get_path_length() - self.root_path_length
+        self.samples.append((ply, now - self.start_time))
+        self._charge("{};ply {}".format(self._collapse_stack(frame), ply), now)
+
+    def _collapse_stack(self, frame):
+        """ The names of the functions from the root frame down to frame, joined by ';'. """
+        names = []
+        while frame is not None and frame is not self.root_frame:
+            name = frame.f_code.co_name
+            if not names or names[-1] != name:
+                names.append(name)
+            frame = frame.f_back
+        names.append(self.root_frame.f_code.co_name)
+        return ";".join(reversed(names))
+
+    def _charge(self, stack, now):
+        """ Adds the time since the last sample to stack, split between the layers. """
+        stacks = self.stacks
+        total = now - self.last_sample_time
+        for layer, layer_time in self.layer_times.items():
+            if layer_time > 0:
+                layer_stack = stack + ";" + layer
+                stacks[layer_stack] = stacks.get(layer_stack, 0) + layer_time
+                total -= layer_time
+                self.layer_times[layer] = 0.0
+        stacks[stack] = stacks.get(stack, 0) + max(total, 0)
+        self.last_sample_time = now
+
+    def write_collapsed(self, filename):
+        """ Writes the stacks to filename in the collapsed-stack format (microseconds). """
+        with open(filename, 'w') as f:
+            for stack, seconds in sorted(self.stacks.items()):
+                microseconds = round(seconds * 1e6)
+                if microseconds > 0:
+                    f.write("{} {}\n".format(stack, microseconds))
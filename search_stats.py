@@ -0,0 +1,153 @@
+"""
+Statistics of a search, kept by the search algorithms in algorithms.py
+when a SearchStats is passed as their counter.
+
+SearchStats is a dict, so the counts every algorithm keeps (counter['num_nodes_seen'],
+'num_endgame_evals', 'num_heuristic_evals' and any optional ones such as
+'num_quiescence_nodes') work as with a plain dict counter. MinimaxAlphaBetaSearch
+(and so PrincipalVariationSearch, MTDfSearch and ProgressiveDeepening) and
+IterativeMinimaxAlphaBetaSearch also record:
+    nodes_per_ply: the number of nodes searched at each ply (depth below the root),
+        not counting quiescence nodes.
+    cutoffs_per_ply: the number of beta cutoffs at each ply, and
+    first_move_cutoffs_per_ply: how many of them the first action searched caused.
+        The first-move cutoff rate measures the move ordering: in a perfectly
+        ordered tree, every cutoff comes from the first move.
+    table_probes, table_hits, table_stores: the transposition table's activity.
+    move_generation_time: seconds spent listing and ordering actions,
+    evaluation_time: seconds spent in util_fn and eval_fn, and
+    elapsed_time: seconds spent in the whole search.
+    principal_variation: the expected line of play from the root (list of actions).
+One SearchStats can be passed to several searches: counts and times add up,
+and principal_variation is that of the last one.
+"""
+import json
+from time import perf_counter
+
+class SearchStats(dict):
+
+    def __init__(self):
+        """ Creates stats with all counts at zero. """
+        super().__init__(num_nodes_seen = 0, num_endgame_evals = 0, num_heuristic_evals = 0)
+        self.nodes_per_ply = []
+        self.cutoffs_per_ply = []
+        self.first_move_cutoffs_per_ply = []
+        self.table_probes = 0
+        self.table_hits = 0
+        self.table_stores = 0
+        self.move_generation_time = 0.0
+        self.evaluation_time = 0.0
+        self.elapsed_time = 0.0
+        self.principal_variation = []
+
+    @staticmethod
+    def _add_at(counts, ply, amount = 1):
+        while len(counts) <= ply:
+            counts.append(0)
+        counts[ply] += amount
+
+    def record_nodes(self, ply, num_nodes = 1):
+        """ Counts num_nodes nodes searched at ply. """
+        self._add_at(self.nodes_per_ply, ply, num_nodes)
+
+    def record_cutoff(self, ply, move_number):
+        """ Counts a beta cutoff at ply, caused by the action searched move_number-th (from 0). """
+        self._add_at(self.cutoffs_per_ply, ply)
+        self._add_at(self.first_move_cutoffs_per_ply, ply, 1 if move_number == 0 else 0)
+
+    def record_table(self, num_probes, num_hits, num_stores):
+        """ Adds transposition table probes, hits and stores. """
+        self.table_probes += num_probes
+        self.table_hits += num_hits
+        self.table_stores += num_stores
+
+    def timed(self, fn, attribute):
+        """
+        Returns a function that calls fn and adds the time it took
+        to the given attribute (e.g. 'evaluation_time').
+        """
+        def timed_fn(*args, **kwargs):
+            start_time = perf_counter()
+            result = fn(*args, **kwargs)
+            setattr(self, attribute, getattr(self, attribute) + perf_counter() - start_time)
+            return result
+        return timed_fn
+
+    def first_move_cutoff_rate(self):
+        """ The fraction of cutoffs caused by the first action searched, or None without cutoffs. """
+        num_cutoffs = sum(self.cutoffs_per_ply)
+        if num_cutoffs == 0:
+            return None
+        return sum(self.first_move_cutoffs_per_ply) / num_cutoffs
+
+    def table_hit_rate(self):
+        """ The fraction of transposition table probes that found an entry, or None without probes. """
+        if self.table_probes == 0:
+            return None
+        return self.table_hits / self.table_probes
+
+    def merge(self, other):
+        """ Adds the counts and times of other (a SearchStats or a plain dict counter) to these. """
+        for key in other:
+            self[key] = self.get(key, 0) + other[key]
+        if isinstance(other, SearchStats):
+            for ply, num_nodes in enumerate(other.nodes_per_ply):
+                self._add_at(self.nodes_per_ply, ply, num_nodes)
+            for ply, num_cutoffs in enumerate(other.cutoffs_per_ply):
+                self._add_at(self.cutoffs_per_ply, ply, num_cutoffs)
+            for ply, num_cutoffs in enumerate(other.first_move_cutoffs_per_ply):
+                self._add_at(self.first_move_cutoffs_per_ply, ply, num_cutoffs)
+            self.record_table(other.table_probes, other.table_hits, other.table_stores)
+            self.move_generation_time += other.move_generation_time
+            self.evaluation_time += other.evaluation_time
+            self.elapsed_time += other.elapsed_time
+            self.principal_variation = other.principal_variation
+
+    def to_dict(self, action_to_str = str):
+        """ Returns all the stats as a dict of JSON types, with the actions as action_to_str strings. """
+        stats = dict(self)
+        stats.update(nodes_per_ply = self.nodes_per_ply,
+                     cutoffs_per_ply = self.cutoffs_per_ply,
+                     first_move_cutoffs_per_ply = self.first_move_cutoffs_per_ply,
+                     first_move_cutoff_rate = self.first_move_cutoff_rate(),
+                     table_probes = self.table_probes,
+                     table_hits = self.table_hits,
+                     table_stores = self.table_stores,
+                     move_generation_time = self.move_generation_time,
+                     evaluation_time = self.evaluation_time,
+                     elapsed_time = self.elapsed_time,
+                     principal_variation = [action_to_str(action) for action in self.principal_variation])
+        return stats
+
+    def dump_json(self, filename, action_to_str = str, **extra):
+        """
+        Appends the stats (see to_dict), with any extra items, to filename
+        as one line of JSON, so that one file can collect the stats of many searches.
+        """
+        stats = self.to_dict(action_to_str)
+        stats.update(extra)
+        with open(filename, 'a') as f:
+            f.write(json.dumps(stats) + "\n")
+
+    def summary(self, action_to_str = str):
+        """ Returns a few lines describing the stats, for printing. """
+        lines = ["{} nodes seen, {} endgame evals, {} heuristic evals".format(
+                    self['num_nodes_seen'], self['num_endgame_evals'], self['num_heuristic_evals'])]
+        extra_counts = ["{}: {}".format(key, self[key]) for key in self
+                        if key not in ('num_nodes_seen', 'num_endgame_evals', 'num_heuristic_evals')]
+        if extra_counts:
+            lines.append(", ".join(extra_counts))
+        if self.nodes_per_ply:
+            lines.append("Nodes per ply: {}".format(self.nodes_per_ply))
+        if self.cutoffs_per_ply:
+            lines.append("Cutoffs per ply: {} (first move: {:.1%})".format(
+                self.cutoffs_per_ply, self.first_move_cutoff_rate() or 0))
+        if self.table_probes:
+            lines.append("Transposition table: {} probes, {} hits ({:.1%}), {} stores".format(
+                self.table_probes, self.table_hits, self.table_hit_rate(), self.table_stores))
+        if self.elapsed_time:
+            lines.append("Move generation {:.4f} s, evaluation {:.4f} s, of {:.4f} s searching".format(
+                self.move_generation_time, self.evaluation_time, self.elapsed_time))
+        if self.principal_variation:
+            lines.append("Principal variation: {}".format(" ".join(action_to_str(action) for action in self.principal_variation)))
+        return "\n".join(lines)
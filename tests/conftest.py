@@ -0,0 +1,10 @@
+"""
+The modules are flat files at the root of the repository: make them importable from the tests.
+
+Tests of modules that import util_eval (e.g. algorithms) need all the game modules it
+imports, so they are skipped with pytest.importorskip where those are missing.
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,119 @@
+import pytest
+from checkersgamestate import CheckersGameState
+from search_stats import SearchStats
+
+algorithms = pytest.importorskip("algorithms")
+util_eval = pytest.importorskip("util_eval")
+
+def middle_game():
+    """ The benchmark's checkers "middle" position. """
+    state = CheckersGameState.defaultInitialState()
+    for i in [4, 2, 0, 0, 6, 7, 3, 0, 0, 0, 5, 7, 3, 6, 0, 0]:
+        state = state.generate_next_state(state.get_all_actions()[i])
+    return state.clone_as_root()
+
+def new_counter():
+    return {'num_nodes_seen': 0, 'num_endgame_evals': 0, 'num_heuristic_evals': 0}
+
+def search(search_alg, state, cutoff, **kwargs):
+    counter = new_counter()
+    action, leaf_node, exp_util, terminated = search_alg(state, util_eval.faster_endgame_utility,
+        util_eval.checkers_heuristic_eval_diff, cutoff, counter = counter, **kwargs)
+    return action, leaf_node, exp_util, counter
+
+def test_principal_variation_search_orders_moves_by_default():
+    state = middle_game()
+    ab_action, _, ab_util, ab_counter = search(algorithms.MinimaxAlphaBetaSearch, state, 5)
+    pvs_action, _, pvs_util, pvs_counter = search(algorithms.PrincipalVariationSearch, state, 5)
+    assert pvs_util == ab_util
+    assert pvs_counter['num_nodes_seen'] < ab_counter['num_nodes_seen']
+
+def some_tablebase_probe(state, maximizer_player):
+    """ Not a real tablebase: "knows" the value of some states, always the same ones. """
+    return float(hash(state) % 21 - 10) if hash(state) % 5 == 0 else None
+
+@pytest.mark.parametrize("kwargs", [{}, {'transposition_table': True}, {'custom_move_ordering': True},
+                                    {'tablebase_probe': some_tablebase_probe, 'transposition_table': True}])
+def test_iterative_search_matches_the_recursive_one(kwargs):
+    state = middle_game()
+    results = []
+    for search_alg in (algorithms.MinimaxAlphaBetaSearch, algorithms.IterativeMinimaxAlphaBetaSearch):
+        stats = SearchStats()
+        action, leaf_node, exp_util, _ = search_alg(state, util_eval.faster_endgame_utility,
+            util_eval.checkers_heuristic_eval_diff, 4, counter = stats, **kwargs)
+        assert stats.elapsed_time > 0
+        results.append((action, leaf_node, exp_util, dict(stats), stats.nodes_per_ply, stats.cutoffs_per_ply,
+                        stats.first_move_cutoffs_per_ply, stats.principal_variation,
+                        (stats.table_probes, stats.table_hits, stats.table_stores)))
+    assert results[0] == results[1]
+    if 'tablebase_probe' in kwargs:
+        assert results[0][3]['num_tablebase_hits'] > 0
+
+@pytest.mark.parametrize("null_window_search", [False, True])
+def test_parallel_search_matches_the_serial_one(null_window_search):
+    state = middle_game()
+    serial_action, _, serial_util, _ = search(algorithms.MinimaxAlphaBetaSearch, state, 4)
+    with algorithms.ProcessPoolExecutor(2) as executor:
+        for _ in range(2):
+            action, leaf_node, exp_util, counter = search(algorithms.ParallelMinimaxAlphaBetaSearch, state, 4,
+                workers = 2, executor = executor, null_window_search = null_window_search)
+            assert (action, exp_util) == (serial_action, serial_util)
+            # The leaf found by a worker is reattached below the root
+            assert algorithms.get_principal_variation(state, leaf_node)[0] == action
+            assert counter['num_nodes_seen'] > 0
+
+def test_batch_evaluation_finds_the_same_value():
+    state = middle_game()
+    for cutoff in (1, 2, 3, 4):
+        action, _, exp_util, _ = search(algorithms.MinimaxAlphaBetaSearch, state, cutoff)
+        batch_action, _, batch_util, counter = search(algorithms.MinimaxAlphaBetaSearch, state, cutoff, batch_eval = True)
+        assert (batch_action, batch_util) == (action, exp_util)
+        assert counter['num_heuristic_evals'] > 0
+
+def quiescence_minimax(state, depth, maximizer_player):
+    """ The value MinimaxAlphaBetaSearch should find with quiescence, by plain minimax. """
+    if state.is_endgame_state():
+        return util_eval.faster_endgame_utility(state, maximizer_player)
+    if depth <= 0:
+        # Stand pat, or capture if it is better for the player to move
+        values = [util_eval.checkers_heuristic_eval_diff(state, maximizer_player)]
+        values += [quiescence_minimax(state.generate_next_state(action), 0, maximizer_player)
+                   for action in state.get_capture_actions()]
+    else:
+        values = [quiescence_minimax(state.generate_next_state(action), depth - 1, maximizer_player)
+                  for action in state.get_all_actions()]
+    return max(values) if state.get_current_player() == maximizer_player else min(values)
+
+def test_quiescence_search_value():
+    state = middle_game()
+    num_quiescence_nodes = 0
+    for _ in range(6):
+        for cutoff in (1, 2, 3):
+            _, _, exp_util, counter = search(algorithms.MinimaxAlphaBetaSearch, state, cutoff, quiescence = True)
+            assert exp_util == quiescence_minimax(state, cutoff, state.get_current_player())
+            num_quiescence_nodes += counter['num_quiescence_nodes']
+        state = state.generate_next_state(state.get_all_actions()[-1])
+    assert num_quiescence_nodes > 0
+
+def test_killer_and_history_ordering_prunes_more():
+    state = middle_game()
+    _, _, exp_util, counter = search(algorithms.MinimaxAlphaBetaSearch, state, 5)
+    ordering = algorithms.MoveOrdering()
+    _, _, ordered_util, ordered_counter = search(algorithms.MinimaxAlphaBetaSearch, state, 5,
+                                                 custom_move_ordering = ordering)
+    assert ordered_util == exp_util
+    assert ordered_counter['num_nodes_seen'] < counter['num_nodes_seen']
+    assert ordering.history and any(ordering.killers)
+
+@pytest.mark.parametrize("cutoff", [1, 2, 3, 4, 5])
+def test_mtdf_finds_the_alpha_beta_value(cutoff):
+    state = middle_game()
+    _, _, exp_util, _ = search(algorithms.MinimaxAlphaBetaSearch, state, cutoff)
+    mtdf_action, mtdf_leaf_node, mtdf_util, counter = search(algorithms.MTDfSearch, state, cutoff)
+    assert mtdf_util == exp_util
+    assert counter['num_mtdf_passes'] >= 2
+    # Its action reaches the value, along the line it returns
+    assert algorithms.get_principal_variation(state, mtdf_leaf_node)[0] == mtdf_action
+    # Knowing the value, only two tests are needed: at least it, and not more
+    _, _, _, counter = search(algorithms.MTDfSearch, state, cutoff, first_guess = exp_util)
+    assert counter['num_mtdf_passes'] == 2
@@ -0,0 +1,42 @@
+import pytest
+
+benchmark = pytest.importorskip("benchmark")
+
+TIMEOUT = 60
+
+@pytest.mark.parametrize("game_name", list(benchmark.BENCHMARK_GAMES))
+def test_one_tiny_record_per_game(game_name):
+    position_name = next(iter(benchmark.BENCHMARK_GAMES[game_name]["positions"]))
+    record = benchmark.run_in_new_process(benchmark.run_fixed_depth, game_name, position_name, "alphabeta", 2,
+                                          timeout = TIMEOUT)
+    assert (record["game"], record["position"], record["algorithm"], record["depth"]) == \
+        (game_name, position_name, "alphabeta", 2)
+    assert record["nodes"] > 0 and record["action"] is not None
+    assert len(record["time_to_depth"]) == 2
+
+def test_time_limited_record():
+    record = benchmark.run_in_new_process(benchmark.run_time_limited, "checkers", "middle", "progressive", 0.2,
+                                          timeout = TIMEOUT)
+    assert record["depth"] >= 1 and record["nodes"] > 0
+
+def test_configured_functions_run():
+    benchmark.check_benchmark_games()
+
+def test_raising_function_is_caught(monkeypatch):
+    monkeypatch.setitem(benchmark.BENCHMARK_GAMES["checkers"], "eval_fn", "no such function")
+    with pytest.raises(benchmark.BenchmarkError):
+        benchmark.check_benchmark_games(["checkers"])
+
+def test_failed_record_is_reported():
+    with pytest.raises(benchmark.BenchmarkError, match = "KeyError"):
+        benchmark.run_in_new_process(benchmark.run_fixed_depth, "checkers", "middle", "no such algorithm",
+                                     timeout = TIMEOUT)
+
+def test_failed_record_does_not_stop_the_suite(monkeypatch):
+    monkeypatch.setitem(benchmark.BENCHMARK_GAMES["checkers"], "positions", {"middle": [0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 99]})
+    monkeypatch.setattr(benchmark, "check_benchmark_games", lambda game_names: None)
+    monkeypatch.setattr(benchmark, "FIXED_DEPTH_ALGORITHMS", {"alphabeta": benchmark.FIXED_DEPTH_ALGORITHMS["alphabeta"]})
+    monkeypatch.setattr(benchmark, "TIME_LIMITED_ALGORITHMS", {})
+    records = benchmark.run_benchmarks(["checkers"], timeout = TIMEOUT)
+    assert len(records) == 1 and "IndexError" in records[0]["error"]
+    assert benchmark.compare_benchmarks(records, records) == records
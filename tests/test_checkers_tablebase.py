@@ -0,0 +1,61 @@
+import pickle
+import pytest
+from checkersgamestate import CheckersGameState, BLACK, RED
+
+checkers_tablebase = pytest.importorskip("checkers_tablebase")
+algorithms = pytest.importorskip("algorithms")
+util_eval = pytest.importorskip("util_eval")
+
+@pytest.fixture(scope = "module")
+def tablebase(tmp_path_factory):
+    filename = str(tmp_path_factory.mktemp("tablebase") / "two_pieces.cktb")
+    checkers_tablebase.build_tablebase(filename, max_pieces = 2)
+    tablebase = checkers_tablebase.CheckersTablebase(filename)
+    yield tablebase
+    tablebase.close()
+
+def all_positions(path_length = 0):
+    """ Every position of the 2-piece tablebase, both players to move. """
+    for material_slice in checkers_tablebase.build_order(2):
+        for black, red, kings in checkers_tablebase.slice_positions(material_slice):
+            for player in (BLACK, RED):
+                yield CheckersGameState(black, red, kings, None, path_length, None, player)
+
+@pytest.mark.parametrize("util_fn", [util_eval.faster_endgame_utility, util_eval.basic_endgame_utility])
+def test_probe_values_match_minimax(tablebase, util_fn):
+    cutoff = 4
+    num_compared = {checkers_tablebase.WIN: 0, checkers_tablebase.LOSS: 0}
+    for state in all_positions(path_length = 7):
+        result, distance = tablebase.probe(state)
+        if result == checkers_tablebase.DRAW or distance > cutoff:
+            continue
+        # Every line ends within the cutoff, so the minimax value is exact
+        _, _, exp_util, _ = algorithms.MinimaxSearch(state, util_fn, cutoff = cutoff)
+        player = state.get_current_player()
+        assert tablebase.probe_utility(state, player, util_fn) == exp_util
+        assert tablebase.probe_utility(state, player % 2 + 1, util_fn) == -exp_util
+        num_compared[result] += 1
+    assert min(num_compared.values()) > 100
+
+def test_search_with_the_probe_finds_distant_wins(tablebase):
+    state = next(state for state in all_positions()
+                 if tablebase.probe(state) == (checkers_tablebase.WIN, 11) and not state.get_capture_actions())
+    probe = tablebase.probe_utility
+    _, _, exp_util, _ = algorithms.MinimaxAlphaBetaSearch(state, util_eval.faster_endgame_utility, cutoff = 1,
+                                                         counter = {'num_nodes_seen':0,'num_endgame_evals':0, 'num_heuristic_evals':0},
+                                                         tablebase_probe = probe)
+    assert exp_util == 2000 - 11
+
+def test_distances_over_the_maximum_are_not_stored():
+    assert checkers_tablebase.decode(checkers_tablebase.encode(checkers_tablebase.LOSS, checkers_tablebase.MAX_DISTANCE)) == \
+        (checkers_tablebase.LOSS, checkers_tablebase.MAX_DISTANCE)
+    with pytest.raises(ValueError):
+        checkers_tablebase.encode(checkers_tablebase.WIN, checkers_tablebase.MAX_DISTANCE + 1)
+
+def test_tablebase_can_be_sent_to_other_processes(tablebase):
+    unpickled = pickle.loads(pickle.dumps(tablebase))
+    try:
+        for state in list(all_positions())[::97]:
+            assert unpickled.probe(state) == tablebase.probe(state)
+    finally:
+        unpickled.close()
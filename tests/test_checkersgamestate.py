@@ -0,0 +1,165 @@
+import random
+from checkersgamestate import (CheckersGameState, BLACK, RED, CAPTURED_SQUARE, SQUARE_TO_POS, POS_TO_SQUARE,
+                              STEPS_DOWN, STEPS_UP, STEPS_KING, JUMPS_DOWN, JUMPS_UP, JUMPS_KING, compute_zobrist_hash)
+
+def random_states(seed = 0, num_games = 20, max_plies = 120):
+    """ Every state of num_games random games from the starting position. """
+    rng = random.Random(seed)
+    for _ in range(num_games):
+        state = CheckersGameState.defaultInitialState()
+        for _ in range(max_plies):
+            yield state
+            actions = state.get_all_actions()
+            if not actions:
+                break
+            state = state.generate_next_state(rng.choice(actions))
+
+def king_loop():
+    """ A black king on 9 that captures the four red pieces around 17 and lands back on 9. """
+    loop = (9, 16, 25, 18, 9)
+    red = sum(1 << CAPTURED_SQUARE[a][b] for a, b in zip(loop, loop[1:]))
+    return CheckersGameState(1 << 9, red, 1 << 9, None, 0, None, BLACK), loop
+
+def features(state):
+    return (state.black, state.red, state.kings, state.zobrist_hash, state.current_player, state.path_length)
+
+def test_king_loop_is_generated_once():
+    state, loop = king_loop()
+    assert state.get_all_actions() == [loop]
+
+def test_king_loop_keeps_the_king():
+    state, loop = king_loop()
+    next_state = state.generate_next_state(loop)
+    assert (next_state.black, next_state.red, next_state.kings) == (1 << 9, 0, 1 << 9)
+    assert next_state.zobrist_hash == compute_zobrist_hash(1 << 9, 0, 1 << 9, next_state.current_player)
+
+def test_king_loop_make_and_unmake():
+    state, loop = king_loop()
+    before = features(state)
+    undo = state.make_move(loop)
+    assert features(state) == features(king_loop()[0].generate_next_state(loop))
+    assert state.zobrist_hash == compute_zobrist_hash(state.black, state.red, state.kings, state.current_player)
+    state.unmake_move(undo)
+    assert features(state) == before
+
+def test_board_file_round_trip(tmp_path):
+    filename = str(tmp_path / "board.txt")
+    states = list(random_states(num_games = 3))
+    assert any(state.kings for state in states)
+    for state in states[::10]:
+        with open(filename, 'w') as f:
+            f.write("{}\n{}".format(state.get_current_player(), state))
+        assert CheckersGameState.readFromFile(filename).get_all_features() == state.get_all_features()
+
+def test_default_initial_state():
+    state = CheckersGameState.defaultInitialState()
+    assert [r for r, c in state.get_position_black()] == [0] * 4 + [1] * 4 + [2] * 4
+    assert [r for r, c in state.get_position_red()] == [5] * 4 + [6] * 4 + [7] * 4
+    assert all((r + c) % 2 == 1 for r, c in SQUARE_TO_POS)
+    assert CheckersGameState.action_to_str(state.get_all_actions()[0]) == "9-13"
+
+def test_men_are_crowned_on_the_far_row():
+    for player, man, action in ((BLACK, 1 << 24, (24, 28)), (RED, 1 << 7, (7, 3))):
+        black, red = (man, 1 << 14) if player == BLACK else (1 << 14, man)
+        state = CheckersGameState(black, red, 0, None, 0, None, player)
+        assert action in state.get_all_actions()
+        next_state = state.generate_next_state(action)
+        assert next_state.kings == 1 << action[-1]
+        assert next_state.get_current_player() != player
+
+def test_incremental_zobrist_hash_matches_a_fresh_one():
+    for state in random_states():
+        assert state.zobrist_hash == compute_zobrist_hash(*state.get_all_features())
+        fresh_state = CheckersGameState(state.black, state.red, state.kings, None, 0, None, state.current_player)
+        assert hash(state) == hash(fresh_state)
+
+def test_transpositions_have_the_same_hash():
+    state = CheckersGameState.defaultInitialState()
+    first, second = state, state
+    for action in [(8, 12), (20, 16), (9, 13), (21, 17)]:
+        first = first.generate_next_state(action)
+    for action in [(9, 13), (21, 17), (8, 12), (20, 16)]:
+        second = second.generate_next_state(action)
+    assert first.get_all_features() == second.get_all_features()
+    assert hash(first) == hash(second) and first == second
+    assert hash(first) != hash(state)
+
+def test_make_move_matches_generate_next_state():
+    for state in random_states(seed = 1, num_games = 5):
+        state = state.clone_as_root()
+        before = features(state)
+        actions = state.get_cached_actions()
+        for action in actions:
+            next_state = state.generate_next_state(action)
+            undo = state.make_move(action)
+            assert features(state) == features(next_state)
+            assert state.get_cached_actions() == next_state.get_cached_actions()
+            state.unmake_move(undo)
+            assert features(state) == before
+            assert state.get_cached_actions() is actions
+
+def test_cheap_endgame_test_matches_the_actions():
+    num_endgames = 0
+    for state in random_states(seed = 2, num_games = 30, max_plies = 300):
+        actions = state.get_all_actions()
+        assert state.has_any_action() == bool(actions)
+        assert state.is_endgame_state() == (not actions)
+        assert state.endgame_winner() == (state.get_current_player() % 2 + 1 if not actions else None)
+        num_endgames += not actions
+    assert num_endgames > 0
+
+def test_actions_are_cached():
+    state = CheckersGameState.defaultInitialState()
+    actions = state.get_cached_actions()
+    assert actions == tuple(state.get_all_actions())
+    assert state.get_cached_actions() is actions
+
+def test_move_tables_follow_the_diagonals():
+    for s, (r, c) in enumerate(SQUARE_TO_POS):
+        def squares(rows, distance):
+            return {POS_TO_SQUARE[(r + dr * distance, c + dc * distance)] for dr in rows for dc in (-1, 1)
+                    if (r + dr * distance, c + dc * distance) in POS_TO_SQUARE}
+        # Black men move down the rows (increasing row), red men up
+        assert set(STEPS_DOWN[s]) == squares((1,), 1)
+        assert set(STEPS_UP[s]) == squares((-1,), 1)
+        assert set(STEPS_KING[s]) == squares((1, -1), 1)
+        for table, rows in ((JUMPS_DOWN, (1,)), (JUMPS_UP, (-1,)), (JUMPS_KING, (1, -1))):
+            assert {landing for captured, landing in table[s]} == squares(rows, 2)
+            for captured, landing in table[s]:
+                lr, lc = SQUARE_TO_POS[landing]
+                assert POS_TO_SQUARE[((r + lr) // 2, (c + lc) // 2)] == captured == CAPTURED_SQUARE[s][landing]
+
+def test_masks_find_the_pieces_that_can_move():
+    for state in random_states(seed = 3, num_games = 10):
+        jumpers, steppers = state._movable_pieces()
+        captures = state.get_capture_actions()
+        assert jumpers == sum({1 << action[0] for action in captures})
+        if not captures:
+            assert steppers == sum({1 << action[0] for action in state.get_all_actions()})
+
+def test_captures_are_forced():
+    num_capture_states = 0
+    for state in random_states(seed = 4, num_games = 10):
+        captures = state.get_capture_actions()
+        if captures:
+            num_capture_states += 1
+            assert sorted(state.get_all_actions()) == sorted(captures)
+            assert all(CheckersGameState.is_jump(action) for action in captures)
+    assert num_capture_states > 0
+
+def test_multi_jump_is_one_action():
+    captured, landing = JUMPS_DOWN[1][0]
+    second_captured, second_landing = JUMPS_DOWN[landing][0]
+    state = CheckersGameState(1 << 1, 1 << captured | 1 << second_captured, 0, None, 0, None, BLACK)
+    assert state.get_all_actions() == [(1, landing, second_landing)]
+    next_state = state.generate_next_state((1, landing, second_landing))
+    assert (next_state.black, next_state.red) == (1 << second_landing, 0)
+
+def test_crowning_ends_the_capture():
+    # A black man jumps onto the king row, next to a red piece that a king could jump back over
+    square = next(s for s in range(32) if any(landing >= 28 for captured, landing in JUMPS_DOWN[s]))
+    captured, landing = next((c, l) for c, l in JUMPS_DOWN[square] if l >= 28)
+    second_captured = next(c for c, l in JUMPS_UP[landing] if c != captured)
+    state = CheckersGameState(1 << square, 1 << captured | 1 << second_captured, 0, None, 0, None, BLACK)
+    assert state.get_all_actions() == [(square, landing)]
+    assert state.generate_next_state((square, landing)).kings == 1 << landing
@@ -0,0 +1,70 @@
+import random
+import pytest
+from multiprocessing import Pool
+from checkersgamestate import CheckersGameState, BLACK
+
+algorithms = pytest.importorskip("algorithms")
+util_eval = pytest.importorskip("util_eval")
+
+class CopyingCheckersGameState(CheckersGameState):
+    """ The same game, searched by allocating a node per action. """
+    supports_make_move = False
+
+def stop_after(num_simulations):
+    calls = []
+    def state_callback_fn(state, value):
+        calls.append(value)
+        return len(calls) >= num_simulations
+    return state_callback_fn
+
+def grow_tree(state, num_simulations, seed = 0):
+    random.seed(seed)
+    return algorithms.build_monte_carlo_tree(state, util_eval.faster_endgame_utility, 1000, float('inf'),
+                                             stop_after(num_simulations))
+
+def test_visit_counts_add_up():
+    visits, value_sums, first_child, num_children, actions, num_simulations = grow_tree(
+        CheckersGameState.defaultInitialState(), 50)
+    assert num_simulations == visits[0] == 50
+    root_children = range(first_child[0], first_child[0] + num_children[0])
+    assert sum(visits[c] for c in root_children) == 50
+    assert [actions[c] for c in root_children] == CheckersGameState.defaultInitialState().get_all_actions()
+
+def test_make_move_grows_the_same_tree():
+    state = CheckersGameState.defaultInitialState()
+    copying_state = CopyingCheckersGameState(state.black, state.red, state.kings, None, 0, None, BLACK)
+    in_place_tree = grow_tree(state, 50)
+    copying_tree = grow_tree(copying_state, 50)
+    assert [list(a) for a in in_place_tree[:5]] == [list(a) for a in copying_tree[:5]]
+
+def test_initial_state_is_unchanged():
+    state = CheckersGameState.defaultInitialState()
+    before = (state.black, state.red, state.kings, state.zobrist_hash, state.path_length, state.current_player)
+    action, leaf_state, exp_util, num_simulations = algorithms.MonteCarloTreeSearch(
+        state, util_eval.faster_endgame_utility, time_limit = 0.2)
+    assert (state.black, state.red, state.kings, state.zobrist_hash, state.path_length, state.current_player) == before
+    assert action in state.get_all_actions()
+    assert num_simulations > 0
+    assert leaf_state.get_path_length() >= 1
+
+def test_root_parallel_visit_counts_are_the_sum_of_the_workers():
+    state = CheckersGameState.defaultInitialState()
+    results = [algorithms.monte_carlo_root_statistics(state, util_eval.faster_endgame_utility, 1000, 0.1, seed)
+               for seed in (1, 2)]
+    visits, value_sums, num_simulations = algorithms.merge_root_statistics(results)
+    for action in state.get_all_actions():
+        assert visits[action] == sum(dict(zip(r[0], r[1]))[action] for r in results)
+        assert value_sums[action] == sum(dict(zip(r[0], r[2]))[action] for r in results)
+    assert num_simulations == sum(r[3] for r in results) == sum(visits.values())
+
+def test_root_parallel_search_with_a_reused_pool():
+    state = CheckersGameState.defaultInitialState()
+    counter = {'num_simulations': 0}
+    with Pool(2) as pool:
+        for _ in range(2):
+            action, child_state, exp_util, num_simulations = algorithms.MonteCarloTreeSearch(
+                state, util_eval.faster_endgame_utility, time_limit = 0.2, counter = counter, workers = 2, pool = pool)
+            assert action in state.get_all_actions()
+            assert child_state == state.generate_next_state(action)
+            assert num_simulations > 0
+    assert counter['num_simulations'] > num_simulations
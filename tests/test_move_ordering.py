@@ -0,0 +1,29 @@
+from move_ordering import MoveOrdering
+
+def test_killers_per_ply_most_recent_first():
+    ordering = MoveOrdering(num_killers = 2)
+    for action in [(1, 5), (2, 6), (1, 5), (3, 7)]:
+        ordering.record_cutoff(action, 2, 1)
+    assert ordering.killers[2] == [(3, 7), (1, 5)]
+    assert ordering.killers[0] == ordering.killers[1] == []
+
+def test_history_weighs_cutoffs_by_remaining_depth():
+    ordering = MoveOrdering()
+    ordering.record_cutoff((1, 5), 0, 3)
+    ordering.record_cutoff((1, 10, 19), 4, 1)
+    ordering.record_cutoff((1, 19), 4, 2)
+    # Multi-jumps count for their (from, to) squares
+    assert ordering.history == {(1, 5): 9, (1, 19): 5}
+
+def test_order_killers_then_history():
+    ordering = MoveOrdering()
+    ordering.record_cutoff((2, 6), 0, 4)
+    ordering.record_cutoff((3, 7), 0, 1)
+    ordering.record_cutoff((8, 12), 1, 1)
+    actions = [(0, 4), (1, 5), (8, 12), (3, 7), (2, 6)]
+    # At ply 1, the killer first, then by history, then the rest in their order
+    assert ordering.order(actions, 1) == [(8, 12), (2, 6), (3, 7), (0, 4), (1, 5)]
+    assert ordering.order(actions, 0) == [(3, 7), (2, 6), (8, 12), (0, 4), (1, 5)]
+    assert ordering.order(actions, 5) == [(2, 6), (8, 12), (3, 7), (0, 4), (1, 5)]
+    ordering.clear()
+    assert ordering.order(actions, 0) == actions
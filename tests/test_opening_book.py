@@ -0,0 +1,51 @@
+import pytest
+from checkersgamestate import CheckersGameState
+
+opening_book = pytest.importorskip("opening_book")
+util_eval = pytest.importorskip("util_eval")
+
+def test_built_book_plays_legal_moves(tmp_path):
+    filename = str(tmp_path / "book.ckob")
+    initial_state = CheckersGameState.defaultInitialState()
+    opening_book.build_opening_book(filename, initial_state, util_eval.faster_endgame_utility,
+                                    util_eval.checkers_heuristic_eval_diff, plies = 2, time_limit = 0.05)
+    book = opening_book.OpeningBook(filename)
+    try:
+        assert book.num_records == 1 + len(initial_state.get_all_actions())
+        for action in initial_state.get_all_actions():
+            state = initial_state.generate_next_state(action)
+            book_action, _ = book.lookup(state, util_eval.faster_endgame_utility)
+            assert book_action in state.get_all_actions()
+        # Two plies in: not in the book
+        state = state.generate_next_state(state.get_all_actions()[0])
+        assert book.lookup(state, util_eval.faster_endgame_utility) is None
+        assert book.num_hits == len(initial_state.get_all_actions())
+    finally:
+        book.close()
+
+def test_lookup_shifts_wins_to_the_path_length(tmp_path):
+    filename = str(tmp_path / "book.ckob")
+    state = CheckersGameState.defaultInitialState()
+    action = state.get_all_actions()[0]
+    opening_book.write_opening_book(filename, [(state.zobrist_hash, 1995.0,
+                                                CheckersGameState.action_to_str(action).encode('ascii'))])
+    book = opening_book.OpeningBook(filename)
+    try:
+        assert book.lookup(state, util_eval.faster_endgame_utility) == (action, 1995)
+        state.path_length = 10
+        assert book.lookup(state, util_eval.faster_endgame_utility) == (action, 1985)
+        assert book.lookup(state, util_eval.basic_endgame_utility) == (action, 1995)
+    finally:
+        book.close()
+
+def test_agents_only_ask_for_a_book_for_games_with_zobrist_hashes(monkeypatch):
+    game_playing_agents = pytest.importorskip("game_playing_agents")
+    tictactoe_gamestate = pytest.importorskip("tictactoe_gamestate")
+    def no_input(prompt):
+        raise AssertionError("Asked: " + prompt)
+    monkeypatch.setattr("builtins.input", no_input)
+    agent = game_playing_agents.MinimaxSearchAgent(tictactoe_gamestate.TicTacToeGameState)
+    agent.set_up(name = "Minimax", util_fn = util_eval.faster_endgame_utility, cutoff = 2,
+                 eval_fn = util_eval.always_zero, random_move_order = False, transposition_table = False,
+                 verbose = False, stats_file = None, profile_every = 0)
+    assert agent.opening_book is None
@@ -0,0 +1,23 @@
+from checkersgamestate import CheckersGameState
+from perft import perft, divide
+
+STARTING_POSITION_COUNTS = [1, 7, 49, 302, 1469, 7361, 36768, 179740]
+
+def test_starting_position_counts():
+    state = CheckersGameState.defaultInitialState()
+    for depth, count in enumerate(STARTING_POSITION_COUNTS[:6]):
+        assert perft(state, depth) == count
+
+def test_hash_table_counts():
+    state = CheckersGameState.defaultInitialState()
+    table = {}
+    assert [perft(state, depth, table) for depth in range(len(STARTING_POSITION_COUNTS))] == STARTING_POSITION_COUNTS
+    assert len(table) < STARTING_POSITION_COUNTS[-2]
+
+def test_divide_adds_up_and_leaves_the_state_unchanged():
+    state = CheckersGameState.defaultInitialState()
+    before = state.get_all_features(), state.zobrist_hash, state.path_length
+    counts = divide(state, 4)
+    assert [action for action, count in counts] == state.get_all_actions()
+    assert sum(count for action, count in counts) == STARTING_POSITION_COUNTS[4]
+    assert (state.get_all_features(), state.zobrist_hash, state.path_length) == before
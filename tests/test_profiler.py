@@ -0,0 +1,50 @@
+import pytest
+from checkersgamestate import CheckersGameState
+from profiler import SamplingProfiler, STATE_LAYERS
+
+algorithms = pytest.importorskip("algorithms")
+util_eval = pytest.importorskip("util_eval")
+
+def middle_game():
+    state = CheckersGameState.defaultInitialState()
+    for i in [4, 2, 0, 0, 6, 7, 3, 0, 0, 0, 5, 7, 3, 6, 0, 0]:
+        state = state.generate_next_state(state.get_all_actions()[i])
+    return state.clone_as_root()
+
+def profile(search_alg, state, **kwargs):
+    methods = {layer: CheckersGameState.__dict__.get(layer) for layer in STATE_LAYERS}
+    profiler = SamplingProfiler(sample_every = 1)
+    util_fn, eval_fn, state_callback_fn = profiler.start(state, util_eval.faster_endgame_utility,
+        util_eval.checkers_heuristic_eval_diff, lambda state, state_value: False)
+    if 'eval_fn' in kwargs:
+        kwargs['eval_fn'] = eval_fn
+    try:
+        search_alg(state, util_fn, state_callback_fn = state_callback_fn, **kwargs)
+    finally:
+        profiler.stop()
+    # The class's own methods are back, and the inherited ones inherited again
+    assert {layer: CheckersGameState.__dict__.get(layer) for layer in STATE_LAYERS} == methods
+    return profiler, {stack.rsplit(';', 1)[-1] for stack in profiler.stacks}
+
+def test_alpha_beta_layers():
+    profiler, layers = profile(algorithms.MinimaxAlphaBetaSearch, middle_game(),
+                               eval_fn = util_eval.checkers_heuristic_eval_diff, cutoff = 3)
+    assert {'is_endgame_state', 'get_cached_actions', 'generate_next_state', 'eval_fn'} <= layers
+    assert all(stack.split(";")[0] == "profile" for stack in profiler.stacks)
+    assert len(profiler.samples) == profiler.num_callbacks > 0
+
+def test_monte_carlo_layers():
+    profiler, layers = profile(algorithms.MonteCarloTreeSearch, middle_game(), time_limit = 0.2)
+    assert {'make_move', 'unmake_move', 'util_fn'} <= layers
+
+def test_write_collapsed(tmp_path):
+    profiler, _ = profile(algorithms.MinimaxAlphaBetaSearch, middle_game(),
+                          eval_fn = util_eval.checkers_heuristic_eval_diff, cutoff = 2)
+    filename = str(tmp_path / "search.folded")
+    profiler.write_collapsed(filename)
+    with open(filename) as f:
+        lines = f.read().splitlines()
+    assert lines
+    for line in lines:
+        stack, microseconds = line.rsplit(' ', 1)
+        assert stack.startswith("profile") and int(microseconds) > 0
@@ -0,0 +1,65 @@
+import pytest
+from transposition_table import TranspositionTable
+from checkersgamestate import CheckersGameState, BLACK
+
+algorithms = pytest.importorskip("algorithms")
+util_eval = pytest.importorskip("util_eval")
+
+def progressive_deepening(state, table, time_limit):
+    counter = {}
+    best_actions, _, best_exp_utils, max_cutoff = algorithms.ProgressiveDeepening(
+        state, util_eval.faster_endgame_utility, util_eval.checkers_heuristic_eval_diff, time_limit,
+        counter = counter, transposition_table = table)
+    return best_actions[-1], best_exp_utils[-1], max_cutoff, counter
+
+def test_keeps_deepening_with_a_table_kept_across_moves():
+    table = TranspositionTable()
+    state = CheckersGameState.defaultInitialState()
+    for move in range(4):
+        action, _, max_cutoff, counter = progressive_deepening(state, table, 0.1)
+        # Values stored by the previous moves' searches are not final: they must not end the deepening
+        assert max_cutoff > 1
+        assert counter['num_unresolved_leaves'][1] > 0
+        state = state.generate_next_state(action)
+
+def test_stops_once_solved():
+    # Black to move captures the last red piece
+    state = CheckersGameState(1 << 0, 1 << 5, 0, None, 10, None, BLACK)
+    action, exp_util, max_cutoff, counter = progressive_deepening(state, TranspositionTable(1), 10)
+    assert max_cutoff == 1
+    assert exp_util == 2000 - 11
+    assert counter['num_unresolved_leaves'] == [0, 0]
+
+def test_root_is_searched_despite_a_table_entry():
+    table = TranspositionTable(1)
+    state = CheckersGameState.defaultInitialState()
+    first = algorithms.MinimaxAlphaBetaSearch(state, util_eval.faster_endgame_utility,
+                                              util_eval.checkers_heuristic_eval_diff, 3, transposition_table = table)
+    counter = {'num_nodes_seen': 0, 'num_endgame_evals': 0, 'num_heuristic_evals': 0}
+    second = algorithms.MinimaxAlphaBetaSearch(state, util_eval.faster_endgame_utility,
+                                               util_eval.checkers_heuristic_eval_diff, 3, counter = counter,
+                                               transposition_table = table)
+    assert second[0] == first[0] and second[2] == first[2]
+    assert counter['num_nodes_seen'] > 1
+
+def middle_game():
+    state = CheckersGameState.defaultInitialState()
+    for i in [4, 2, 0, 0, 6, 7, 3, 0, 0, 0, 5, 7, 3, 6, 0, 0]:
+        state = state.generate_next_state(state.get_all_actions()[i])
+    return state.clone_as_root()
+
+@pytest.mark.parametrize("aspiration_window", [0.01, 0.5, 5])
+def test_aspiration_windows_find_the_full_window_values(aspiration_window):
+    state = middle_game()
+    results = []
+    for window in (0, aspiration_window):
+        counter = {}
+        _, _, best_exp_utils, _ = algorithms.ProgressiveDeepening(
+            state, util_eval.faster_endgame_utility, util_eval.checkers_heuristic_eval_diff, 0.5,
+            counter = counter, aspiration_window = window)
+        results.append(best_exp_utils)
+    depth = min(len(results[0]), len(results[1]))
+    assert depth >= 3
+    assert results[1][:depth] == results[0][:depth]
+    if aspiration_window < 0.1:
+        assert counter['num_aspiration_researches'][0] > 0
@@ -0,0 +1,70 @@
+import json
+import pytest
+from search_stats import SearchStats
+
+def test_counts_per_ply_and_rates():
+    stats = SearchStats()
+    assert stats.first_move_cutoff_rate() is None and stats.table_hit_rate() is None
+    stats.record_nodes(0)
+    stats.record_nodes(2, 5)
+    stats.record_cutoff(1, 0)
+    stats.record_cutoff(1, 3)
+    stats.record_cutoff(2, 0)
+    stats.record_table(4, 1, 2)
+    assert stats.nodes_per_ply == [1, 0, 5]
+    assert stats.cutoffs_per_ply == [0, 2, 1]
+    assert stats.first_move_cutoffs_per_ply == [0, 1, 1]
+    assert stats.first_move_cutoff_rate() == pytest.approx(2 / 3)
+    assert stats.table_hit_rate() == 0.25
+
+def test_timed_adds_up():
+    stats = SearchStats()
+    timed_sum = stats.timed(sum, 'evaluation_time')
+    assert timed_sum([1, 2]) == 3
+    assert stats.evaluation_time > 0
+
+def test_merge():
+    stats, other = SearchStats(), SearchStats()
+    stats.record_nodes(1)
+    other.record_nodes(3, 2)
+    other['num_nodes_seen'] = 7
+    other.record_cutoff(0, 0)
+    other.record_table(1, 1, 1)
+    other.elapsed_time = 0.5
+    other.principal_variation = [(8, 12)]
+    stats.merge(other)
+    stats.merge({'num_nodes_seen': 1, 'num_quiescence_nodes': 4})
+    assert stats['num_nodes_seen'] == 8 and stats['num_quiescence_nodes'] == 4
+    assert stats.nodes_per_ply == [0, 1, 0, 2]
+    assert (stats.cutoffs_per_ply, stats.first_move_cutoffs_per_ply) == ([1], [1])
+    assert (stats.table_probes, stats.table_hits, stats.table_stores) == (1, 1, 1)
+    assert stats.elapsed_time == 0.5 and stats.principal_variation == [(8, 12)]
+
+def test_json_lines(tmp_path):
+    filename = str(tmp_path / "stats.jsonl")
+    stats = SearchStats()
+    stats.record_nodes(0)
+    stats.principal_variation = [(8, 12), (21, 17)]
+    action_to_str = lambda action: "{}-{}".format(*action)
+    stats.dump_json(filename, action_to_str, agent = "test")
+    stats.dump_json(filename, action_to_str, agent = "test again")
+    with open(filename) as f:
+        records = [json.loads(line) for line in f]
+    assert [record['agent'] for record in records] == ["test", "test again"]
+    assert records[0]['principal_variation'] == ["8-12", "21-17"]
+    assert records[0]['nodes_per_ply'] == [1] and records[0]['num_nodes_seen'] == 0
+    assert "Principal variation: 8-12 21-17" in stats.summary(action_to_str)
+
+def test_alpha_beta_records_stats():
+    algorithms = pytest.importorskip("algorithms")
+    util_eval = pytest.importorskip("util_eval")
+    from checkersgamestate import CheckersGameState
+    state = CheckersGameState.defaultInitialState()
+    stats = SearchStats()
+    action, _, _, _ = algorithms.MinimaxAlphaBetaSearch(state, util_eval.faster_endgame_utility,
+        util_eval.checkers_heuristic_eval_diff, 4, counter = stats, transposition_table = True)
+    assert sum(stats.nodes_per_ply) == stats['num_nodes_seen']
+    assert len(stats.nodes_per_ply) == 5 and stats.nodes_per_ply[0] == 1
+    assert sum(stats.cutoffs_per_ply) > 0 and stats.table_stores > 0
+    assert stats.principal_variation[0] == action and len(stats.principal_variation) == 4
+    assert 0 < stats.evaluation_time + stats.move_generation_time < stats.elapsed_time
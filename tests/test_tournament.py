@@ -0,0 +1,47 @@
+import pytest
+
+tournament = pytest.importorskip("tournament")
+
+def config(**kwargs):
+    config = {"game": "checkers",
+              "agents": {"random": {"type": "random"}, "alphabeta": {"type": "alphabeta", "cutoff": 2, "eval_fn": "diff"}},
+              "games_per_pair": 2, "max_moves": 200, "workers": 2}
+    config.update(kwargs)
+    return config
+
+@pytest.mark.parametrize("agent_type", list(tournament.PLAYING_AGENTS))
+def test_agents_are_built_without_asking(agent_type, monkeypatch):
+    def no_input(prompt):
+        raise AssertionError("Asked: " + prompt)
+    monkeypatch.setattr("builtins.input", no_input)
+    agent = tournament.build_agent(tournament.CheckersGameState, agent_type, {"type": agent_type, "time_limit": 0.05})
+    assert agent.name == agent_type
+
+def test_play_game():
+    winner, num_moves, latencies = tournament.play_game(config(), "alphabeta", "random", 0, 0)
+    assert winner in ("alphabeta", "random", None)
+    assert 0 < num_moves <= 200
+    assert len(latencies["alphabeta"]) == (num_moves + 1) // 2 and len(latencies["random"]) == num_moves // 2
+
+def test_run_tournament():
+    report = tournament.run_tournament(config(max_moves = 20, random_opening_plies = 2))
+    assert report["games"] == 2
+    pair, = report["pairs"]
+    assert (pair["agent"], pair["opponent"]) == ("random", "alphabeta")
+    assert pair["wins"] + pair["losses"] + pair["draws"] == 2
+    assert sum(agent["moves"] for agent in report["agents"].values()) == report["moves"]
+    assert sum(agent["elo"] for agent in report["agents"].values()) == pytest.approx(3000)
+
+def test_elo():
+    assert tournament.elo_difference(0.5) == 0
+    assert tournament.elo_difference(0.75) == pytest.approx(190.85, abs = 0.01)
+    assert tournament.elo_difference(1) == float('inf')
+    ratings = tournament.elo_ratings({("a", "b"): (3, 3, 2)})
+    assert ratings["a"] == pytest.approx(1500) and ratings["b"] == pytest.approx(1500)
+    ratings = tournament.elo_ratings({("a", "b"): (10, 0, 0), ("b", "c"): (5, 5, 0)})
+    assert ratings["a"] > ratings["b"] == pytest.approx(ratings["c"], abs = 0.01)
+    assert max(ratings.values()) < float('inf')
+
+def test_percentile():
+    assert tournament.percentile([], 50) is None
+    assert [tournament.percentile([1, 2, 3, 4], p) for p in (25, 50, 90, 100)] == [1, 2, 4, 4]
@@ -0,0 +1,98 @@
+import pytest
+from transposition_table import TranspositionTable, EXACT, LOWER_BOUND, UPPER_BOUND
+from checkersgamestate import CheckersGameState, BLACK
+
+INF = float('inf')
+
+def make_table(num_slots):
+    table = TranspositionTable(size_mb = num_slots * TranspositionTable.BYTES_PER_ENTRY / 2**20)
+    assert table.num_slots == num_slots
+    return table
+
+def test_store_and_lookup():
+    table = make_table(8)
+    assert table.lookup(3) is None
+    assert table.store(3, 2, 1.5, LOWER_BOUND, "move")
+    assert table.lookup(3) == (2, 1.5, LOWER_BOUND, "move")
+    assert table.get_best_move(3) == "move"
+    assert table.get_best_move(11) is None
+    assert (table.num_probes, table.num_hits, table.num_stores) == (2, 1, 1)
+
+def test_same_key_is_always_replaced():
+    table = make_table(8)
+    table.store(3, 5, 1.0)
+    assert table.store(3, 1, 2.0, UPPER_BOUND)
+    assert table.lookup(3) == (1, 2.0, UPPER_BOUND, None)
+
+def test_replacement_by_depth_within_a_search():
+    table = make_table(8)
+    table.store(3, 4, 1.0)
+    # 11 maps to the same slot as 3: a shallower entry does not replace a deeper one
+    assert not table.store(11, 2, 2.0)
+    assert table.lookup(3) == (4, 1.0, EXACT, None)
+    assert table.lookup(11) is None
+    assert table.store(11, 4, 2.0)
+    assert table.lookup(3) is None
+    assert table.lookup(11) == (4, 2.0, EXACT, None)
+
+def test_replacement_by_age():
+    table = make_table(8)
+    table.store(3, INF, 1.0)
+    table.new_search()
+    # Entries of older searches are kept, but replaced first
+    assert table.lookup(3) == (INF, 1.0, EXACT, None)
+    assert table.store(11, 0, 2.0)
+    assert table.lookup(11) == (0, 2.0, EXACT, None)
+
+def test_clear():
+    table = make_table(8)
+    table.store(3, 1, 1.0, EXACT, "move")
+    assert table.num_entries() == 1
+    table.new_search()
+    table.clear()
+    assert table.num_entries() == 0
+    assert (table.depths, table.values, table.best_moves, table.ages) == ([0] * 8, [0] * 8, [None] * 8, [0] * 8)
+    assert (table.age, table.num_probes, table.num_hits, table.num_stores) == (0, 0, 0, 0)
+    assert table.lookup(3) is None
+
+def win_in_one(path_length):
+    """ Black to move at path_length, capturing the last red piece. """
+    return CheckersGameState(1 << 0, 1 << 5, 0, None, path_length, None, BLACK)
+
+@pytest.mark.parametrize("search_name", ["MaximizingDFS", "MinimaxSearch", "ExpectimaxSearch",
+                                         "MinimaxAlphaBetaSearch", "IterativeMinimaxAlphaBetaSearch"])
+def test_endgame_values_follow_the_path_length(search_name):
+    algorithms = pytest.importorskip("algorithms")
+    util_eval = pytest.importorskip("util_eval")
+    search = getattr(algorithms, search_name)
+    table = TranspositionTable(1)
+    for path_length in (10, 20, 11):
+        _, _, exp_util, _ = search(win_in_one(path_length), util_eval.faster_endgame_utility,
+                                   cutoff = 3, transposition_table = table)
+        assert exp_util == 2000 - (path_length + 1)
+
+@pytest.mark.parametrize("search_name", ["MaximizingDFS", "MinimaxSearch", "ExpectimaxSearch",
+                                         "MinimaxAlphaBetaSearch", "IterativeMinimaxAlphaBetaSearch"])
+def test_root_is_searched_despite_a_table_entry(search_name):
+    algorithms = pytest.importorskip("algorithms")
+    util_eval = pytest.importorskip("util_eval")
+    search = getattr(algorithms, search_name)
+    table = TranspositionTable(1)
+    state = CheckersGameState.defaultInitialState()
+    first = search(state, util_eval.faster_endgame_utility, util_eval.checkers_heuristic_eval_diff, 2,
+                   transposition_table = table)
+    counter = {'num_nodes_seen': 0, 'num_endgame_evals': 0, 'num_heuristic_evals': 0}
+    second = search(state, util_eval.faster_endgame_utility, util_eval.checkers_heuristic_eval_diff, 2,
+                    counter = counter, transposition_table = table)
+    assert (second[0], second[2]) == (first[0], first[2])
+    assert counter['num_nodes_seen'] > 1
+
+def test_mtdf_starts_one_search_per_call():
+    algorithms = pytest.importorskip("algorithms")
+    util_eval = pytest.importorskip("util_eval")
+    table = TranspositionTable(1)
+    counter = {'num_nodes_seen': 0, 'num_endgame_evals': 0, 'num_heuristic_evals': 0}
+    algorithms.MTDfSearch(CheckersGameState.defaultInitialState(), util_eval.faster_endgame_utility,
+                          util_eval.checkers_heuristic_eval_diff, 3, counter = counter, transposition_table = table)
+    assert counter['num_mtdf_passes'] > 1
+    assert table.age == 1
@@ -0,0 +1,32 @@
+import random
+import pytest
+from checkersgamestate import CheckersGameState, BLACK, RED
+
+util_eval = pytest.importorskip("util_eval")
+
+def random_states(seed = 0, num_states = 200):
+    rng = random.Random(seed)
+    state = CheckersGameState.defaultInitialState()
+    states = []
+    while len(states) < num_states:
+        actions = state.get_all_actions()
+        if not actions:
+            state = CheckersGameState.defaultInitialState()
+            continue
+        state = state.generate_next_state(rng.choice(actions))
+        states.append(state)
+    return states
+
+@pytest.mark.parametrize("player", [BLACK, RED])
+def test_batch_evaluation_matches_one_by_one(player):
+    states = random_states()
+    expected = [util_eval.checkers_heuristic_eval_diff(state, player) for state in states]
+    assert list(util_eval.batch_evaluate(util_eval.checkers_heuristic_eval_diff, states, player)) == pytest.approx(expected)
+    assert list(util_eval.batch_evaluate(util_eval.always_zero, states, player)) == [0] * len(states)
+
+def test_vectorized_evaluation_matches_one_by_one():
+    pytest.importorskip("numpy")
+    states = random_states(seed = 1)
+    for player in (BLACK, RED):
+        scores = util_eval.checkers_heuristic_eval_diff_batch(states, player)
+        assert scores.tolist() == pytest.approx([util_eval.checkers_heuristic_eval_diff(state, player) for state in states])
@@ -0,0 +1,246 @@
+"""
+Play many headless games between pairs of agents, in parallel, and report their results.
+
+Usage:
+    python tournament.py CONFIG_FILE [OUTPUT_FILE]
+    CONFIG_FILE is a JSON file describing the tournament (see below)
+    OUTPUT_FILE, if given, receives the results as JSON
+
+Agents are built from the config with set_up(**settings) instead of input() prompts,
+and games are played without printing or sleeping, spread over a ProcessPoolExecutor.
+The config is a JSON object with:
+    game: one of GAME_CLASSES (e.g. "checkers")
+    initial_state: a path to a text file for readFromFile, or "default" (the default)
+    agents: {agent name: settings}, where settings has a "type" from PLAYING_AGENTS
+        and any set_up settings. util_fn and eval_fn are names from the game's
+        all_fn_dicts entry, and "inf" stands for INF. Missing settings take the
+        values of DEFAULT_SETTINGS, so that no setting is asked for.
+    pairs: the [agent name, agent name] pairs to play (default: every pair of agents)
+    games_per_pair: the number of games per pair (default 10), half of them with
+        each agent moving first
+    random_opening_plies: the number of random actions played from the initial state
+        before the agents take over, so that games differ (default 0). Both games of a
+        pair with swapped colors start from the same random opening.
+    max_moves: the number of actions after which a game is scored as a draw (default 300)
+    workers: the number of processes playing games (default: the number of cores)
+    seed: the seed of the random openings and of the agents' random choices (default 0)
+
+For each pair, the results are the wins, losses and draws of the first agent and the
+Elo difference they imply. Each agent also gets an Elo rating fitted on all games
+(see elo_ratings), and the percentiles of its time per choose_action call.
+"""
+import json
+import random
+from sys import argv
+from math import log10
+from time import time
+from itertools import combinations
+from multiprocessing import cpu_count
+from concurrent.futures import ProcessPoolExecutor
+from connectfour_gamestate import ConnectFourGameState
+from tictactoe_gamestate import TicTacToeGameState
+from nim_gamestate import NimGameState
+from roomba_gamestate import RoombaRaceGameState
+from checkersgamestate import CheckersGameState
+from game_playing_agents import *
+
+GAME_CLASSES = {"checkers": CheckersGameState, "connectfour": ConnectFourGameState, "tictactoe": TicTacToeGameState,
+                "nim": NimGameState, "roomba": RoombaRaceGameState}
+
+PLAYING_AGENTS = {"random": RandChoiceAgent,
+                  "maxdfs": MaximizingDFSAgent, "minimax": MinimaxSearchAgent,
+                  "expectimax": ExpectimaxSearchAgent, "alphabeta": MinimaxAlphaBetaSearchAgent,
+                  "pvs": PrincipalVariationSearchAgent,
+                  "progressive": ProgressiveDeepeningSearchAgent, "mtdf": MTDfSearchAgent,
+                  "montecarlo": MonteCarloTreeSearchAgent}
+
+DEFAULT_SETTINGS = {
+    "util_fn": "faster", "eval_fn": "zero",
+    "cutoff": INF, "time_limit": 1.0, "exploration_bias": 1000,
+    "random_move_order": False, "transposition_table": False,
+    "quiescence": False, "custom_move_ordering": False, "aspiration_window": 0,
+    "workers": 1, "opening_book": None, "tablebase": None, "stats_file": None, "profile_every": 0,
+    "verbose": False, "super_verbose": False,
+}
+
+LATENCY_PERCENTILES = (50, 90, 99, 100)
+
+def build_agent(game_class, name, settings):
+    """ Returns a set up agent of settings["type"], without asking for any setting. """
+    settings = dict(DEFAULT_SETTINGS, **settings)
+    agent_class = PLAYING_AGENTS[settings.pop("type")]
+    fn_dicts = all_fn_dicts[game_class]
+    settings["util_fn"] = fn_dicts['endgame_util_fn_dict'][settings["util_fn"]]
+    settings["eval_fn"] = fn_dicts['heuristic_eval_fn_dict'][settings["eval_fn"]]
+    for key, value in settings.items():
+        if value == "inf":
+            settings[key] = INF
+    agent = agent_class(game_class)
+    agent.set_up(name = name, **settings)
+    return agent
+
+def random_opening(initial_state, plies, seed):
+    """ Returns the state reached from initial_state by plies random actions (fewer if the game ends). """
+    rng = random.Random(seed)
+    state = initial_state
+    for _ in range(plies):
+        if state.is_endgame_state():
+            break
+        state = state.generate_next_state(rng.choice(state.get_cached_actions()))
+    return state.clone_as_root()
+
+def play_game(config, first_agent_name, second_agent_name, opening_seed, seed):
+    """
+    Plays one game, first_agent_name moving first, in the process it is called in.
+    Returns (winner, num_moves, latencies): winner is the name of the winning agent,
+    or None for a draw; latencies maps each agent name to the seconds of its choose_action calls.
+    """
+    random.seed(seed)
+    game_class = GAME_CLASSES[config["game"]]
+    initial_file = config.get("initial_state", "default")
+    initial_state = game_class.defaultInitialState() if initial_file == 'default' else game_class.readFromFile(initial_file)
+    game_state = random_opening(initial_state, config.get("random_opening_plies", 0), opening_seed)
+
+    names = {player : name for player, name in zip(game_class.player_numbers, (first_agent_name, second_agent_name))}
+    agents = {player : build_agent(game_class, name, config["agents"][name]) for player, name in names.items()}
+    latencies = {name : [] for name in names.values()}
+
+    num_moves = 0
+    while not game_state.is_endgame_state():
+        if num_moves >= config.get("max_moves", 300):
+            return None, num_moves, latencies
+        current_player = game_state.get_current_player()
+        start_time = time()
+        action, exp_util = agents[current_player].choose_action(game_state)
+        latencies[names[current_player]].append(time() - start_time)
+        if action is None:
+            # Forfeit
+            return names[current_player % 2 + 1], num_moves, latencies
+        game_state = game_state.generate_next_state(action)
+        num_moves += 1
+
+    winning_player = game_state.endgame_winner()
+    return (names[winning_player] if winning_player else None), num_moves, latencies
+
+def elo_difference(score):
+    """ The Elo difference that makes score (the fraction of points won, draws counting half) expected. """
+    if score <= 0:
+        return -INF
+    if score >= 1:
+        return INF
+    return -400 * log10(1 / score - 1)
+
+def elo_ratings(results, iterations = 1000):
+    """
+    Fits Elo ratings (with an average of 1500) to results, a dict mapping
+    (agent, opponent) pairs to (wins, losses, draws) of agent, by maximum likelihood
+    under the Bradley-Terry model, with minorization-maximization updates.
+    Every pair counts one extra draw, so that the ratings stay finite when
+    an agent wins (or loses) all its games.
+    """
+    agents = sorted({agent for pair in results for agent in pair})
+    points = {agent : 0.0 for agent in agents}
+    games = {}
+    for (agent, opponent), (wins, losses, draws) in results.items():
+        points[agent] += wins + 0.5 * draws + 0.5
+        points[opponent] += losses + 0.5 * draws + 0.5
+        for a, b in ((agent, opponent), (opponent, agent)):
+            games[(a, b)] = games.get((a, b), 0) + wins + losses + draws + 1
+
+    strength = {agent : 1.0 for agent in agents}
+    for _ in range(iterations):
+        for agent in agents:
+            denominator = sum(num_games / (strength[agent] + strength[opponent])
+                              for (a, opponent), num_games in games.items() if a == agent)
+            if denominator > 0:
+                strength[agent] = points[agent] / denominator
+    ratings = {agent : 400 * log10(strength[agent]) for agent in agents}
+    mean = sum(ratings.values()) / len(ratings) if ratings else 0
+    return {agent : 1500 + rating - mean for agent, rating in ratings.items()}
+
+def percentile(sorted_values, p):
+    """ The p-th percentile (nearest rank) of a sorted list, or None if it is empty. """
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+def run_tournament(config, verbose = False):
+    """ Plays all the games of config (see the module doc string) and returns the results as a dict. """
+    pairs = [tuple(pair) for pair in config.get("pairs", combinations(config["agents"], 2))]
+    games_per_pair = config.get("games_per_pair", 10)
+    seed = config.get("seed", 0)
+
+    games = []
+    for pair_index, (agent, opponent) in enumerate(pairs):
+        for game_index in range(games_per_pair):
+            # Games 2k and 2k + 1 share their opening, with the colors swapped
+            opening_seed = (seed, pair_index, game_index // 2)
+            first, second = (agent, opponent) if game_index % 2 == 0 else (opponent, agent)
+            games.append((first, second, hash(opening_seed), hash((seed, pair_index, game_index))))
+
+    results = {pair : [0, 0, 0] for pair in pairs}
+    latencies = {name : [] for pair in pairs for name in pair}
+    num_moves = 0
+    start_time = time()
+    with ProcessPoolExecutor(config.get("workers", cpu_count())) as executor:
+        futures = [(pair_index, executor.submit(play_game, config, *game))
+                   for pair_index, game in enumerate(games)]
+        for i, (game_index, future) in enumerate(futures):
+            winner, game_moves, game_latencies = future.result()
+            pair = pairs[game_index // games_per_pair]
+            results[pair][0 if winner == pair[0] else 1 if winner == pair[1] else 2] += 1
+            for name, times in game_latencies.items():
+                latencies[name].extend(times)
+            num_moves += game_moves
+            if verbose:
+                print("Game {}/{}: {} vs {}: {}".format(i + 1, len(games), games[game_index][0], games[game_index][1],
+                      "{} wins".format(winner) if winner is not None else "draw"))
+    elapsed_time = time() - start_time
+
+    ratings = elo_ratings({pair : tuple(result) for pair, result in results.items()})
+    report = {"games": len(games), "moves": num_moves, "elapsed_time": elapsed_time,
+              "games_per_sec": len(games) / elapsed_time if elapsed_time > 0 else None,
+              "pairs": [], "agents": {}}
+    for pair, (wins, losses, draws) in results.items():
+        num_games = wins + losses + draws
+        score = (wins + 0.5 * draws) / num_games if num_games else None
+        report["pairs"].append({"agent": pair[0], "opponent": pair[1], "wins": wins, "losses": losses, "draws": draws,
+                                "score": score, "elo_difference": elo_difference(score) if score is not None else None})
+    for name, times in latencies.items():
+        times.sort()
+        report["agents"][name] = {"elo": ratings.get(name), "moves": len(times),
+                                  "latency": {"p{}".format(p) : percentile(times, p) for p in LATENCY_PERCENTILES}}
+    return report
+
+def print_report(report):
+    print("{} games, {} moves in {:.1f} seconds ({:.2f} games/sec)".format(
+        report["games"], report["moves"], report["elapsed_time"], report["games_per_sec"] or 0))
+    print("{:20} {:20} {:>5} {:>5} {:>5} {:>6} {:>8}".format("agent", "opponent", "wins", "losses", "draws", "score", "elo diff"))
+    for pair in report["pairs"]:
+        print("{:20} {:20} {:5} {:5} {:5} {:6.3f} {:8.1f}".format(pair["agent"], pair["opponent"],
+              pair["wins"], pair["losses"], pair["draws"], pair["score"] or 0, pair["elo_difference"] or 0))
+    print("{:20} {:>7} {:>7} ".format("agent", "elo", "moves") + " ".join("{:>9}".format("p{} (s)".format(p)) for p in LATENCY_PERCENTILES))
+    for name, agent in sorted(report["agents"].items(), key = lambda item: -item[1]["elo"]):
+        print("{:20} {:7.1f} {:7} ".format(name, agent["elo"], agent["moves"]) +
+              " ".join("{:9.4f}".format(agent["latency"]["p{}".format(p)] or 0) for p in LATENCY_PERCENTILES))
+
+
+if __name__ == "__main__":
+    if len(argv) < 2:
+        print("Usage:    python tournament.py CONFIG_FILE [OUTPUT_FILE]")
+        quit()
+    with open(argv[1]) as f:
+        config = json.load(f)
+    if config.get("game") not in GAME_CLASSES:
+        print("game should be one of the following: {}".format(str(list(GAME_CLASSES.keys()))))
+        quit()
+    if any(settings.get("type") not in PLAYING_AGENTS for settings in config["agents"].values()):
+        print("Each agent's type should be one of the following: {}".format(str(list(PLAYING_AGENTS.keys()))))
+        quit()
+
+    report = run_tournament(config, verbose = True)
+    print_report(report)
+    if len(argv) > 2:
+        with open(argv[2], 'w') as f:
+            json.dump(report, f, indent = 1)
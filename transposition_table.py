@@ -0,0 +1,103 @@
+"""
+A size-bounded transposition table shared by the search algorithms in algorithms.py.
+
+Entries are keyed by the hash of a GameStateNode (its Zobrist hash, if it has one)
+and remember the result of searching that state:
+    depth: the remaining search depth (cutoff minus ply) the value was computed with.
+        Endgame states are stored with depth INF, since their value is final.
+    value: the (expected) utility, from the maximizer's point of view. The searches store
+        it shifted by the path length of the state (util_eval.shift_endgame_utility),
+        so that utilities depending on when the game ends hold wherever the state is reached.
+    flag: EXACT, LOWER_BOUND or UPPER_BOUND. Without alpha-beta pruning every value is EXACT.
+        With pruning, a value that failed high is only a lower bound on the true value,
+        and one that failed low is only an upper bound.
+    best_move: the best action found from that state (None for leaves), used for move ordering.
+
+Because values are from the maximizer's point of view, one table should only be
+shared by searches made for the same player (e.g. kept by one agent across moves).
+"""
+
+INF = float('inf')
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+class TranspositionTable:
+
+    """ Rough memory cost of one slot: 6 list references plus the objects they hold. """
+    BYTES_PER_ENTRY = 128
+
+    def __init__(self, size_mb = 16):
+        """
+        Creates an empty table with a fixed number of slots, chosen so that
+        a full table uses about size_mb megabytes.
+
+        The table is a set of parallel lists (one per field) indexed by key % num_slots.
+        Each key maps to exactly one slot; a new entry for a different key
+        replaces the old one only if it was stored by an older search (its age differs)
+        or was searched no deeper than the new one (replace-by-depth/age).
+        """
+        self.num_slots = max(1, int(size_mb * 2**20) // self.BYTES_PER_ENTRY)
+        self.clear()
+
+    def new_search(self):
+        """
+        Marks the start of a new search. Entries stored by earlier searches are kept
+        and may still be used, but are the first to be replaced.
+        """
+        self.age += 1
+
+    def lookup(self, key):
+        """
+        Returns the entry stored for key as a 4-tuple (depth, value, flag, best_move),
+        or None if there is none.
+        """
+        self.num_probes += 1
+        i = key % self.num_slots
+        if self.keys[i] != key:
+            return None
+        self.num_hits += 1
+        return self.depths[i], self.values[i], self.flags[i], self.best_moves[i]
+
+    def get_best_move(self, key):
+        """ Returns the best move stored for key, or None. Does not count as a probe. """
+        i = key % self.num_slots
+        if self.keys[i] != key:
+            return None
+        return self.best_moves[i]
+
+    def store(self, key, depth, value, flag = EXACT, best_move = None):
+        """
+        Stores a search result for key, subject to the replacement scheme.
+        Returns whether the entry was stored.
+        """
+        i = key % self.num_slots
+        if (self.keys[i] is not None and self.keys[i] != key
+                and self.ages[i] == self.age and self.depths[i] > depth):
+            return False
+        self.keys[i] = key
+        self.depths[i] = depth
+        self.values[i] = value
+        self.flags[i] = flag
+        self.best_moves[i] = best_move
+        self.ages[i] = self.age
+        self.num_stores += 1
+        return True
+
+    def clear(self):
+        """ Removes all entries, and resets the age and the probe, hit and store counts. """
+        self.keys = [None] * self.num_slots
+        self.depths = [0] * self.num_slots
+        self.values = [0] * self.num_slots
+        self.flags = [EXACT] * self.num_slots
+        self.best_moves = [None] * self.num_slots
+        self.ages = [0] * self.num_slots
+        self.age = 0
+        self.num_probes = 0
+        self.num_hits = 0
+        self.num_stores = 0
+
+    def num_entries(self):
+        """ Returns the number of occupied slots. """
+        return self.num_slots - self.keys.count(None)
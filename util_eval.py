@@ -6,6 +6,11 @@ from connectfour_gamestate import ConnectFourGameState
 from tictactoe_gamestate import TicTacToeGameState
 from nim_gamestate import NimGameState
 from roomba_gamestate import RoombaRaceGameState
+from checkersgamestate import CheckersGameState, SQUARE_TO_POS, NUM_SQUARES, BLACK
+try:
+    import numpy as np
+except ImportError:  # numpy is only needed for the batch evaluation functions
+    np = None
 """
 In order to use any of the search methods in lab2_algorithms.py
 you'll need define some utility functions and heuristic evaluation functions.
@@ -68,6 +73,26 @@ def faster_endgame_utility(state, maximizer_player_num):
     else:
         return (-2000 + state.get_path_length())
 
+## Dictionary mapping endgame utility functions whose values depend on the path length of the
+## endgame state to their maximum utility M: a win at path length L is worth M - L, a loss -(M - L).
+## Values with abs(value) >= M / 2 are taken to be such wins and losses, so heuristic
+## evaluations used along with these functions should stay below that.
+path_length_utility_fns = {faster_endgame_utility: 2000}
+
+def shift_endgame_utility(util_fn, value, plies):
+    """ Returns value (a utility of util_fn, or a heuristic evaluation) as it would be if
+    the game were plies actions shorter (longer, if plies is negative).
+    Only wins and losses of the utility functions in path_length_utility_fns change:
+    they move plies closer to (further from) the maximum utility.
+
+    Transposition tables store values shifted by the path length of their state, so
+    that an entry holds for the same state reached at any point of the game.
+    """
+    max_utility = path_length_utility_fns.get(util_fn)
+    if max_utility is None or -max_utility / 2 < value < max_utility / 2:
+        return value
+    return value + plies if value > 0 else value - plies
+
 def always_zero(state, maximizer_player_num):
     """ Always returns zero.
     Works as a dummy heuristic evaluation function for any situation.
@@ -375,9 +400,59 @@ def advanced_heuristic_eval_roomba(state, maximizer_player_num):
     raise NotImplementedError
     return 0
 
-# DO THIS
+## Checkers specific evaluation functions: ###########
+
+## A man is worth more the further it has advanced, and a little more on its own back row,
+## where it keeps the opponent's men from being crowned. Kings are worth the same anywhere.
+checkers_man_value = 10
+checkers_king_value = 15
+checkers_advance_value = 0.5
+checkers_back_rank_value = 1
+
+# Value of a man of each color on each square (black advances down, red up)
+checkers_black_man_values = tuple(checkers_man_value + checkers_advance_value * r
+                                  + (checkers_back_rank_value if r == 0 else 0)
+                                  for r, c in SQUARE_TO_POS)
+checkers_red_man_values = tuple(checkers_man_value + checkers_advance_value * (7 - r)
+                                + (checkers_back_rank_value if r == 7 else 0)
+                                for r, c in SQUARE_TO_POS)
+
 def checkers_heuristic_eval_diff(state, maximizer_player_num):
-    return True
+    """ Given a non-endgame CheckersGameState, estimate the value
+    (expected utility) of the state from maximizer_player_num's view.
+
+    Return the difference in material between the players: men valued by
+    advancement and back rank (see checkers_black_man_values), plus kings.
+    """
+    eval_score = 0
+    black_men = state.black & ~state.kings
+    red_men = state.red & ~state.kings
+    while black_men:
+        low = black_men & -black_men
+        eval_score += checkers_black_man_values[low.bit_length() - 1]
+        black_men ^= low
+    while red_men:
+        low = red_men & -red_men
+        eval_score -= checkers_red_man_values[low.bit_length() - 1]
+        red_men ^= low
+    eval_score += checkers_king_value * (bin(state.black & state.kings).count('1') - bin(state.red & state.kings).count('1'))
+    return eval_score if maximizer_player_num == BLACK else -eval_score
+
+def checkers_heuristic_eval_diff_batch(states, maximizer_player_num):
+    """ Vectorized checkers_heuristic_eval_diff: scores a list of states at once,
+    returning a numpy array of their values.
+
+    The bitboards of all the states are unpacked into an (N, 4, 32) array of 0/1
+    (black men, red men, black kings, red kings on each square), and the square
+    values are applied with matrix products instead of a Python loop per state.
+    """
+    masks = np.array([(s.black & ~s.kings, s.red & ~s.kings, s.black & s.kings, s.red & s.kings)
+                      for s in states], dtype = np.int64)
+    bits = (masks[:, :, None] >> np.arange(NUM_SQUARES)) & 1
+    scores = (bits[:, 0, :] @ np.array(checkers_black_man_values)
+              - bits[:, 1, :] @ np.array(checkers_red_man_values)
+              + checkers_king_value * (bits[:, 2, :].sum(axis = 1) - bits[:, 3, :].sum(axis = 1)))
+    return scores if maximizer_player_num == BLACK else -scores
 
 
 roomba_functions = {
@@ -395,9 +470,27 @@ checkerboard_functions = {
                          "faster": faster_endgame_utility},
 
     "heuristic_eval_fn_dict" : {"zero": always_zero,
-                                }
+                                "diff": checkers_heuristic_eval_diff}
 }
 
+### Batch evaluation ################################################
+
+## Dictionary mapping evaluation functions to vectorized versions of them, which take
+## a list of states (and the maximizer_player_num) and return a numpy array of their values.
+batch_eval_fns = {checkers_heuristic_eval_diff: checkers_heuristic_eval_diff_batch}
+
+def batch_evaluate(eval_fn, states, maximizer_player_num):
+    """ Evaluates a list of states with eval_fn, returning a numpy array of their values
+    (or a list, if numpy is not installed).
+    Uses the vectorized version of eval_fn from batch_eval_fns if there is one,
+    otherwise calls eval_fn on each state.
+    """
+    if np is None:
+        return [eval_fn(s, maximizer_player_num) for s in states]
+    if eval_fn in batch_eval_fns:
+        return batch_eval_fns[eval_fn](states, maximizer_player_num)
+    return np.array([eval_fn(s, maximizer_player_num) for s in states], dtype = float)
+
 
 ## Dictionary mapping games to their appropriate evaluation functions. Used by the GUIs
 all_fn_dicts = { RoombaRaceGameState: roomba_functions,